@@ -0,0 +1,33 @@
+import sqlite3
+import os
+
+DB_FILE = "smb_business.db"
+
+def migrate():
+    if not os.path.exists(DB_FILE):
+        print("Database not found. Skipping migration (tables will be created fresh).")
+        return
+
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    
+    try:
+        # Check if column exists
+        cursor.execute("PRAGMA table_info(invoices)")
+        columns = [info[1] for info in cursor.fetchall()]
+        
+        if "render_claimed_at" not in columns:
+            print("Adding 'render_claimed_at' column to 'invoices' table...")
+            cursor.execute("ALTER TABLE invoices ADD COLUMN render_claimed_at DATETIME")
+            conn.commit()
+            print("✅ Migration successful: 'render_claimed_at' column added.")
+        else:
+            print("ℹ️ 'render_claimed_at' column already exists.")
+            
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,36 @@
+import sqlite3
+import os
+
+DB_FILE = "smb_business.db"
+
+def migrate():
+    if not os.path.exists(DB_FILE):
+        print("Database not found. Skipping migration (tables will be created fresh).")
+        return
+
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    
+    try:
+        # Check if index exists
+        cursor.execute("PRAGMA index_list(products)")
+        indexes = [info[1] for info in cursor.fetchall()]
+        
+        if "ix_products_low_stock" not in indexes:
+            print("Adding low-stock partial index to 'products' table...")
+            cursor.execute(
+                "CREATE INDEX ix_products_low_stock ON products (id) "
+                "WHERE stock_quantity <= reorder_threshold"
+            )
+            conn.commit()
+            print("✅ Migration successful: 'ix_products_low_stock' index added.")
+        else:
+            print("ℹ️ 'ix_products_low_stock' index already exists.")
+            
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate()
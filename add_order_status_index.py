@@ -0,0 +1,39 @@
+import sqlite3
+import os
+
+DB_FILE = "smb_business.db"
+
+def migrate():
+    if not os.path.exists(DB_FILE):
+        print("Database not found. Skipping migration (tables will be created fresh).")
+        return
+
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    
+    try:
+        # Orders stored without a status are waiting for approval
+        cursor.execute("UPDATE orders SET status = 'pending' WHERE status IS NULL")
+        if cursor.rowcount:
+            print(f"Backfilled status 'pending' on {cursor.rowcount} orders.")
+            conn.commit()
+        
+        # Check if index exists
+        cursor.execute("PRAGMA index_list(orders)")
+        indexes = [info[1] for info in cursor.fetchall()]
+        
+        if "ix_orders_status_created_at" not in indexes:
+            print("Adding '(status, created_at)' index to 'orders' table...")
+            cursor.execute("CREATE INDEX ix_orders_status_created_at ON orders (status, created_at)")
+            conn.commit()
+            print("✅ Migration successful: 'ix_orders_status_created_at' index added.")
+        else:
+            print("ℹ️ 'ix_orders_status_created_at' index already exists.")
+            
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate()
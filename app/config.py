@@ -20,9 +20,40 @@ class Settings(BaseSettings):
     BASE_DIR: Path = Path(__file__).parent.parent
     INVOICE_DIR: Path = BASE_DIR / "invoices"
     
+    # Invoices
+    INVOICE_RENDER_ASYNC: bool = True  # Render PDFs on a worker pool off the request path
+    INVOICE_RENDER_WORKERS: int = 2
+    INVOICE_DOWNLOAD_WAIT_SECONDS: float = 10  # How long downloads wait for a rendering invoice
+    INVOICE_RENDER_CLAIM_TIMEOUT_SECONDS: float = 300  # A claim this old is assumed abandoned and re-rendered
+    
     # API Settings
     API_V1_PREFIX: str = "/api/v1"
     
+    # AI Agent
+    INTENT_CACHE_SIZE: int = 10000
+    INTENT_CACHE_TTL_SECONDS: float = 0  # 0 disables expiry
+    AI_TIMING_ENABLED: bool = False  # Per-stage timings on every /ai/process call
+    AI_INTENT_CLASSIFIER_PATH: str = ""  # Trained .npz model (train_intent_classifier.py); empty = keywords only
+    AI_CLASSIFIER_MIN_CONFIDENCE: float = 0.7  # Below this, keyword scoring decides
+    AI_CONTEXT_BACKEND: str = "memory"  # memory, sqlite or redis
+    AI_CONTEXT_TTL_SECONDS: float = 1800  # 0 disables expiry
+    AI_CONTEXT_MAX_SESSIONS: int = 10000
+    AI_CONTEXT_SQLITE_PATH: str = "./ai_context.db"
+    AI_CONTEXT_REDIS_URL: str = "redis://localhost:6379/0"  # stub:// uses an in-process stand-in
+    
+    # AI action log writer
+    AI_LOG_ASYNC: bool = True  # Queue log rows for a background batch writer
+    AI_LOG_FLUSH_INTERVAL_MS: int = 200
+    AI_LOG_BATCH_SIZE: int = 200
+    AI_LOG_QUEUE_SIZE: int = 10000
+    AI_LOG_OVERFLOW: str = "drop"  # drop or block when the queue is full
+    
+    # Low-stock alerts
+    LOW_STOCK_ASYNC: bool = True  # Check reported products on a background thread
+    LOW_STOCK_DEBOUNCE_MS: int = 1000  # Gather reports this long before checking
+    LOW_STOCK_SWEEP_SECONDS: float = 600  # Reconciliation sweep over low-stock candidates
+    LOW_STOCK_ALERT_COOLDOWN_SECONDS: float = 3600  # Shortest time between alerts for a product
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
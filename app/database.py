@@ -1,9 +1,13 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from typing import Callable
+import sqlite3
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import settings
 
 # Create SQLite engine
@@ -13,6 +17,22 @@ engine = create_engine(
     echo=settings.DEBUG
 )
 
+
+
+# pysqlite only emits BEGIN before INSERT/UPDATE/DELETE, not before SAVEPOINT,
+# so a savepoint holding the first write of a transaction commits on RELEASE
+# and survives a later rollback. Open the transaction before such a savepoint.
+# (SQLAlchemy's recipe of emitting BEGIN on every begin would also open one
+# at the first SELECT, and sessions holding reads would block other writers.)
+# Registered on the Engine class so test and script engines get it too.
+@event.listens_for(Engine, "savepoint")
+def _sqlite_begin_before_savepoint(conn, name):
+    """Emit BEGIN if the SQLite connection has no transaction open yet"""
+    dbapi_connection = conn.connection.dbapi_connection
+    if isinstance(dbapi_connection, sqlite3.Connection) and not dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN")
+
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -32,6 +52,97 @@ def get_db():
         db.close()
 
 
+def in_unit_of_work(db: Session) -> bool:
+    """Whether db is inside a unit_of_work block"""
+    return db.info.get("unit_of_work", 0) > 0
+
+
+def commit_or_flush(db: Session, *instances):
+    """
+    Commit and refresh instances, or only flush inside a unit of work
+    
+    Services call this instead of db.commit() so the same code can run on its
+    own or as part of a larger transaction owned by the caller.
+    """
+    if in_unit_of_work(db):
+        db.flush()
+        return
+    db.commit()
+    for instance in instances:
+        db.refresh(instance)
+
+
+def on_commit(db: Session, callback: Callable[[], None]):
+    """
+    Run callback once the current work is committed
+    
+    Outside a unit of work the caller has just committed, so it runs right
+    away; inside one it waits for the final commit and is dropped on rollback.
+    """
+    if in_unit_of_work(db):
+        db.info.setdefault("on_commit", []).append(callback)
+    else:
+        callback()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_commit_callbacks(session, previous_transaction):
+    """Forget on_commit callbacks when the outermost transaction rolls back"""
+    if previous_transaction.parent is None:
+        session.info.pop("on_commit", None)
+
+
+@contextmanager
+def savepoint(db: Session):
+    """
+    Run the block in a SAVEPOINT of the current transaction
+    
+    If the block raises, only its own writes and the on_commit callbacks it
+    registered are undone; earlier work in the transaction is kept.
+    
+    Args:
+        db: SQLAlchemy database session
+    """
+    mark = len(db.info.get("on_commit", []))
+    nested = db.begin_nested()
+    try:
+        yield db
+    except BaseException:
+        nested.rollback()
+        del db.info.get("on_commit", [])[mark:]
+        raise
+    nested.commit()
+
+
+@contextmanager
+def unit_of_work(db: Session):
+    """
+    Group every service write in the block into one transaction
+    
+    Services flush instead of committing; the block commits once at the end
+    and rolls everything back if it raises. Nested blocks join the outer one.
+    
+    Args:
+        db: SQLAlchemy database session
+    """
+    depth = db.info.get("unit_of_work", 0)
+    db.info["unit_of_work"] = depth + 1
+    try:
+        yield db
+        if depth == 0:
+            db.commit()
+    except BaseException:
+        if depth == 0:
+            db.rollback()
+        raise
+    finally:
+        db.info["unit_of_work"] = depth
+    
+    if depth == 0:
+        for callback in db.info.pop("on_commit", []):
+            callback()
+
+
 def init_db():
     """
     Initialize database - create all tables
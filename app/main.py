@@ -23,6 +23,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Cursor of the next page on list endpoints
 )
 
 # Include routers
@@ -42,40 +43,53 @@ from app.routes import vendor_notifications
 app.include_router(vendor_notifications.router, prefix=settings.API_V1_PREFIX)
 
 
-import asyncio
-from app.database import SessionLocal
-from app.services.product_service import ProductService
-
-async def periodic_inventory_check():
-    """Background task to check inventory levels periodically"""
-    print("🕒 Periodic Inventory Check System Started (Every 10 mins)")
-    while True:
-        try:
-            db = SessionLocal()
-            try:
-                products = ProductService.get_all_products(db, limit=1000)
-                for p in products:
-                    if p.stock_quantity <= p.reorder_threshold:
-                         ProductService._trigger_low_stock_alert(db, p)
-            finally:
-                db.close()
-        except Exception as e:
-            print(f"Inventory check error: {e}")
-            
-        await asyncio.sleep(600) # 10 minutes
+from app.database import SessionLocal, engine
+from app.services.low_stock_monitor import low_stock_monitor
+from app.services.invoice_service import InvoiceService
+from app.services.invoice_renderer import invoice_renderer
+from app.services.ai_log_sink import ai_log_sink
+from app.services.intent_classifier import load_configured_classifier
+from app.services.nlu_service import nlu_service
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
     init_db()
     
-    # Start background task
-    asyncio.create_task(periodic_inventory_check())
+    # Finish invoices a previous run left rendering
+    db = SessionLocal()
+    try:
+        InvoiceService.resume_pending_invoices(db)
+    finally:
+        db.close()
+    
+    # Statistical intent classifier (optional)
+    if load_configured_classifier():
+        print(f"✅ Intent classifier loaded from {settings.AI_INTENT_CLASSIFIER_PATH}")
+    
+    # Warm NLU engine shared by every request
+    db = SessionLocal()
+    try:
+        warmup_ms = nlu_service.start(db)
+    finally:
+        db.close()
+    print(f"✅ NLU engine warmed up in {warmup_ms:.0f} ms")
+    
+    # Low-stock alerts: checked as stock changes, plus a periodic sweep
+    low_stock_monitor.start(engine)
     
     print("✅ Database initialized successfully")
     print(f"✅ {settings.APP_NAME} v{settings.APP_VERSION} is running")
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    """Finish queued invoice PDFs, AI log rows and low-stock checks before exiting"""
+    invoice_renderer.shutdown(wait=True)
+    ai_log_sink.shutdown()
+    low_stock_monitor.shutdown()
+
+
 @app.get("/")
 def root():
     """Root endpoint"""
@@ -15,6 +15,8 @@ class Invoice(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, unique=True, index=True)
     file_path = Column(String(500), nullable=False)
+    status = Column(String(20), default="ready", server_default="ready", nullable=False)  # rendering, ready, failed
+    render_claimed_at = Column(DateTime, nullable=True)  # When a renderer took the invoice (None = queued)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     # Relationships
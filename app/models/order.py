@@ -1,7 +1,7 @@
 """
 Order and OrderItem database models
 """
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, String
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, String, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -11,6 +11,10 @@ class Order(Base):
     """Order model"""
     
     __tablename__ = "orders"
+    __table_args__ = (
+        # Status filters with a date range or date order (pending queue, dashboard)
+        Index("ix_orders_status_created_at", "status", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, index=True)
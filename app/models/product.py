@@ -1,7 +1,7 @@
 """
 Product database model
 """
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Index
 from app.database import Base
 
 
@@ -16,6 +16,17 @@ class Product(Base):
     stock_quantity = Column(Integer, default=0, nullable=False)
     reorder_threshold = Column(Integer, default=10, nullable=False)
     
+    __table_args__ = (
+        # Partial index holding only products at or below their threshold. The
+        # database keeps it current on every stock or threshold write, so
+        # low-stock queries read the low-stock rows instead of the catalog.
+        Index(
+            "ix_products_low_stock", "id",
+            sqlite_where=stock_quantity <= reorder_threshold,
+            postgresql_where=stock_quantity <= reorder_threshold
+        ),
+    )
+    
     def __repr__(self):
         return f"<Product(id={self.id}, name='{self.name}', stock={self.stock_quantity})>"
     
@@ -1,12 +1,14 @@
 """
 AI Agent API routes
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.services.ai_action_router import AIActionRouter
-from pydantic import BaseModel
-from typing import Dict, Any
+from app.services.nlu_service import NLUService, get_nlu_service
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import uuid
 
 router = APIRouter(prefix="/ai", tags=["ai-agent"])
 
@@ -14,15 +16,41 @@ router = APIRouter(prefix="/ai", tags=["ai-agent"])
 class MessageInput(BaseModel):
     """Input schema for AI agent"""
     message: str
+    session_id: Optional[str] = Field(None, min_length=1, max_length=128)
     
     class Config:
         json_schema_extra = {
             "example": {
-                "message": "Order 2 laptops for Rahul"
+                "message": "Order 2 laptops for Rahul",
+                "session_id": "chat-42"
             }
         }
 
 
+class BatchMessageInput(BaseModel):
+    """Input schema for batch intent detection"""
+    messages: List[str] = Field(..., max_length=10000)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "messages": ["Order 2 laptops for Rahul", "Check stock of mouse"]
+            }
+        }
+
+
+class AIActionLogResponse(BaseModel):
+    """Response schema for one AI action log entry"""
+    id: int
+    action_type: str
+    input_text: Optional[str] = None
+    output_action: Optional[str] = None
+    timestamp: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 class AIResponse(BaseModel):
     """Response schema for AI agent"""
     intent: str
@@ -30,12 +58,16 @@ class AIResponse(BaseModel):
     entities: Dict[str, Any]
     action_result: Dict[str, Any]
     original_message: str
+    session_id: str
+    debug: Optional[Dict[str, Any]] = None
 
 
 @router.post("/process", response_model=AIResponse)
 def process_natural_language(
     input_data: MessageInput,
-    db: Session = Depends(get_db)
+    debug: bool = False,
+    db: Session = Depends(get_db),
+    nlu: NLUService = Depends(get_nlu_service)
 ):
     """
     Process natural language message and execute backend action
@@ -54,10 +86,18 @@ def process_natural_language(
     - "Invoice dedo order #5 ka"
     - "Add customer Priya phone 9876543210"
     - "Payment reminder for Amit"
+    
+    Follow-up answers ("which product?") are matched to the pending request
+    of the same `session_id`, so concurrent chats don't mix up their context.
+    Requests without one get a new `session_id` in the response, which the
+    client should send with its follow-up messages.
+    
+    Pass `?debug=true` to get per-stage timings in the `debug` field.
     """
-    router_instance = AIActionRouter(db)
-    result = router_instance.process_message(input_data.message)
-    return result
+    session_id = input_data.session_id or uuid.uuid4().hex
+    router_instance = nlu.router(db, session_id=session_id)
+    result = router_instance.process_message(input_data.message, debug=debug)
+    return {**result, "session_id": session_id}
 
 
 @router.get("/test")
@@ -88,16 +128,94 @@ def test_ai_agent():
 
 
 @router.post("/test-intent")
-def test_intent_detection(input_data: MessageInput):
+def test_intent_detection(input_data: MessageInput, nlu: NLUService = Depends(get_nlu_service)):
     """
     Test intent detection without executing actions
     
     Use this to see what intent and entities are detected
     without actually creating orders, etc.
     """
-    from app.services.ai_agent_engine import AIAgentEngine
-    
-    engine = AIAgentEngine()
+    engine = nlu.engine
     intent = engine.detect_intent(input_data.message)
     
     return engine.to_json(intent)
+
+
+@router.post("/test-intent/batch")
+def test_intent_detection_batch(input_data: BatchMessageInput, nlu: NLUService = Depends(get_nlu_service)):
+    """
+    Test intent detection for many messages in one request
+    
+    Results come back in input order and match /test-intent for each message.
+    Useful for replaying chat exports without one round trip per message.
+    """
+    engine = nlu.engine
+    intents = engine.detect_intents(input_data.messages)
+    
+    return {
+        "count": len(intents),
+        "results": [engine.to_json(intent) for intent in intents]
+    }
+
+
+@router.get("/logs", response_model=List[AIActionLogResponse])
+def get_ai_logs(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get AI action logs, newest first
+    
+    - **skip**: Number of records to skip (default: 0)
+    - **limit**: Maximum number of records to return (default: 100)
+    - **cursor**: `X-Next-Cursor` header of the previous page (pages by key instead of skipping)
+    
+    The `X-Next-Cursor` response header is set while more logs follow.
+    """
+    from app.services.ai_logger_service import AILoggerService
+    
+    logs, next_cursor = AILoggerService.get_logs_page(db, limit, skip, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return logs
+
+
+@router.get("/timing/histograms")
+def get_timing_histograms():
+    """
+    Get per-intent, per-stage latency histograms of timed /process calls
+    """
+    from app.services.pipeline_timing import timing_histograms
+    
+    return timing_histograms.snapshot()
+
+
+@router.get("/intent-cache/stats")
+def get_intent_cache_stats():
+    """
+    Get hit, miss and eviction counters of the shared intent cache
+    """
+    from app.services.intent_cache import intent_cache
+    
+    return intent_cache.stats()
+
+
+@router.get("/log-sink/stats")
+def get_log_sink_stats():
+    """
+    Get queue depth and written/dropped/failed counters of the AI log writer
+    """
+    from app.services.ai_log_sink import ai_log_sink
+    
+    return ai_log_sink.stats()
+
+
+@router.get("/nlu/stats")
+def get_nlu_stats(nlu: NLUService = Depends(get_nlu_service)):
+    """
+    Get startup warm-up state of the shared NLU engine
+    """
+    return nlu.stats()
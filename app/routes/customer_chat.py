@@ -11,7 +11,8 @@ from app.models.order import Order
 from app.services.customer_service import CustomerService
 from app.services.product_service import ProductService
 from app.services.order_service import OrderService
-from app.services.ai_agent_engine import AIAgentEngine
+from app.services.nlu_service import NLUService, get_nlu_service
+from app.services.product_index import product_index
 from app.schemas.customer import CustomerCreate
 from app.schemas.order import OrderCreate, OrderItemCreate
 from pydantic import BaseModel
@@ -82,7 +83,11 @@ def get_order_status(order_id: int, db: Session = Depends(get_db)):
     return response
 
 @router.post("/message", response_model=ChatResponse)
-def process_customer_message(data: CustomerMessage, db: Session = Depends(get_db)):
+def process_customer_message(
+    data: CustomerMessage,
+    db: Session = Depends(get_db),
+    nlu: NLUService = Depends(get_nlu_service)
+):
     """Process message from customer"""
     # 1. Verify Customer
     customer = CustomerService.get_customer_by_phone(db, data.phone)
@@ -93,8 +98,7 @@ def process_customer_message(data: CustomerMessage, db: Session = Depends(get_db
         )
 
     # 2. Detect Intent
-    engine = AIAgentEngine()
-    intent = engine.detect_intent(data.message)
+    intent = nlu.engine.detect_intent(data.message)
     
     # 3. Handle Intents Specific to Customer
     if intent.name == "create_order":
@@ -114,16 +118,11 @@ def _handle_customer_order(db: Session, customer: Customer, intent: Any, origina
     if "product_name" not in entities:
         return ChatResponse(message="Which product would you like to order?")
         
-    # Find product (reuse logic from ActionRouter essentially)
+    # Find product by name through the shared product index
     product_name = entities["product_name"]
-    products = ProductService.get_all_products(db)
-    
-    # Simple search
-    target_product = None
-    for p in products:
-        if product_name.lower() in p.name.lower():
-            target_product = p
-            break
+    product_index.ensure_loaded(db)
+    product_id = product_index.find_containing(product_name)
+    target_product = ProductService.get_product(db, product_id) if product_id is not None else None
             
     if not target_product:
         return ChatResponse(message=f"Sorry, we don't have '{product_name}' in stock.")
@@ -1,12 +1,12 @@
 """
 Customer API routes
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.customer import CustomerCreate, CustomerResponse
 from app.services.customer_service import CustomerService
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/customers", tags=["customers"])
 
@@ -29,14 +29,27 @@ def create_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[CustomerResponse])
-def get_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_customers(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     """
     Get all customers with pagination
     
     - **skip**: Number of records to skip (default: 0)
     - **limit**: Maximum number of records to return (default: 100)
+    - **cursor**: `X-Next-Cursor` header of the previous page; pages by ID
+      instead of skipping, which stays fast deep into the table
+    
+    The `X-Next-Cursor` response header is set while more customers follow.
     """
-    return CustomerService.get_all_customers(db, skip, limit)
+    customers, next_cursor = CustomerService.get_customers_page(db, limit, skip, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return customers
 
 
 @router.get("/{customer_id}", response_model=CustomerResponse)
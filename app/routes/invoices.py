@@ -1,12 +1,14 @@
 """
 Invoice API routes
 """
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database import get_db
 from app.schemas.invoice import InvoiceResponse
 from app.services.invoice_service import InvoiceService
+from app.services.invoice_renderer import invoice_renderer
 import os
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
@@ -41,14 +43,37 @@ def get_invoice(invoice_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{invoice_id}/download")
-def download_invoice(invoice_id: int, db: Session = Depends(get_db)):
+def download_invoice(
+    invoice_id: int,
+    wait: float = Query(settings.INVOICE_DOWNLOAD_WAIT_SECONDS, ge=0, le=60),
+    db: Session = Depends(get_db)
+):
     """
     Download the PDF invoice file
+    
+    - **wait**: Seconds to wait for an invoice that is still rendering
+    
+    Returns 202 with `status: rendering` and a Retry-After header if the
+    PDF is not ready in time.
     """
     invoice = InvoiceService.get_invoice(db, invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
+    if invoice.status == "rendering":
+        invoice_renderer.wait(invoice_id, timeout=wait)
+        db.refresh(invoice)
+    
+    if invoice.status == "rendering":
+        return JSONResponse(
+            status_code=202,
+            content={"id": invoice.id, "status": invoice.status, "detail": "Invoice is still rendering"},
+            headers={"Retry-After": "1"}
+        )
+    
+    if invoice.status == "failed":
+        raise HTTPException(status_code=500, detail="Invoice rendering failed")
+    
     if not os.path.exists(invoice.file_path):
         raise HTTPException(status_code=404, detail="Invoice file not found")
     
@@ -1,14 +1,15 @@
 """
 Order API routes
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.schemas.order import OrderCreate, OrderResponse
+from app.schemas.order import BulkOrderCreate, BulkOrderResponse, OrderCreate, OrderResponse
 from app.services.order_service import OrderService
 from app.services.invoice_service import InvoiceService
 from app.models.order import Order
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
@@ -33,15 +34,74 @@ def create_order(order: OrderCreate, db: Session = Depends(get_db)):
     return OrderService.create_order(db, order)
 
 
+@router.post("/bulk", response_model=BulkOrderResponse, status_code=201)
+def create_orders_bulk(bulk: BulkOrderCreate, response: Response, db: Session = Depends(get_db)):
+    """
+    Create many orders in one request
+    
+    - **orders**: List of orders, each shaped like the body of POST /orders (1 to 1000)
+    - **mode**: `all_or_nothing` (default) creates nothing if any order fails;
+      `best_effort` creates every order that can be filled
+    
+    Orders are checked in list order, so earlier orders get stock first.
+    Returns one result per order with its order_id or error; responds 400
+    if no order was created.
+    """
+    results = OrderService.create_orders_bulk(db, bulk.orders, all_or_nothing=bulk.mode == "all_or_nothing")
+    created = sum(1 for result in results if result["success"])
+    if not created:
+        response.status_code = 400
+    return {
+        "mode": bulk.mode,
+        "created": created,
+        "failed": len(results) - created,
+        "results": results,
+    }
+
+
 @router.get("/", response_model=List[OrderResponse])
-def get_orders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_orders(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    newest_first: bool = False,
+    db: Session = Depends(get_db)
+):
     """
-    Get all orders with pagination
+    Get all orders with pagination, oldest first
     
     - **skip**: Number of records to skip (default: 0)
     - **limit**: Maximum number of records to return (default: 100)
+    - **cursor**: `X-Next-Cursor` header of the previous page (send the same
+      filters and order); pages by key instead of skipping, which stays fast deep into the table
+    - **status**: Only orders with this status (pending, approved, rejected)
+    - **customer_id**: Only this customer's orders
+    - **created_from** / **created_to**: Only orders created in [from, to)
+    - **newest_first**: Newest orders first (default: false)
+    
+    The `X-Next-Cursor` response header is set while more orders follow.
+    """
+    orders, next_cursor = OrderService.get_orders_page(
+        db, limit, skip, cursor,
+        status=status, customer_id=customer_id, created_from=created_from, created_to=created_to,
+        newest_first=newest_first
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return orders
+
+
+@router.get("/pending/count")
+def get_pending_order_count(db: Session = Depends(get_db)):
+    """
+    Get the number of orders waiting for approval (cheap enough to poll)
     """
-    return OrderService.get_all_orders(db, skip, limit)
+    return {"status": "pending", "count": OrderService.count_orders(db, "pending")}
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
@@ -75,8 +135,8 @@ def approve_order(order_id: int, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(order)
     
-    # Generate Invoice
-    InvoiceService.generate_invoice(db, order.id)
+    # Generate Invoice (PDF renders in the background)
+    InvoiceService.generate_invoice(db, order.id, background=True)
     
     return order
 
@@ -1,12 +1,12 @@
 """
 Product API routes
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
 from app.services.product_service import ProductService
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/products", tags=["products"])
 
@@ -25,14 +25,27 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[ProductResponse])
-def get_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_products(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     """
     Get all products with pagination
     
     - **skip**: Number of records to skip (default: 0)
     - **limit**: Maximum number of records to return (default: 100)
+    - **cursor**: `X-Next-Cursor` header of the previous page; pages by ID
+      instead of skipping, which stays fast deep into the table
+    
+    The `X-Next-Cursor` response header is set while more products follow.
     """
-    return ProductService.get_all_products(db, skip, limit)
+    products, next_cursor = ProductService.get_products_page(db, limit, skip, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return products
 
 
 @router.get("/low-stock", response_model=List[ProductResponse])
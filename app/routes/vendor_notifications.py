@@ -35,3 +35,10 @@ def mark_read(req: MarkReadRequest, db: Session = Depends(get_db)):
     """Mark notification as read"""
     success = NotificationService.mark_as_read(db, req.notification_id)
     return {"success": success}
+
+@router.get("/low-stock/stats")
+def get_low_stock_monitor_stats():
+    """Get pending reports and check/sweep/alert counters of the low-stock monitor"""
+    from app.services.low_stock_monitor import low_stock_monitor
+    
+    return low_stock_monitor.stats()
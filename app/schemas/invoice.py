@@ -10,6 +10,7 @@ class InvoiceResponse(BaseModel):
     id: int
     order_id: int
     file_path: str
+    status: str = "ready"
     created_at: datetime
     
     class Config:
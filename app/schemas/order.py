@@ -2,7 +2,7 @@
 Order Pydantic schemas
 """
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
@@ -41,3 +41,28 @@ class OrderResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class BulkOrderCreate(BaseModel):
+    """Schema for creating many orders in one request"""
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=1000, description="Orders to create")
+    mode: Literal["all_or_nothing", "best_effort"] = Field(
+        "all_or_nothing", description="Create nothing if any order fails, or create every order that can be filled"
+    )
+
+
+class BulkOrderResult(BaseModel):
+    """Outcome of one order in a bulk request"""
+    index: int
+    success: bool
+    order_id: Optional[int] = None
+    order_total: Optional[float] = None
+    error: Optional[str] = None
+
+
+class BulkOrderResponse(BaseModel):
+    """Schema for bulk order response"""
+    mode: str
+    created: int
+    failed: int
+    results: List[BulkOrderResult]
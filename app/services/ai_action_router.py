@@ -11,109 +11,130 @@ from typing import Dict, Any, Optional
 from sqlalchemy.orm import Session
 from app.services.ai_agent_engine import AIAgentEngine, Intent
 from app.services.customer_service import CustomerService
+from app.services.customer_index import customer_index
 from app.services.product_service import ProductService
+from app.services.product_index import product_index
+from app.services.low_stock_monitor import low_stock_monitor
 from app.services.order_service import OrderService
 from app.services.invoice_service import InvoiceService
 from app.services.ai_logger_service import AILoggerService
+from app.services.context_store import ContextStore, context_store as default_context_store
+from app.services.pipeline_timing import span, start_recording, stop_recording, timing_histograms
+from app.config import settings
+from app.database import commit_or_flush, savepoint, unit_of_work
 from app.schemas.customer import CustomerCreate
 from app.schemas.product import ProductCreate
 from app.schemas.order import OrderCreate, OrderItemCreate
 from fastapi import HTTPException
 
 
-
-# Simple in-memory context store (for hackathon/demo purposes)
-# In production, use Redis or database with session IDs
-AI_CONTEXT = {}
-
 class AIActionRouter:
     """
     Routes AI-detected intents to backend actions
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, session_id: str = "default",
+                 context_store: Optional[ContextStore] = None, engine: Optional[AIAgentEngine] = None):
         """
         Initialize router with database session
         
         Args:
             db: SQLAlchemy database session
+            session_id: Conversation ID whose pending context this router resumes
+            context_store: Conversation context store (defaults to the configured one)
+            engine: AI Agent Engine to reuse (defaults to a new one)
         """
         self.db = db
-        self.engine = AIAgentEngine()
+        self.engine = engine if engine is not None else AIAgentEngine()
+        self.session_id = session_id
+        self.context_store = context_store if context_store is not None else default_context_store
 
-    def _find_best_match(self, search_term: str, products: list) -> Optional[Any]:
+    def _find_best_match(self, search_term: str) -> Optional[Any]:
         """
-        Find the best matching product using a scoring system
+        Find the best matching product using the in-memory product index
         
         Args:
             search_term: The product name to search for
-            products: List of Product objects
             
         Returns:
             Best matching Product object or None
         """
-        search_term = search_term.lower().strip()
-        best_product = None
-        best_score = 0
+        with span("lookup.product"):
+            product_index.ensure_loaded(self.db)
+            product_id = product_index.find_best_match(search_term)
+            if product_id is None:
+                return None
+            
+            product = ProductService.get_product(self.db, product_id)
+            if product is None:
+                # Index is stale (product removed elsewhere); rebuild and retry once
+                product_index.load(self.db)
+                product_id = product_index.find_best_match(search_term)
+                product = ProductService.get_product(self.db, product_id) if product_id is not None else None
+            return product
+    
+    def _find_customer(self, customer_name: str) -> Optional[Any]:
+        """
+        Resolve a customer name using the in-memory customer index
         
-        for p in products:
-            p_name = p.name.lower()
-            score = 0
+        Args:
+            customer_name: Customer name as mentioned in the message
             
-            # Rule 1: Exact Match (100 pts)
-            if p_name == search_term:
-                score = 100
-                
-            # Rule 2: Contains Match (80 pts)
-            elif search_term in p_name:
-                # Deduct points for extra length to prefer "Keyboard" over "Logitech Keyboard" 
-                # if search is just "Keyboard"
-                score = 80 - (len(p_name) - len(search_term))
-                
-            # Rule 3: Word Intersection (10 pts per word)
-            else:
-                p_words = set(p_name.split())
-                s_words = set(search_term.split())
-                common_words = p_words.intersection(s_words)
-                if common_words:
-                    score = len(common_words) * 10
-                    # Bonus if the first word matches (likely brand name)
-                    if p_name.split()[0] == search_term.split()[0]:
-                        score += 5
+        Returns:
+            Matching Customer object or None
+        """
+        with span("lookup.customer"):
+            customer_index.ensure_loaded(self.db)
+            customer_id = customer_index.resolve(customer_name)
+            if customer_id is None:
+                return None
             
-            if score > best_score:
-                best_score = score
-                best_product = p
-                
-        # Fallback: Fuzzy matching if score is low
-        if best_score < 20:
-             from difflib import get_close_matches
-             p_names = [p.name.lower() for p in products]
-             matches = get_close_matches(search_term, p_names, n=1, cutoff=0.6)
-             if matches:
-                 for p in products:
-                     if p.name.lower() == matches[0]:
-                         return p
-                         
-        return best_product
+            customer = CustomerService.get_customer(self.db, customer_id)
+            if customer is None:
+                # Index is stale (customer removed elsewhere); rebuild and retry once
+                customer_index.load(self.db)
+                customer_id = customer_index.resolve(customer_name)
+                customer = CustomerService.get_customer(self.db, customer_id) if customer_id is not None else None
+            return customer
     
-    def process_message(self, message: str) -> Dict[str, Any]:
+    def process_message(self, message: str, debug: bool = False) -> Dict[str, Any]:
         """
         Process natural language message and execute backend action
         
         Args:
             message: Natural language input
+            debug: Return per-stage timings in a "debug" field
             
         Returns:
             Dictionary with intent, action result, and metadata
         """
-        global AI_CONTEXT
+        if not (debug or settings.AI_TIMING_ENABLED):
+            return self._process_in_transaction(message)
+        
+        recorder, token = start_recording()
+        try:
+            result = self._process_in_transaction(message)
+        finally:
+            stop_recording(token)
+        
+        timing_histograms.record(result["intent"], recorder)
+        result["debug"] = {"timings": recorder.to_dict()}
+        return result
+    
+    def _process_in_transaction(self, message: str) -> Dict[str, Any]:
+        """Process a message as one unit of work: a single commit, or a rollback on error"""
+        with unit_of_work(self.db):
+            return self._process_message(message)
+    
+    def _process_message(self, message: str) -> Dict[str, Any]:
+        """Detect intent (or resume a pending one) and execute it"""
+        context = self.context_store.get(self.session_id) or {}
         
         # Check if we are waiting for specific info
-        if AI_CONTEXT.get("status") == "waiting_for_info":
-            missing_field = AI_CONTEXT.get("missing_field")
-            prev_intent_name = AI_CONTEXT.get("intent")
-            prev_entities = AI_CONTEXT.get("entities", {})
+        if context.get("status") == "waiting_for_info":
+            missing_field = context.get("missing_field")
+            prev_intent_name = context.get("intent")
+            prev_entities = context.get("entities", {})
             
             # If waiting for product name, treat message as product name
             if missing_field == "product_name":
@@ -127,14 +148,12 @@ class AIActionRouter:
                     entities=prev_entities
                 )
                 
-                # Clear context
-                AI_CONTEXT = {}
-                
                 # Skip detection and go straight to execution
                 return self._execute_intent(intent, message)
         
         # Normal Intent Detection
-        intent = self.engine.detect_intent(message)
+        with span("detect_intent"):
+            intent = self.engine.detect_intent(message)
         
         # Log the AI action
         AILoggerService.log_action(
@@ -148,39 +167,38 @@ class AIActionRouter:
 
     def _execute_intent(self, intent: Intent, message: str) -> Dict[str, Any]:
         """Execute the identified intent"""
-        global AI_CONTEXT
-        
         # Clear context on new intent unless we set it again
-        AI_CONTEXT = {}
+        self.context_store.delete(self.session_id)
 
-        # Route to appropriate action
+        # Route to appropriate action; a failure undoes only the action's writes
         try:
-            if intent.name == "create_order":
-                result = self._handle_create_order(intent, message)
-            elif intent.name == "check_inventory":
-                result = self._handle_check_inventory(intent, message)
-            elif intent.name == "list_products":
-                result = self._handle_list_products(intent, message)
-            elif intent.name == "add_product":
-                result = self._handle_add_product(intent, message)
-            elif intent.name == "generate_invoice":
-                result = self._handle_generate_invoice(intent, message)
-            elif intent.name == "add_customer":
-                result = self._handle_add_customer(intent, message)
-            elif intent.name == "payment_reminder_suggestion":
-                result = self._handle_payment_reminder(intent, message)
-            else:
-                result = {
-                    "status": "unknown_intent",
-                    "message": "I didn't understand that. Can you rephrase?",
-                    "suggestions": [
-                        "Create an order",
-                        "Check inventory",
-                        "Generate invoice",
-                        "Add customer",
-                        "Payment reminder"
-                    ]
-                }
+            with span("execute." + intent.name), savepoint(self.db):
+                if intent.name == "create_order":
+                    result = self._handle_create_order(intent, message)
+                elif intent.name == "check_inventory":
+                    result = self._handle_check_inventory(intent, message)
+                elif intent.name == "list_products":
+                    result = self._handle_list_products(intent, message)
+                elif intent.name == "add_product":
+                    result = self._handle_add_product(intent, message)
+                elif intent.name == "generate_invoice":
+                    result = self._handle_generate_invoice(intent, message)
+                elif intent.name == "add_customer":
+                    result = self._handle_add_customer(intent, message)
+                elif intent.name == "payment_reminder_suggestion":
+                    result = self._handle_payment_reminder(intent, message)
+                else:
+                    result = {
+                        "status": "unknown_intent",
+                        "message": "I didn't understand that. Can you rephrase?",
+                        "suggestions": [
+                            "Create an order",
+                            "Check inventory",
+                            "Generate invoice",
+                            "Add customer",
+                            "Payment reminder"
+                        ]
+                    }
         except Exception as e:
             result = {
                 "status": "error",
@@ -197,12 +215,12 @@ class AIActionRouter:
         
         # Result handling for missing info (Set Context)
         if result.get("status") == "missing_info":
-            AI_CONTEXT = {
+            self.context_store.set(self.session_id, {
                 "status": "waiting_for_info",
                 "intent": intent.name,
                 "entities": intent.entities,
                 "missing_field": result.get("missing")[0] if result.get("missing") else None
-            }
+            })
         
         # Return complete response
         return {
@@ -237,24 +255,12 @@ class AIActionRouter:
         
         # 1. Try by phone if provided
         if "phone" in entities:
-             customer = CustomerService.get_customer_by_phone(self.db, entities["phone"])
+             with span("lookup.customer"):
+                 customer = CustomerService.get_customer_by_phone(self.db, entities["phone"])
         
         # 2. Try by name (fuzzy) if no customer found yet
         if not customer:
-            customers = CustomerService.get_all_customers(self.db)
-            customer_names = [c.name.lower() for c in customers]
-            from difflib import get_close_matches
-            
-            # Use 0.8 cutoff for customer names to avoid wrong person
-            matches = get_close_matches(
-                entities["customer_name"].lower(), 
-                customer_names, 
-                n=1, 
-                cutoff=0.8
-            )
-            
-            if matches:
-                customer = next(c for c in customers if c.name.lower() == matches[0])
+            customer = self._find_customer(entities["customer_name"])
         
         # 3. Auto-create if still not found (The FIX)
         is_new_customer = False
@@ -273,7 +279,9 @@ class AIActionRouter:
             )
             
             try:
-                customer = CustomerService.create_customer(self.db, customer_data)
+                # Savepoint: a failed insert must not undo the intent log written earlier
+                with savepoint(self.db):
+                    customer = CustomerService.create_customer(self.db, customer_data)
                 is_new_customer = True
                 
                 # Log auto-creation
@@ -291,12 +299,10 @@ class AIActionRouter:
                  }
         
         # Find product
-        products = ProductService.get_all_products(self.db)
-        product = None
-        product = self._find_best_match(entities["product_name"], products)
+        product = self._find_best_match(entities["product_name"])
         
         if not product:
-            available = [p.name for p in products[:10]]
+            available = [p.name for p in ProductService.get_all_products(self.db, limit=10)]
             return {
                 "status": "product_not_found",
                 "message": f"Product '{entities['product_name']}' not found",
@@ -326,25 +332,28 @@ class AIActionRouter:
             ]
         )
         
-        order = OrderService.create_order(self.db, order_data)
+        with span("order.create"):
+            order = OrderService.create_order(self.db, order_data)
         
-        # Auto-generate Invoice
-        invoice = InvoiceService.generate_invoice(self.db, order.id)
+        # Auto-generate Invoice (PDF renders in the background)
+        with span("invoice.generate"):
+            invoice = InvoiceService.generate_invoice(self.db, order.id, background=True)
         
         # Log success
         AILoggerService.log_action(
             db=self.db,
             action_type="AI_ORDER_CREATED",
             input_text=message,
-            output_action=f"Order #{order.id} created & Invoice generated for {customer.name}, Total: ₹{order.order_total:.2f}"
+            output_action=f"Order #{order.id} created & Invoice #{invoice.id} queued for {customer.name}, Total: ₹{order.order_total:.2f}"
         )
         
         msg_suffix = " (New Customer Auto-Created)" if is_new_customer else ""
         return {
             "status": "success",
-            "message": f"Order created and invoice generated! Order ID: {order.id}{msg_suffix}",
+            "message": f"Order created and invoice is being generated! Order ID: {order.id}{msg_suffix}",
             "order_id": order.id,
             "invoice_id": invoice.id,
+            "invoice_status": invoice.status,
             "customer": customer.name,
             "product": product.name,
             "quantity": quantity,
@@ -391,13 +400,11 @@ class AIActionRouter:
         
         if "product_name" in entities:
             # Check specific product
-            products = ProductService.get_all_products(self.db)
-            product = None
-            product = self._find_best_match(entities["product_name"], products)
+            product = self._find_best_match(entities["product_name"])
             
             if not product:
                 # Show available products as suggestions
-                available = [p.name for p in products[:10]]
+                available = [p.name for p in ProductService.get_all_products(self.db, limit=10)]
                 return {
                     "status": "product_not_found",
                     "message": f"Product '{entities['product_name']}' not found",
@@ -460,7 +467,8 @@ class AIActionRouter:
             }
         
         # Generate invoice
-        invoice = InvoiceService.generate_invoice(self.db, order_id)
+        with span("invoice.generate"):
+            invoice = InvoiceService.generate_invoice(self.db, order_id)
         
         # Log action
         AILoggerService.log_action(
@@ -564,10 +572,8 @@ class AIActionRouter:
             }
         
         # Check if product already exists
-        products = ProductService.get_all_products(self.db)
-        
         # Use find_best_match but verify it's a strong match
-        existing_product = self._find_best_match(entities["product_name"], products)
+        existing_product = self._find_best_match(entities["product_name"])
         
         # Only consider it a match for update if names are very similar
         is_match = False
@@ -588,8 +594,9 @@ class AIActionRouter:
             if "reorder_threshold" in entities:
                 existing_product.reorder_threshold = entities["reorder_threshold"]
             
-            self.db.commit()
-            self.db.refresh(existing_product)
+            commit_or_flush(self.db, existing_product)
+            if existing_product.needs_reorder:
+                low_stock_monitor.notify(self.db, [existing_product.id])
             
             product = existing_product
             action_type = "AI_PRODUCT_UPDATED"
@@ -8,11 +8,70 @@ This module handles:
 - Spelling error tolerance
 - Action routing to backend APIs
 """
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, replace
+from functools import lru_cache
 import re
-from difflib import get_close_matches
 from sqlalchemy.orm import Session
+from app.services.keyword_automaton import KeywordAutomaton
+from app.services.fuzzy_index import FuzzyIndex
+from app.services.intent_cache import IntentCache, intent_cache as shared_intent_cache
+from app.services.intent_classifier import IntentClassifier, get_active_classifier
+from app.services.pipeline_timing import span
+from app.services.transliteration import normalize_text
+
+
+# Entity extraction patterns, compiled once at import. extract_entities gets
+# normalized (lowercased) text, so none of them needs re.IGNORECASE.
+ENTITY_PATTERNS = {
+    # "for <name>", "customer <name>", "naam <name>"
+    "customer_name": [
+        re.compile(r"for\s+([a-z]+(?:\s+[a-z]+)?)"),
+        re.compile(r"to\s+([a-z]+(?:\s+[a-z]+)?)"),
+        re.compile(r"customer\s+([a-z]+(?:\s+[a-z]+)?)"),
+        re.compile(r"naam\s+([a-z]+(?:\s+[a-z]+)?)"),
+        re.compile(r"name\s+([a-z]+(?:\s+[a-z]+)?)"),
+    ],
+    # "product <name> price", "add new <name> stock"
+    "product_add": [
+        re.compile(r'product\s+(.*?)\s+(?:price|stock|cost|rate)'),
+        re.compile(r'add\s+(?:new\s+)?(.*?)\s+(?:price|stock|cost|rate)'),
+        re.compile(r'create\s+(?:new\s+)?(.*?)\s+(?:price|stock|cost|rate)'),
+    ],
+    # Hyphenated part numbers or product codes (e.g., usb-hub, lap-001)
+    "product_code": re.compile(r'\b([a-z]+-[a-z0-9]+)\b'),
+    "product_attribute_value": re.compile(r'\b(price|stock|cost|rate|qty|quantity)\s*[:]?\s*\d+(?:\.\d+)?'),
+    "product_units": re.compile(r'\b(pieces|piece|units|unit|qty|quantity|nos|karo)\b'),
+    "product_stopwords": re.compile(r'\b(for|to|of|in|at|with)\b'),
+    "special_chars": re.compile(r'[^\w\s-]'),
+    "digit": re.compile(r'\d'),
+    "number": re.compile(r'\b(\d+)\b'),
+    # "stock 25", "qty 10", "10 units"
+    "quantity": [
+        re.compile(r'(?:stock|qty|quantity|units|pieces|pcs|count)\s*[:]?\s*(\d+)'),
+        re.compile(r'(\d+)\s*(?:pieces|units|pcs|qty|quantity|stock)'),
+    ],
+    # Words that mark a nearby number as a price rather than a quantity
+    "price_context": ('price', 'rs', 'cost', 'rate', '₹'),
+    # "price 2000", "rs 100", "₹100", "100 rupees", "100 rs"
+    "price": [
+        re.compile(r'price[:\s]+(\d+(?:\.\d{2})?)'),
+        re.compile(r'(?:rs\.?|₹)\s*(\d+(?:\.\d{2})?)'),
+        re.compile(r'(\d+(?:\.\d{2})?)\s*(?:rupees|rs|inr)'),
+    ],
+    # Indian phone numbers
+    "phone": [
+        re.compile(r'\+91[\s-]?\d{10}'),
+        re.compile(r'\d{10}'),
+        re.compile(r'\d{5}[\s-]\d{5}'),
+    ],
+    "phone_separators": re.compile(r'[\s-]'),
+    # "order #123", "order 123", "order id 123"
+    "order_id": [
+        re.compile(r'order\s*#?\s*(\d+)'),
+        re.compile(r'order\s+id\s+(\d+)'),
+    ],
+}
 
 
 @dataclass
@@ -78,9 +137,135 @@ class AIAgentEngine:
         "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10
     }
     
-    def __init__(self):
-        """Initialize AI Agent Engine"""
-        self.intent_cache = {}
+    # Keyword groups for the add_product boost rule in detect_intent
+    ADD_PRODUCT_VERBS = ["add", "new", "create", "naaya", "nava", "banao", "dalo"]
+    ADD_PRODUCT_ATTRIBUTES = ["price", "stock", "cost", "rate", "daam", "bharti"]
+    ADD_PRODUCT_EXCLUSIONS = ["customer", "order", "bill", "invoice"]
+    
+    # Max characters deleted from a token or keyword for a fuzzy match
+    FUZZY_MAX_DISTANCE = 2
+    
+    # Max distinct tokens remembered by the fuzzy lookup
+    FUZZY_CACHE_SIZE = 10000
+    
+    # Compiled keyword matcher state, built once per class (see _compile_patterns)
+    _keyword_matcher: Optional[KeywordAutomaton] = None
+    _keyword_weights: Dict[str, List[tuple]] = {}
+    _keyword_strip_res: Tuple[Tuple[str, re.Pattern], ...] = ()
+    _fuzzy_index: Optional[FuzzyIndex] = None
+    _fuzzy_lookup = None
+    
+    def __init__(self, cache: Optional[IntentCache] = None, classifier: Optional[IntentClassifier] = None):
+        """
+        Initialize AI Agent Engine
+        
+        Args:
+            cache: Intent cache to use (defaults to the process-wide shared cache)
+            classifier: Statistical intent classifier tried before keyword scoring
+                (defaults to the one loaded at startup, if any)
+        """
+        self.intent_cache = cache if cache is not None else shared_intent_cache
+        self.classifier = classifier if classifier is not None else get_active_classifier()
+        self._compile_patterns()
+    
+    @classmethod
+    def _compile_patterns(cls):
+        """
+        Build the keyword automaton and fuzzy index once from INTENT_PATTERNS
+        
+        Every exact keyword hit in a message is found in one pass over the text.
+        Misspelled tokens are looked up in a symmetric-delete index of the
+        keywords, and results are memoized per token.
+        """
+        if "_keyword_matcher" in cls.__dict__ and cls._keyword_matcher is not None:
+            return
+        
+        weights: Dict[str, List[tuple]] = {}
+        for intent_name, keywords in cls.INTENT_PATTERNS.items():
+            for keyword in keywords:
+                # Multi-word phrases get much higher score
+                weight = 5 if len(keyword.split()) > 1 else 2
+                weights.setdefault(keyword, []).append((intent_name, weight))
+        
+        matcher = KeywordAutomaton(
+            list(weights)
+            + cls.ADD_PRODUCT_VERBS
+            + cls.ADD_PRODUCT_ATTRIBUTES
+            + cls.ADD_PRODUCT_EXCLUSIONS
+        )
+        
+        fuzzy_index = FuzzyIndex(weights, max_distance=cls.FUZZY_MAX_DISTANCE, cutoff=0.8)
+        fuzzy_lookup = lru_cache(maxsize=cls.FUZZY_CACHE_SIZE)(fuzzy_index.lookup)
+        
+        cls._keyword_weights = weights
+        cls._keyword_strip_res = cls._build_keyword_strip_res()
+        cls._fuzzy_index = fuzzy_index
+        cls._fuzzy_lookup = staticmethod(fuzzy_lookup)
+        cls._keyword_matcher = matcher
+    
+    @classmethod
+    def _build_keyword_strip_res(cls) -> Tuple[Tuple[str, re.Pattern], ...]:
+        """
+        Compile one word-bounded pattern per intent keyword, in INTENT_PATTERNS order
+        
+        Keywords are stripped one after another, because removing one can
+        join its neighbours into the next match ("product add product banao").
+        A single alternation would give different product names. Each
+        pattern is paired with its keyword so absent ones are skipped with a
+        substring test.
+        """
+        ordered = [k for keywords in cls.INTENT_PATTERNS.values() for k in keywords]
+        return tuple((k, re.compile(r'\b' + re.escape(k) + r'\b')) for k in ordered)
+    
+    def _score_intents(self, text_lower: str) -> Dict[str, int]:
+        """
+        Score every intent against normalized text in a single pass
+        
+        Exact (substring) keyword hits score 5 for phrases and 2 for single
+        words; keywords without an exact hit score 1 if they fuzzy match a word.
+        
+        Args:
+            text_lower: Lowercased, stripped text
+            
+        Returns:
+            Score per intent, in INTENT_PATTERNS order
+        """
+        with span("detect_intent.keyword_scoring"):
+            hits = self._keyword_matcher.search(text_lower)
+        
+        with span("detect_intent.fuzzy_matching"):
+            fuzzy_hits = set()
+            for token in set(text_lower.split()):
+                fuzzy_hits |= self._fuzzy_lookup(token)
+            fuzzy_hits -= hits
+        
+        intent_scores = {intent_name: 0 for intent_name in self.INTENT_PATTERNS}
+        for keyword in hits:
+            for intent_name, weight in self._keyword_weights.get(keyword, ()):
+                intent_scores[intent_name] += weight
+        for keyword in fuzzy_hits:
+            for intent_name, _ in self._keyword_weights[keyword]:
+                # Fuzzy match gets lower score
+                intent_scores[intent_name] += 1
+        
+        # Special rule for add_product: If "add" or "new" (or Hinglish variants) is present with "price" or "stock", 
+        # and it's not a customer/order action, strongly favor add_product
+        if any(k in hits for k in self.ADD_PRODUCT_VERBS) and \
+           any(k in hits for k in self.ADD_PRODUCT_ATTRIBUTES) and \
+           not any(k in hits for k in self.ADD_PRODUCT_EXCLUSIONS):
+            intent_scores["add_product"] = intent_scores.get("add_product", 0) + 10
+        
+        return intent_scores
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Lowercase and strip text, and rewrite Devanagari to Latin tokens
+        
+        "लैपटॉप चाहिए २" becomes "laptop chahiye 2", so Hindi-script messages
+        hit the same exact keywords (and cache entries) as romanized ones.
+        """
+        return normalize_text(text.lower().strip())
     
     def detect_intent(self, text: str) -> Intent:
         """
@@ -93,35 +278,78 @@ class AIAgentEngine:
             Intent object with name, confidence, and entities
         """
         # Normalize text
-        text_lower = text.lower().strip()
+        text_lower = self.normalize(text)
         
-        # Check cache
-        if text_lower in self.intent_cache:
-            return self.intent_cache[text_lower]
+        # Check cache (copy so callers can't mutate the shared entry)
+        with span("detect_intent.cache_lookup"):
+            cached = self.intent_cache.get(text_lower)
+        if cached is not None:
+            return replace(cached, entities=dict(cached.entities))
         
-        # Score each intent with improved logic
-        intent_scores = {}
-        for intent_name, keywords in self.INTENT_PATTERNS.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in text_lower:
-                    # Multi-word phrases get much higher score
-                    word_count = len(keyword.split())
-                    if word_count > 1:
-                        score += 5  # Strong match for phrases
-                    else:
-                        score += 2  # Regular match for single words
-                elif self._fuzzy_match(keyword, text_lower):
-                    # Fuzzy match gets lower score
-                    score += 1
-            intent_scores[intent_name] = score
+        intent = self._classify(text_lower)
         
-        # Special rule for add_product: If "add" or "new" (or Hinglish variants) is present with "price" or "stock", 
-        # and it's not a customer/order action, strongly favor add_product
-        if any(k in text_lower for k in ["add", "new", "create", "naaya", "nava", "banao", "dalo"]) and \
-           any(k in text_lower for k in ["price", "stock", "cost", "rate", "daam", "bharti"]) and \
-           not any(k in text_lower for k in ["customer", "order", "bill", "invoice"]):
-            intent_scores["add_product"] = intent_scores.get("add_product", 0) + 10
+        # Cache result
+        self.intent_cache.set(text_lower, replace(intent, entities=dict(intent.entities)))
+        
+        return intent
+    
+    def detect_intents(self, messages: List[str]) -> List[Intent]:
+        """
+        Detect intents for a batch of messages
+        
+        Each distinct normalized message is looked up and classified once;
+        repeats within the batch reuse that result.
+        
+        Args:
+            messages: Natural language inputs
+            
+        Returns:
+            Intent objects in input order, identical to calling detect_intent on each
+        """
+        normalized = [self.normalize(text) for text in messages]
+        results: Dict[str, Intent] = {}
+        misses = []
+        for text_lower in normalized:
+            if text_lower not in results:
+                intent = self.intent_cache.get(text_lower)
+                results[text_lower] = intent
+                if intent is None:
+                    misses.append(text_lower)
+        
+        # Classifier scores all misses in one vectorized pass
+        predictions = [None] * len(misses)
+        if self.classifier is not None and misses:
+            predictions = self.classifier.predict_batch(misses)
+        for text_lower, prediction in zip(misses, predictions):
+            intent = self._classify(text_lower, prediction)
+            self.intent_cache.set(text_lower, replace(intent, entities=dict(intent.entities)))
+            results[text_lower] = intent
+        
+        return [replace(results[text_lower], entities=dict(results[text_lower].entities)) for text_lower in normalized]
+    
+    def _classify(self, text_lower: str, prediction: Optional[tuple] = None) -> Intent:
+        """
+        Detect the intent and extract entities for normalized text (no caching)
+        
+        The statistical classifier (if any) decides when it is confident;
+        otherwise keyword scoring does.
+        
+        Args:
+            text_lower: Lowercased, stripped text
+            prediction: Classifier (intent, probability) already computed for text_lower
+        """
+        if self.classifier is not None:
+            if prediction is None:
+                with span("detect_intent.classifier"):
+                    prediction = self.classifier.predict(text_lower)
+            name, probability = prediction
+            if name != "unknown" and probability >= self.classifier.min_confidence:
+                with span("detect_intent.entity_extraction"):
+                    entities = self.extract_entities(text_lower, name)
+                return Intent(name=name, confidence=probability, entities=entities)
+        
+        # Score each intent in one pass over the text
+        intent_scores = self._score_intents(text_lower)
         
         # Get best intent
         if not intent_scores or max(intent_scores.values()) == 0:
@@ -133,26 +361,27 @@ class AIAgentEngine:
             confidence = min(max_score / 5.0, 1.0)  # Normalize to 0-1
         
         # Extract entities
-        entities = self.extract_entities(text_lower, best_intent)
+        with span("detect_intent.entity_extraction"):
+            entities = self.extract_entities(text_lower, best_intent)
         
-        # Create intent object
-        intent = Intent(
+        return Intent(
             name=best_intent,
             confidence=confidence,
             entities=entities
         )
-        
-        # Cache result
-        self.intent_cache[text_lower] = intent
-        
-        return intent
     
     def extract_entities(self, text: str, intent: str) -> Dict[str, Any]:
         """
         Extract entities from text based on intent
         
+        Every pattern is precompiled (ENTITY_PATTERNS) and runs directly on
+        the normalized text, which is already lowercased. The extractors do
+        not share a token stream: their patterns match inside words and
+        across punctuation ("therefor ravi", "qty:inr cost43210price5"),
+        which word/number tokens cannot reproduce without changing results.
+
         Args:
-            text: Normalized text
+            text: Normalized text (see normalize)
             intent: Detected intent
             
         Returns:
@@ -194,17 +423,8 @@ class AIAgentEngine:
     
     def _extract_customer_name(self, text: str) -> Optional[str]:
         """Extract customer name from text"""
-        # Patterns: "for <name>", "customer <name>", "naam <name>"
-        patterns = [
-            r"for\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)",
-            r"to\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)",
-            r"customer\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)",
-            r"naam\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)",
-            r"name\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in ENTITY_PATTERNS["customer_name"]:
+            match = pattern.search(text)
             if match:
                 return match.group(1).title()
         
@@ -212,53 +432,44 @@ class AIAgentEngine:
 
     def _extract_product_name(self, text: str) -> Optional[str]:
         """Extract product name from text with fuzzy matching"""
-        text_lower = text.lower()
-
         # 1. Specialized extraction for "Add Product" intent
         # Look for pattern: "product <name> price" or "product <name> stock"
         # This allows multi-word names like "Logitech Keyboard"
-        add_patterns = [
-            r'product\s+(.*?)\s+(?:price|stock|cost|rate)',
-            r'add\s+(?:new\s+)?(.*?)\s+(?:price|stock|cost|rate)',
-            r'create\s+(?:new\s+)?(.*?)\s+(?:price|stock|cost|rate)',
-        ]
-        
-        for pattern in add_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in ENTITY_PATTERNS["product_add"]:
+            match = pattern.search(text)
             if match:
                 candidate = match.group(1).strip()
                 # Filter out obvious non-names
-                if len(candidate) > 2 and not re.search(r'\d', candidate):
+                if len(candidate) > 2 and not ENTITY_PATTERNS["digit"].search(candidate):
                     return candidate.title()
 
         # 2. Check for hyphenated part numbers or product codes (e.g., USB-HUB, LAP-001)
-        part_pattern = r'\b([A-Za-z]+-[A-Za-z0-9]+)\b'
-        match = re.search(part_pattern, text)
+        match = ENTITY_PATTERNS["product_code"].search(text)
         if match:
             return match.group(1)
 
         # 3. Smart Fallback: Strip intent keywords, numbers, and price/stock patterns
         # This handles generic "Send 5 X" where X is unknown
-        cleaned_text = text_lower
+        cleaned_text = text
         
         # Remove specific "price 2000" or "stock 25" patterns first to avoid stripping numbers later incorrectly
-        cleaned_text = re.sub(r'\b(price|stock|cost|rate|qty|quantity)\s*[:]?\s*\d+(?:\.\d+)?', '', cleaned_text)
+        cleaned_text = ENTITY_PATTERNS["product_attribute_value"].sub('', cleaned_text)
         
         # Remove intent keywords
-        for keywords in self.INTENT_PATTERNS.values():
-            for k in keywords:
-                # Use word boundary to avoid partial replacements
-                cleaned_text = re.sub(r'\b' + re.escape(k) + r'\b', '', cleaned_text)
+        for keyword, pattern in self._keyword_strip_res:
+            # Use word boundary to avoid partial replacements
+            if keyword in cleaned_text:
+                cleaned_text = pattern.sub('', cleaned_text)
                 
         # Remove remaining numbers and quantity units
-        cleaned_text = re.sub(r'\b\d+\b', '', cleaned_text)
-        cleaned_text = re.sub(r'\b(pieces|piece|units|unit|qty|quantity|nos|karo)\b', '', cleaned_text)
+        cleaned_text = ENTITY_PATTERNS["number"].sub('', cleaned_text)
+        cleaned_text = ENTITY_PATTERNS["product_units"].sub('', cleaned_text)
         
         # Remove stopwords
-        cleaned_text = re.sub(r'\b(for|to|of|in|at|with)\b', '', cleaned_text)
+        cleaned_text = ENTITY_PATTERNS["product_stopwords"].sub('', cleaned_text)
         
         # Remove extra whitespace and special chars
-        cleaned_text = re.sub(r'[^\w\s-]', '', cleaned_text)
+        cleaned_text = ENTITY_PATTERNS["special_chars"].sub('', cleaned_text)
         cleaned_text = " ".join(cleaned_text.split())
         
         if cleaned_text and len(cleaned_text) > 2:
@@ -271,19 +482,14 @@ class AIAgentEngine:
         
         # 1. Look for explicit stock/quantity keywords (high priority)
         # e.g. "stock 25", "qty 10", "10 units"
-        explicit_patterns = [
-            r'(?:stock|qty|quantity|units|pieces|pcs|count)\s*[:]?\s*(\d+)',
-            r'(\d+)\s*(?:pieces|units|pcs|qty|quantity|stock)',
-        ]
-        
-        for p in explicit_patterns:
-            match = re.search(p, text, re.IGNORECASE)
+        for p in ENTITY_PATTERNS["quantity"]:
+            match = p.search(text)
             if match:
                 return int(match.group(1))
         
         # 2. Fallback: Look for generic number, but careful to avoid price
         # Find all numbers
-        all_numbers = re.finditer(r'\b(\d+)\b', text)
+        all_numbers = ENTITY_PATTERNS["number"].finditer(text)
         
         for m in all_numbers:
             num = m.group(1)
@@ -291,8 +497,8 @@ class AIAgentEngine:
             
             # Context check: Is this number preceded by "price", "rs", "cost"?
             # Look at preceding 15 chars
-            preceding = text[max(0, start_idx-15):start_idx].lower()
-            if any(x in preceding for x in ['price', 'rs', 'cost', 'rate', '₹']):
+            preceding = text[max(0, start_idx-15):start_idx]
+            if any(x in preceding for x in ENTITY_PATTERNS["price_context"]):
                 continue # Skip this number, it's a price
                 
             # If we are here, it's likely a quantity (or ID, phone)
@@ -303,22 +509,15 @@ class AIAgentEngine:
 
         # 3. Look for number words
         for word, num in self.NUMBER_WORDS.items():
-            if word in text.lower():
+            if word in text:
                 return num
         
         return None
     
     def _extract_price(self, text: str) -> Optional[float]:
         """Extract price from text"""
-        # Patterns: "price 2000", "Rs 100", "₹100", "100 rupees", "100 rs"
-        patterns = [
-            r'price[:\s]+(\d+(?:\.\d{2})?)',  # "price 2000" or "price: 2000"
-            r'(?:rs\.?|₹)\s*(\d+(?:\.\d{2})?)',  # "Rs 100" or "₹100"
-            r'(\d+(?:\.\d{2})?)\s*(?:rupees|rs|inr)',  # "100 rupees"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in ENTITY_PATTERNS["price"]:
+            match = pattern.search(text)
             if match:
                 return float(match.group(1))
         
@@ -326,19 +525,12 @@ class AIAgentEngine:
     
     def _extract_phone(self, text: str) -> Optional[str]:
         """Extract phone number from text"""
-        # Indian phone patterns
-        patterns = [
-            r'\+91[\s-]?\d{10}',
-            r'\d{10}',
-            r'\d{5}[\s-]\d{5}'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in ENTITY_PATTERNS["phone"]:
+            match = pattern.search(text)
             if match:
                 phone = match.group(0)
                 # Clean up
-                phone = re.sub(r'[\s-]', '', phone)
+                phone = ENTITY_PATTERNS["phone_separators"].sub('', phone)
                 if not phone.startswith('+'):
                     phone = '+91' + phone if len(phone) == 10 else '+' + phone
                 return phone
@@ -347,25 +539,13 @@ class AIAgentEngine:
     
     def _extract_order_id(self, text: str) -> Optional[int]:
         """Extract order ID from text"""
-        # Patterns: "order #123", "order 123", "order id 123"
-        patterns = [
-            r'order\s*#?\s*(\d+)',
-            r'order\s+id\s+(\d+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in ENTITY_PATTERNS["order_id"]:
+            match = pattern.search(text)
             if match:
                 return int(match.group(1))
         
         return None
     
-    def _fuzzy_match(self, keyword: str, text: str, threshold: float = 0.8) -> bool:
-        """Check if keyword fuzzy matches any word in text"""
-        words = text.split()
-        matches = get_close_matches(keyword, words, n=1, cutoff=threshold)
-        return len(matches) > 0
-    
     def to_json(self, intent: Intent) -> Dict[str, Any]:
         """
         Convert Intent to JSON format
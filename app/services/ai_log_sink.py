@@ -0,0 +1,201 @@
+"""
+AI Log Sink - buffered batch writer for AIActionLog
+
+AILoggerService.log_action queues entries here instead of committing each
+line inside the request. A writer thread bulk-inserts them every
+flush_interval_ms or batch_size rows, whichever comes first.
+
+When the queue is full, entries are dropped ("drop") or the caller waits for
+room ("block", up to BLOCK_TIMEOUT_SECONDS before dropping). With
+background=False log_action writes inline, as before (tests and scripts).
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import atexit
+import queue
+import threading
+import time
+
+from app.config import settings
+from app.models.ai_action import AIActionLog
+
+
+class _Marker:
+    """Queue item asking the writer to flush (and optionally stop)"""
+
+    __slots__ = ("done", "stop")
+
+    def __init__(self, stop: bool = False):
+        self.done = threading.Event()
+        self.stop = stop
+
+
+class AILogSink:
+    """
+    Bounded queue of log rows drained by one writer thread
+
+    Rows remember the engine of the session they were logged with, so tests
+    and tools using their own database get their logs written there.
+    """
+
+    BLOCK_TIMEOUT_SECONDS = 1.0
+
+    def __init__(
+        self,
+        flush_interval_ms: int = 200,
+        batch_size: int = 200,
+        max_queue: int = 10000,
+        overflow: str = "drop",
+        background: bool = True
+    ):
+        """
+        Args:
+            flush_interval_ms: Longest time a row waits in the queue
+            batch_size: Rows per bulk insert
+            max_queue: Queue bound
+            overflow: "drop" or "block" when the queue is full
+            background: Queue rows for the writer thread (False writes inline)
+        """
+        if overflow not in ("drop", "block"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.flush_interval = max(flush_interval_ms, 1) / 1000
+        self.batch_size = max(1, batch_size)
+        self.overflow = overflow
+        self.background = background
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, max_queue))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._exit_hook = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def emit(self, bind, action_type: str, input_text: Optional[str] = None,
+             output_action: Optional[str] = None) -> bool:
+        """
+        Queue one log row
+
+        Args:
+            bind: Engine the row is written to
+            action_type: AIActionLog.action_type
+            input_text: AIActionLog.input_text
+            output_action: AIActionLog.output_action
+
+        Returns:
+            False if the row was dropped because the queue is full
+        """
+        row = {
+            "action_type": action_type,
+            "input_text": input_text,
+            "output_action": output_action,
+            "timestamp": datetime.utcnow()
+        }
+        self._ensure_started()
+        try:
+            if self.overflow == "block":
+                self._queue.put((bind, row), timeout=self.BLOCK_TIMEOUT_SECONDS)
+            else:
+                self._queue.put_nowait((bind, row))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write every row queued so far
+
+        Returns:
+            False if the writer did not finish within timeout
+        """
+        if self._thread is None:
+            return True
+        marker = _Marker()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def shutdown(self, timeout: Optional[float] = 10):
+        """Flush queued rows and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        marker = _Marker(stop=True)
+        self._queue.put(marker)
+        marker.done.wait(timeout)
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and row counters for monitoring"""
+        return {
+            "background": self.background,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
+
+    def _ensure_started(self):
+        """Start the writer thread on first use"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ai-log-writer", daemon=True)
+                self._thread.start()
+                if not self._exit_hook:
+                    atexit.register(self.shutdown)
+                    self._exit_hook = True
+
+    def _run(self):
+        """Writer loop: collect a batch, insert it, repeat until stopped"""
+        while True:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, _Marker):
+                    self._write(batch)
+                    item.done.set()
+                    if item.stop:
+                        return
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    self._write(batch)
+                    break
+
+    def _write(self, batch: List[tuple]):
+        """Bulk insert a batch, one transaction per engine"""
+        if not batch:
+            return
+        by_bind: Dict[Any, List[Dict[str, Any]]] = {}
+        for bind, row in batch:
+            by_bind.setdefault(bind, []).append(row)
+        for bind, rows in by_bind.items():
+            try:
+                with bind.begin() as conn:
+                    conn.execute(AIActionLog.__table__.insert(), rows)
+                with self._lock:
+                    self.written += len(rows)
+            except Exception as e:
+                with self._lock:
+                    self.failed += len(rows)
+                print(f"AI log write failed ({len(rows)} rows): {e}")
+
+
+# Singleton instance shared by every request in the process
+ai_log_sink = AILogSink(
+    flush_interval_ms=settings.AI_LOG_FLUSH_INTERVAL_MS,
+    batch_size=settings.AI_LOG_BATCH_SIZE,
+    max_queue=settings.AI_LOG_QUEUE_SIZE,
+    overflow=settings.AI_LOG_OVERFLOW,
+    background=settings.AI_LOG_ASYNC
+)
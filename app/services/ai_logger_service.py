@@ -1,9 +1,14 @@
 """
 AI Logger service - business logic for AI action logging
 """
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from app.database import commit_or_flush, on_commit
 from app.models.ai_action import AIActionLog
-from typing import List, Optional
+from app.services.ai_log_sink import ai_log_sink
+from app.services.pagination import paginate
+from app.services.pipeline_timing import span
+from typing import List, Optional, Tuple
 
 
 class AILoggerService:
@@ -16,23 +21,73 @@ class AILoggerService:
         input_text: Optional[str] = None,
         output_action: Optional[str] = None
     ) -> AIActionLog:
-        """Log an AI action"""
+        """
+        Log an AI action
+        
+        With the background log sink enabled the row is queued once the
+        caller's work is committed (dropped if it rolls back) and the
+        returned entry is not persisted yet.
+        """
         log_entry = AIActionLog(
             action_type=action_type,
             input_text=input_text,
             output_action=output_action
         )
-        db.add(log_entry)
-        db.commit()
-        db.refresh(log_entry)
+        if ai_log_sink.background:
+            with span("ai_log.enqueue"):
+                bind = db.get_bind()
+                on_commit(db, lambda: ai_log_sink.emit(bind, action_type, input_text, output_action))
+            return log_entry
+        
+        with span("ai_log.commit"):
+            db.add(log_entry)
+            commit_or_flush(db, log_entry)
         return log_entry
     
     @staticmethod
-    def get_logs(db: Session, skip: int = 0, limit: int = 100) -> List[AIActionLog]:
+    def log_actions(db: Session, entries: List[Tuple[str, Optional[str], Optional[str]]]):
+        """
+        Log several AI actions with one multi-row INSERT
+        
+        Args:
+            db: Database session
+            entries: (action_type, input_text, output_action) tuples
+        """
+        if ai_log_sink.background:
+            bind = db.get_bind()
+            on_commit(db, lambda: [ai_log_sink.emit(bind, *entry) for entry in entries])
+            return
+        
+        db.execute(insert(AIActionLog), [
+            {"action_type": action_type, "input_text": input_text, "output_action": output_action}
+            for action_type, input_text, output_action in entries
+        ])
+        commit_or_flush(db)
+    
+    @staticmethod
+    def get_logs(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[AIActionLog]:
         """Get AI action logs with pagination"""
-        return db.query(AIActionLog).order_by(
-            AIActionLog.timestamp.desc()
-        ).offset(skip).limit(limit).all()
+        return AILoggerService.get_logs_page(db, limit, skip, cursor)[0]
+    
+    @staticmethod
+    def get_logs_page(
+        db: Session, limit: int = 100, skip: int = 0, cursor: Optional[str] = None
+    ) -> Tuple[List[AIActionLog], Optional[str]]:
+        """
+        One page of AI action logs, newest first
+        
+        Args:
+            db: Database session
+            limit: Maximum logs to return
+            skip: Logs to skip (legacy offset paging)
+            cursor: next_cursor of the previous page (keyset paging, ignores skip)
+            
+        Returns:
+            (logs, next_cursor), next_cursor None on the last page
+        """
+        return paginate(
+            db.query(AIActionLog), (AIActionLog.timestamp, AIActionLog.id), limit, skip, cursor, descending=True
+        )
     
     @staticmethod
     def get_logs_by_type(db: Session, action_type: str) -> List[AIActionLog]:
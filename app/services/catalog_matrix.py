@@ -0,0 +1,247 @@
+"""
+Catalog Matrix - vectorized n-gram similarity search over product names
+
+Each product name is a row of a sparse (products x character trigrams)
+matrix with binary, L2-normalized values, so a row dot a query row is the
+cosine similarity of their trigram sets. The matrix is kept column-major
+(trigram -> rows) as flat NumPy arrays: scoring a query gathers the rows of
+its trigrams and sums them with one bincount, then argpartition picks the
+top k. No per-product Python loop runs at query time.
+
+Writes are incremental. New rows go to a small pending block scored with
+the same bincount; removed rows are masked out. Both are folded into the
+column-major arrays once the pending block outgrows a fraction of the
+catalog. Needs NumPy; ProductIndex falls back to its trigram postings
+without it.
+"""
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import threading
+
+# Try to import numpy
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of text, with the word edges marked"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CatalogMatrix:
+    """
+    Sparse trigram matrix over product names with top-k cosine search
+
+    Rows are addressed by product ID; each update appends a new row and
+    retires the old one.
+    """
+
+    # Pending and retired rows are folded into the column-major arrays past
+    # this share of the catalog (and at least MIN_PENDING rows)
+    COMPACT_RATIO = 0.0625
+    MIN_PENDING = 512
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        """Empty matrix and vocabulary"""
+        self._vocab: Dict[str, int] = {}
+        self._row_of: Dict[int, int] = {}
+        # Per-row data for rows 0.._count - 1 (capacity grows by doubling)
+        self._count = 0
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0, dtype=np.int32)
+        self._alive = np.zeros(0, dtype=bool)
+        # Column-major block: rows of column c are _rows[_indptr[c]:_indptr[c + 1]]
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._rows = np.zeros(0, dtype=np.int32)
+        self._vals = np.zeros(0, dtype=np.float32)
+        # Rows added since the last compaction, with their columns
+        self._pending_rows: List[int] = []
+        self._pending_cols: List[List[int]] = []
+        self._pending: Optional[Tuple["np.ndarray", "np.ndarray", "np.ndarray"]] = None
+        self._retired = 0
+
+    def _columns(self, text: str) -> List[int]:
+        """Vocabulary IDs of the trigrams of text, adding new trigrams"""
+        vocab = self._vocab
+        return [vocab.setdefault(gram, len(vocab)) for gram in trigrams(text)]
+
+    def _reserve(self, rows: int):
+        """Grow the per-row arrays to hold at least rows rows"""
+        capacity = len(self._ids)
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 64)
+        for name in ("_ids", "_lengths", "_alive"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _new_row(self, product_id: int, name: str) -> int:
+        """Allocate a live row for a product"""
+        row = self._count
+        self._reserve(row + 1)
+        self._ids[row] = product_id
+        self._lengths[row] = len(name)
+        self._alive[row] = True
+        self._row_of[product_id] = row
+        self._count += 1
+        return row
+
+    def build(self, items: Iterable[Tuple[int, str]]):
+        """
+        Replace the matrix with the given products
+
+        Args:
+            items: (product ID, lowercased name) pairs
+        """
+        with self._lock:
+            self._reset()
+            rows: List[int] = []
+            cols: List[int] = []
+            for product_id, name in items:
+                columns = self._columns(name)
+                rows.extend([self._new_row(product_id, name)] * len(columns))
+                cols.extend(columns)
+            self._store(np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))
+
+    def add(self, product_id: int, name: str):
+        """Add (or replace) one product's row"""
+        with self._lock:
+            self.remove(product_id)
+            self._pending_rows.append(self._new_row(product_id, name))
+            self._pending_cols.append(self._columns(name))
+            self._pending = None
+            self._maybe_compact()
+
+    def remove(self, product_id: int):
+        """Retire a product's row"""
+        with self._lock:
+            row = self._row_of.pop(product_id, None)
+            if row is not None:
+                self._alive[row] = False
+                self._retired += 1
+                self._maybe_compact()
+
+    def clear(self):
+        """Drop every row and the vocabulary"""
+        with self._lock:
+            self._reset()
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def _maybe_compact(self):
+        """Compact once pending and retired rows outgrow COMPACT_RATIO of the catalog"""
+        if len(self._pending_rows) + self._retired > max(self.MIN_PENDING, len(self._row_of) * self.COMPACT_RATIO):
+            self._compact()
+
+    def _compact(self):
+        """Fold pending rows into the column-major block and drop retired rows"""
+        block_cols = np.repeat(np.arange(len(self._indptr) - 1), np.diff(self._indptr))
+        rows, cols, _ = self._pending_block()
+        rows = np.concatenate([self._rows, rows]).astype(np.int64)
+        cols = np.concatenate([block_cols, cols]).astype(np.int64)
+        keep = self._alive[rows]
+        rows, cols = rows[keep], cols[keep]
+
+        # Renumber live rows densely
+        live = np.flatnonzero(self._alive[:self._count])
+        renumber = np.zeros(self._count, dtype=np.int64)
+        renumber[live] = np.arange(len(live))
+        ids, lengths = self._ids[live], self._lengths[live]
+        self._ids[:len(live)], self._lengths[:len(live)] = ids, lengths
+        self._alive[:] = False
+        self._alive[:len(live)] = True
+        self._count = len(live)
+        self._row_of = dict(zip(ids.tolist(), range(len(live))))
+        self._store(renumber[rows], cols)
+
+    def _store(self, rows: "np.ndarray", cols: "np.ndarray"):
+        """Make (row, column) entries of rows 0.._count - 1 the column-major block"""
+        counts = np.bincount(rows, minlength=self._count)
+        vals = (1 / np.sqrt(np.maximum(counts, 1))).astype(np.float32)[rows]
+        order = np.argsort(cols, kind="stable")
+        self._rows, self._vals = rows[order].astype(np.int32), vals[order]
+        self._indptr = np.zeros(len(self._vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=len(self._vocab)), out=self._indptr[1:])
+        self._pending_rows, self._pending_cols, self._pending, self._retired = [], [], None, 0
+
+    def _pending_block(self) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """(rows, columns, values) entries of the pending rows"""
+        if self._pending is None:
+            counts = np.fromiter(map(len, self._pending_cols), dtype=np.int64, count=len(self._pending_cols))
+            self._pending = (
+                np.repeat(np.asarray(self._pending_rows, dtype=np.int32), counts),
+                np.fromiter(chain.from_iterable(self._pending_cols), dtype=np.int32, count=int(counts.sum())),
+                np.repeat((1 / np.sqrt(np.maximum(counts, 1))).astype(np.float32), counts),
+            )
+        return self._pending
+
+    def scores(self, text: str) -> "np.ndarray":
+        """
+        Cosine similarity of text's trigrams with every row
+
+        Returns:
+            float32 array indexed by row number (retired rows score 0)
+        """
+        with self._lock:
+            grams = trigrams(text)
+            cols = [self._vocab[gram] for gram in grams if gram in self._vocab]
+            scores = np.zeros(self._count, dtype=np.float32)
+            if not cols:
+                return scores
+
+            # Column-major block: gather the rows of each query trigram
+            indptr, block = self._indptr, len(self._indptr) - 1
+            spans = [(indptr[col], indptr[col + 1]) for col in cols if col < block]
+            if spans:
+                rows = np.concatenate([self._rows[start:end] for start, end in spans])
+                vals = np.concatenate([self._vals[start:end] for start, end in spans])
+                scores += np.bincount(rows, weights=vals, minlength=self._count)[:self._count]
+
+            # Pending block: entries whose column is in the query
+            rows, pending_cols, vals = self._pending_block()
+            if len(rows):
+                hit = np.isin(pending_cols, cols)
+                scores += np.bincount(rows[hit], weights=vals[hit], minlength=self._count)[:self._count]
+
+            scores *= self._alive[:self._count]
+            return scores / np.float32(np.sqrt(len(grams)))
+
+    def top_k(self, text: str, k: int, min_length: int = 0, max_length: Optional[int] = None) -> List[int]:
+        """
+        Product IDs most similar to text
+
+        Args:
+            text: Lowercased search term
+            k: Number of products to return
+            min_length: Shortest name length considered
+            max_length: Longest name length considered
+
+        Returns:
+            Up to k product IDs sharing a trigram with text, best first
+        """
+        with self._lock:
+            scores = self.scores(text)
+            candidates = np.flatnonzero(scores)
+            lengths = self._lengths[candidates]
+            in_range = lengths >= min_length
+            if max_length is not None:
+                in_range &= lengths <= max_length
+            candidates = candidates[in_range]
+
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            ids = self._ids[candidates]
+            order = np.lexsort((ids, -scores[candidates]))
+            return ids[order].tolist()
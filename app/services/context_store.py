@@ -0,0 +1,334 @@
+"""
+Conversation Context Store - per-session AI conversation state
+
+Holds the "waiting for info" context of each chat session (which intent is
+pending and which field is missing) with TTL expiry and a bounded size.
+
+Backends:
+- MemoryContextStore: in-process LRU (single worker)
+- SQLiteContextStore: SQLite file shared by workers on one host
+- RedisContextStore: any Redis-compatible client (redis-py API); the
+  in-process LocalRedisStub stands in for a server in tests and dev
+
+The backend is chosen with AI_CONTEXT_BACKEND ("memory", "sqlite", "redis").
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import json
+import sqlite3
+import threading
+import time
+
+from app.config import settings
+
+
+class ContextStore(ABC):
+    """
+    Interface of a conversation context store
+
+    Contexts are JSON-serializable dicts keyed by session ID. Every backend
+    hands out copies, so callers may mutate what they get.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: Optional[float] = 1800):
+        """
+        Args:
+            max_size: Maximum number of sessions kept (oldest evicted first)
+            ttl_seconds: Context lifetime since last write; None or 0 disables expiry
+        """
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds or None
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the context of a session, or None if absent or expired"""
+
+    @abstractmethod
+    def set(self, session_id: str, context: Dict[str, Any]):
+        """Store (replace) the context of a session"""
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Forget the context of a session"""
+
+    @abstractmethod
+    def clear(self):
+        """Forget every session"""
+
+
+class MemoryContextStore(ContextStore):
+    """In-process LRU context store (contexts don't survive restarts or cross workers)"""
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: Optional[float] = 1800):
+        super().__init__(max_size, ttl_seconds)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            data, stored_at = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return json.loads(data)
+
+    def set(self, session_id: str, context: Dict[str, Any]):
+        data = json.dumps(context)
+        with self._lock:
+            self._entries.pop(session_id, None)
+            self._entries[session_id] = (data, time.monotonic())
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteContextStore(ContextStore):
+    """Context store in a SQLite file, shared by every worker process on the host"""
+
+    # Size bound is enforced on every Nth write
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, max_size: int = 10000, ttl_seconds: Optional[float] = 1800):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a private in-memory store)
+            max_size: Maximum number of sessions kept (least recently written evicted first)
+            ttl_seconds: Context lifetime since last write; None or 0 disables expiry
+        """
+        super().__init__(max_size, ttl_seconds)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ai_conversation_context ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_ai_conversation_context_updated_at "
+            "ON ai_conversation_context (updated_at)"
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, updated_at FROM ai_conversation_context WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        data, updated_at = row
+        if self.ttl_seconds and time.time() - updated_at > self.ttl_seconds:
+            self.delete(session_id)
+            return None
+        return json.loads(data)
+
+    def set(self, session_id: str, context: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ai_conversation_context (session_id, data, updated_at) "
+                "VALUES (?, ?, ?)",
+                (session_id, json.dumps(context), time.time())
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune()
+
+    def _prune(self):
+        """Drop expired sessions and the oldest ones beyond max_size (caller holds the lock)"""
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM ai_conversation_context WHERE updated_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+        self._conn.execute(
+            "DELETE FROM ai_conversation_context WHERE session_id IN ("
+            "SELECT session_id FROM ai_conversation_context "
+            "ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_size,)
+        )
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM ai_conversation_context WHERE session_id = ?", (session_id,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM ai_conversation_context")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ai_conversation_context").fetchone()[0]
+
+
+class RedisContextStore(ContextStore):
+    """
+    Context store on a Redis-compatible server
+
+    Expiry uses per-key TTLs; the size bound uses a sorted set of sessions
+    scored by last write time.
+    """
+
+    def __init__(self, client, prefix: str = "ai_context:", max_size: int = 10000,
+                 ttl_seconds: Optional[float] = 1800):
+        """
+        Args:
+            client: Redis client (redis-py API, decode_responses=True) or LocalRedisStub
+            prefix: Key prefix for this store
+            max_size: Maximum number of sessions kept (least recently written evicted first)
+            ttl_seconds: Context lifetime since last write; None or 0 disables expiry
+        """
+        super().__init__(max_size, ttl_seconds)
+        self.client = client
+        self.prefix = prefix
+        self._index_key = prefix + "sessions"
+
+    def _key(self, session_id: str) -> str:
+        return self.prefix + "session:" + session_id
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        data = self.client.get(self._key(session_id))
+        return json.loads(data) if data is not None else None
+
+    def set(self, session_id: str, context: Dict[str, Any]):
+        ttl = int(self.ttl_seconds) if self.ttl_seconds else None
+        self.client.set(self._key(session_id), json.dumps(context), ex=ttl)
+        self.client.zadd(self._index_key, {session_id: time.time()})
+        overflow = self.client.zcard(self._index_key) - self.max_size
+        if overflow > 0:
+            oldest = self.client.zrange(self._index_key, 0, overflow - 1)
+            if oldest:
+                self.client.delete(*[self._key(s) for s in oldest])
+                self.client.zrem(self._index_key, *oldest)
+
+    def delete(self, session_id: str):
+        self.client.delete(self._key(session_id))
+        self.client.zrem(self._index_key, session_id)
+
+    def clear(self):
+        sessions = self.client.zrange(self._index_key, 0, -1)
+        if sessions:
+            self.client.delete(*[self._key(s) for s in sessions])
+        self.client.delete(self._index_key)
+
+
+class LocalRedisStub:
+    """
+    In-process stand-in for the few Redis commands RedisContextStore uses
+
+    Mirrors redis-py with decode_responses=True (strings in, strings out).
+    """
+
+    def __init__(self):
+        self._values: Dict[str, tuple] = {}  # key -> (value, expires_at or None)
+        self._zsets: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key: str) -> bool:
+        entry = self._values.get(key)
+        if entry is None:
+            return False
+        if entry[1] is not None and time.monotonic() >= entry[1]:
+            del self._values[key]
+            return False
+        return True
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._values[key][0] if self._alive(key) else None
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + ex if ex else None)
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    del self._values[key]
+                    removed += 1
+                if self._zsets.pop(key, None) is not None:
+                    removed += 1
+            return removed
+
+    def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        with self._lock:
+            zset = self._zsets.setdefault(key, {})
+            added = sum(1 for member in mapping if member not in zset)
+            zset.update(mapping)
+            return added
+
+    def zcard(self, key: str) -> int:
+        with self._lock:
+            return len(self._zsets.get(key, {}))
+
+    def zrange(self, key: str, start: int, end: int) -> List[str]:
+        with self._lock:
+            members = sorted(self._zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+            end = len(members) if end == -1 else end + 1
+            return [member for member, _ in members[start:end]]
+
+    def zrem(self, key: str, *members: str) -> int:
+        with self._lock:
+            zset = self._zsets.get(key, {})
+            return sum(1 for member in members if zset.pop(member, None) is not None)
+
+
+def create_context_store(backend: Optional[str] = None) -> ContextStore:
+    """
+    Build the context store configured in settings
+
+    Args:
+        backend: "memory", "sqlite" or "redis" (defaults to AI_CONTEXT_BACKEND)
+
+    Returns:
+        ContextStore instance
+    """
+    backend = (backend or settings.AI_CONTEXT_BACKEND).lower()
+    max_size = settings.AI_CONTEXT_MAX_SESSIONS
+    ttl = settings.AI_CONTEXT_TTL_SECONDS
+
+    if backend == "memory":
+        return MemoryContextStore(max_size=max_size, ttl_seconds=ttl)
+
+    if backend == "sqlite":
+        return SQLiteContextStore(settings.AI_CONTEXT_SQLITE_PATH, max_size=max_size, ttl_seconds=ttl)
+
+    if backend == "redis":
+        url = settings.AI_CONTEXT_REDIS_URL
+        if url.startswith("stub://"):
+            client = LocalRedisStub()
+        else:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError(
+                    "AI_CONTEXT_BACKEND=redis needs the 'redis' package (pip install redis)"
+                ) from e
+            client = redis.Redis.from_url(url, decode_responses=True)
+        return RedisContextStore(client, max_size=max_size, ttl_seconds=ttl)
+
+    raise ValueError(f"Unknown AI_CONTEXT_BACKEND: {backend}")
+
+
+# Singleton instance shared by every AIActionRouter in the process
+context_store = create_context_store()
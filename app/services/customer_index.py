@@ -0,0 +1,241 @@
+"""
+Customer Index - in-memory customer name resolution for the AI Action Router
+
+Holds every customer name with token, trigram and phonetic indexes, so a
+name spoken in a chat message resolves to a customer without scanning the
+customers table. CustomerService keeps the index in sync on create;
+customers added by other workers or scripts are picked up by a row count
+and highest-ID check before each lookup.
+"""
+from collections import Counter
+from difflib import SequenceMatcher, get_close_matches
+from typing import Dict, List, Optional, Set, Tuple
+import bisect
+import re
+import threading
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.customer import Customer
+
+
+# Spelling variants common in romanized Indian names, applied in order
+PHONETIC_RULES = [
+    ("chh", "c"), ("ch", "c"), ("sh", "s"), ("kh", "k"), ("gh", "g"),
+    ("jh", "j"), ("th", "t"), ("dh", "d"), ("ph", "f"), ("bh", "b"),
+    ("ck", "k"), ("q", "k"), ("x", "ks"), ("w", "v"), ("z", "j"),
+]
+# Vowel spellings folded to one sound each: long vowels first, then a/e and o/u
+VOWEL_RULES = [("ee", "i"), ("oo", "u"), ("e", "a"), ("o", "u")]
+REPEAT_RE = re.compile(r"(.)\1+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase a name and collapse whitespace"""
+    return " ".join(name.lower().split())
+
+
+def phonetic_key(word: str) -> str:
+    """
+    Phonetic key for one romanized Indian name
+
+    Folds aspirated consonants (kh, bh, th...), v/w, j/z, doubled letters
+    and vowel spellings (ee/i, oo/u, a/e, o/u, y after the first letter),
+    so "Suneel" and "Sunil", "Pooja" and "Puja", or "Mohammad" and
+    "Muhammed" get the same key. Vowels are kept, so "Priya" and "Puru" or
+    "Meena" and "Mona" don't.
+
+    Args:
+        word: Single name token
+
+    Returns:
+        Key string (empty for tokens without letters)
+    """
+    word = re.sub(r"[^a-z]", "", word.lower())
+    if not word:
+        return ""
+    for pattern, replacement in PHONETIC_RULES:
+        word = word.replace(pattern, replacement)
+    word = word[0] + word[1:].replace("y", "i")
+    for pattern, replacement in VOWEL_RULES:
+        word = word.replace(pattern, replacement)
+    return REPEAT_RE.sub(r"\1", word)
+
+
+def name_key(name: str) -> str:
+    """Phonetic key of a full name (one key per word)"""
+    return " ".join(key for key in map(phonetic_key, name.split()) if key)
+
+
+class CustomerIndex:
+    """
+    Token, trigram and phonetic index over customer names
+
+    Resolution keeps the original rule (closest name by difflib ratio, at
+    least 0.8, lowest customer ID among equal names) and falls back to a
+    customer whose full name has the same phonetic key.
+    """
+
+    CUTOFF = 0.8
+
+    # Up to this many distinct names are all compared; beyond that only the
+    # names sharing the most trigrams, words or sounds with the term
+    SCAN_LIMIT = 500
+    CANDIDATES = 32
+
+    def __init__(self):
+        self._by_name: Dict[str, Set[int]] = {}
+        # Word, phonetic and trigram postings hold distinct names, not IDs
+        self._tokens: Dict[str, Set[str]] = {}
+        self._phonetic_tokens: Dict[str, Set[str]] = {}
+        self._phonetic_names: Dict[str, Set[str]] = {}
+        # Trigram -> [(name length, name)] kept sorted, shortest names first
+        self._trigrams: Dict[str, List[Tuple[int, str]]] = {}
+        self._count = 0
+        self._max_id: Optional[int] = None
+        self._bind = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _trigrams_of(text: str) -> Set[str]:
+        """Character trigrams of text, with the word edges marked"""
+        padded = f"  {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def _add(self, customer_id: int, name: str, keep_sorted: bool = True):
+        """Index one customer name (caller holds the lock)"""
+        name = normalize_name(name)
+        self._count += 1
+        if self._max_id is None or customer_id > self._max_id:
+            self._max_id = customer_id
+        if name in self._by_name:
+            self._by_name[name].add(customer_id)
+            return
+        self._by_name[name] = {customer_id}
+        for token in set(name.split()):
+            self._tokens.setdefault(token, set()).add(name)
+            key = phonetic_key(token)
+            if key:
+                self._phonetic_tokens.setdefault(key, set()).add(name)
+        self._phonetic_names.setdefault(name_key(name), set()).add(name)
+        entry = (len(name), name)
+        for gram in self._trigrams_of(name):
+            if keep_sorted:
+                bisect.insort(self._trigrams.setdefault(gram, []), entry)
+            else:
+                self._trigrams.setdefault(gram, []).append(entry)
+
+    def load(self, db: Session):
+        """(Re)build the index from the customers table"""
+        with self._lock:
+            self.clear()
+            for customer_id, name in db.query(Customer.id, Customer.name):
+                self._add(customer_id, name, keep_sorted=False)
+            for postings in self._trigrams.values():
+                postings.sort()
+            self._bind = db.get_bind()
+
+    def ensure_loaded(self, db: Session):
+        """
+        Build the index on first use, or reload it when it is out of date
+
+        The index is reloaded when db points at another database, or when
+        the customers table no longer has the same row count and highest ID
+        (customers written by another worker or a script), so a returning
+        customer isn't missed and created again as a duplicate.
+        """
+        if self._bind is not db.get_bind() or not self._matches_table(db):
+            self.load(db)
+
+    def _matches_table(self, db: Session) -> bool:
+        """Index holds as many customers as the table, up to the same highest ID"""
+        count, max_id = db.query(func.count(Customer.id), func.max(Customer.id)).one()
+        with self._lock:
+            return count == self._count and max_id == self._max_id
+
+    def add_customer(self, db: Session, customer: Customer):
+        """Index a newly created customer"""
+        with self._lock:
+            if self._bind is not None and self._bind is db.get_bind():
+                self._add(customer.id, customer.name)
+
+    def clear(self):
+        """Forget everything; the next lookup reloads from the database"""
+        with self._lock:
+            self._by_name.clear()
+            self._tokens.clear()
+            self._phonetic_tokens.clear()
+            self._phonetic_names.clear()
+            self._trigrams.clear()
+            self._count = 0
+            self._max_id = None
+            self._bind = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _candidate_names(self, term: str, limit: int) -> List[str]:
+        """Distinct names ranked by shared trigrams, words and phonetic keys"""
+        # A 0.8 ratio needs the name length within 2/3 to 3/2 of the term's
+        low, high = (len(term) * 2 + 2) // 3, len(term) * 3 // 2
+        scores = Counter()
+        for gram in self._trigrams_of(term):
+            postings = self._trigrams.get(gram, ())
+            scores.update(name for _, name in postings[
+                bisect.bisect_left(postings, (low, "")):bisect.bisect_right(postings, (high, "\uffff"))
+            ])
+        for token in set(term.split()):
+            for name in self._tokens.get(token, ()):
+                scores[name] += 3
+            for name in self._phonetic_tokens.get(phonetic_key(token), ()):
+                scores[name] += 3
+        return [name for name, _ in scores.most_common(limit)]
+
+    def candidates(self, name: str, limit: Optional[int] = None) -> List[int]:
+        """
+        Customers whose names look or sound like name, best first
+
+        Args:
+            name: Customer name as mentioned in a message
+            limit: Maximum number of distinct names considered (defaults to CANDIDATES)
+
+        Returns:
+            Customer IDs ranked by shared trigrams, words and phonetic keys
+        """
+        with self._lock:
+            names = self._candidate_names(normalize_name(name), limit or self.CANDIDATES)
+            return [pid for candidate in names for pid in sorted(self._by_name[candidate])]
+
+    def resolve(self, name: str) -> Optional[int]:
+        """
+        Resolve a spoken customer name to one customer
+
+        Args:
+            name: Customer name as mentioned in a message
+
+        Returns:
+            Customer ID, or None when no name is close enough
+        """
+        term = normalize_name(name)
+        with self._lock:
+            if len(self._by_name) <= self.SCAN_LIMIT:
+                names = list(self._by_name)
+            else:
+                names = self._candidate_names(term, self.CANDIDATES)
+
+            # Use 0.8 cutoff for customer names to avoid wrong person
+            matches = get_close_matches(term, names, n=1, cutoff=self.CUTOFF)
+            if matches:
+                return min(self._by_name[matches[0]])
+
+            # Same spoken name, different spelling ("Suneel" for "Sunil")
+            sounds_like = self._phonetic_names.get(name_key(term)) if term else None
+            if sounds_like:
+                best = max(sounds_like, key=lambda n: (SequenceMatcher(None, term, n).ratio(), n))
+                return min(self._by_name[best])
+            return None
+
+
+# Singleton instance shared by every AIActionRouter in the process
+customer_index = CustomerIndex()
@@ -2,9 +2,12 @@
 Customer service - business logic for customer operations
 """
 from sqlalchemy.orm import Session
+from app.database import commit_or_flush, on_commit
 from app.models.customer import Customer
 from app.schemas.customer import CustomerCreate
-from typing import List, Optional
+from app.services.customer_index import customer_index
+from app.services.pagination import paginate
+from typing import List, Optional, Tuple
 
 
 class CustomerService:
@@ -19,8 +22,8 @@ class CustomerService:
             language_preference=customer_data.language_preference
         )
         db.add(customer)
-        db.commit()
-        db.refresh(customer)
+        commit_or_flush(db, customer)
+        on_commit(db, lambda: customer_index.add_customer(db, customer))
         return customer
     
     @staticmethod
@@ -29,9 +32,27 @@ class CustomerService:
         return db.query(Customer).filter(Customer.id == customer_id).first()
     
     @staticmethod
-    def get_all_customers(db: Session, skip: int = 0, limit: int = 100) -> List[Customer]:
+    def get_all_customers(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Customer]:
         """Get all customers with pagination"""
-        return db.query(Customer).offset(skip).limit(limit).all()
+        return CustomerService.get_customers_page(db, limit, skip, cursor)[0]
+    
+    @staticmethod
+    def get_customers_page(
+        db: Session, limit: int = 100, skip: int = 0, cursor: Optional[str] = None
+    ) -> Tuple[List[Customer], Optional[str]]:
+        """
+        One page of customers in ID order
+        
+        Args:
+            db: Database session
+            limit: Maximum customers to return
+            skip: Customers to skip (legacy offset paging)
+            cursor: next_cursor of the previous page (keyset paging, ignores skip)
+            
+        Returns:
+            (customers, next_cursor), next_cursor None on the last page
+        """
+        return paginate(db.query(Customer), (Customer.id,), limit, skip, cursor)
     
     @staticmethod
     def get_customer_by_phone(db: Session, phone: str) -> Optional[Customer]:
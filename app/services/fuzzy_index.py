@@ -0,0 +1,118 @@
+"""
+Fuzzy Index - symmetric-delete (SymSpell-style) lookup for misspelled keywords
+
+Used by the AI Agent Engine to find intent keywords close to a token
+without comparing the token against every keyword.
+"""
+from difflib import SequenceMatcher
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+import bisect
+import math
+
+
+class FuzzyIndex:
+    """
+    Precomputed index answering "which words are close to this token"
+
+    Every word is stored under each string obtained by deleting up to
+    max_distance characters from it. A token's own deletes then meet the
+    deletes of any word within that edit distance, so candidates come from
+    a few dict lookups. Candidates are confirmed with the same similarity
+    ratio difflib.get_close_matches uses.
+
+    A ratio of at least cutoff can need more deletes than max_distance on
+    long strings (up to a third of the length at 0.8, e.g. "productlist"
+    for "product list"). Words and tokens that long are compared directly,
+    limited to the lengths the cutoff allows, so lookups return exactly
+    what a difflib scan over every word would.
+    """
+
+    def __init__(self, words: Iterable[str], max_distance: int = 2, cutoff: float = 0.8):
+        """
+        Build the index
+
+        Args:
+            words: Words (or phrases) to index
+            max_distance: Maximum characters deleted from either side
+            cutoff: Minimum SequenceMatcher ratio for a match
+        """
+        self.max_distance = max_distance
+        self.cutoff = cutoff
+        self.words: List[str] = list(dict.fromkeys(w for w in words if w))
+        self._deletes: Dict[str, Set[str]] = {}
+        # Words sorted by length: all of them, and those the deletes can't cover
+        self._by_length: List[str] = sorted(self.words, key=len)
+        self._long_words: List[str] = [w for w in self._by_length if self._needs_scan(len(w))]
+        self._by_length_sizes: List[int] = [len(w) for w in self._by_length]
+        self._long_word_sizes: List[int] = [len(w) for w in self._long_words]
+
+        for word in self.words:
+            for variant in self._variants(word):
+                self._deletes.setdefault(variant, set()).add(word)
+
+    def _needs_scan(self, length: int) -> bool:
+        """Whether a match with a string this long may need more than max_distance deletes from it"""
+        # ratio >= c allows at most length * 2(1-c)/(2-c) unmatched characters
+        return length * 2 * (1 - self.cutoff) / (2 - self.cutoff) >= self.max_distance + 1 - 1e-9
+
+    def _length_range(self, token: str) -> Tuple[int, int]:
+        """Shortest and longest word that can reach the cutoff with token"""
+        length = len(token)
+        low = math.ceil(length * self.cutoff / (2 - self.cutoff) - 1e-9)
+        high = math.floor(length * (2 - self.cutoff) / self.cutoff + 1e-9)
+        return low, high
+
+    def _variants(self, text: str) -> Set[str]:
+        """text plus every string reachable by deleting up to max_distance characters"""
+        variants = {text}
+        frontier = {text}
+        for _ in range(self.max_distance):
+            frontier = {
+                variant[:i] + variant[i + 1:]
+                for variant in frontier
+                for i in range(len(variant))
+            }
+            variants |= frontier
+        return variants
+
+    def candidates(self, token: str) -> Set[str]:
+        """Indexed words that may reach the cutoff with token"""
+        low, high = self._length_range(token)
+        # Long tokens are compared with every word of a possible length,
+        # short ones only with the long words the deletes don't reach
+        if self._needs_scan(len(token)):
+            return set(self._by_length[
+                bisect.bisect_left(self._by_length_sizes, low):bisect.bisect_right(self._by_length_sizes, high)
+            ])
+        found: Set[str] = set(self._long_words[
+            bisect.bisect_left(self._long_word_sizes, low):bisect.bisect_right(self._long_word_sizes, high)
+        ])
+        for variant in self._variants(token):
+            words = self._deletes.get(variant)
+            if words:
+                found |= words
+        return found
+
+    def lookup(self, token: str) -> FrozenSet[str]:
+        """
+        Indexed words similar to token
+
+        Args:
+            token: Single word from a message
+
+        Returns:
+            Words whose similarity ratio with token is at least cutoff
+        """
+        matcher = SequenceMatcher()
+        matcher.set_seq1(token)
+        matches = set()
+        for word in self.candidates(token):
+            matcher.set_seq2(word)
+            if (matcher.real_quick_ratio() >= self.cutoff
+                    and matcher.quick_ratio() >= self.cutoff
+                    and matcher.ratio() >= self.cutoff):
+                matches.add(word)
+        return frozenset(matches)
+
+    def __len__(self) -> int:
+        return len(self.words)
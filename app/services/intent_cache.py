@@ -0,0 +1,101 @@
+"""
+Intent Cache - process-wide bounded LRU cache for detected intents
+
+A new AIAgentEngine is built for every request, so the cache lives at
+module level and is shared by all engines in the process.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import threading
+import time
+
+from app.config import settings
+
+
+class IntentCache:
+    """
+    Thread-safe LRU cache with optional TTL and hit/miss/eviction counters
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: Optional[float] = None):
+        """
+        Initialize cache
+
+        Args:
+            max_size: Maximum number of entries kept (least recently used evicted first)
+            ttl_seconds: Entry lifetime in seconds; None or 0 disables expiry
+        """
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds or None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached value for key, or None on miss/expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, stored_at = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        """Store value for key, evicting the least recently used entry if full"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (value, time.monotonic())
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Singleton instance shared by every AIAgentEngine in the process
+intent_cache = IntentCache(
+    max_size=settings.INTENT_CACHE_SIZE,
+    ttl_seconds=settings.INTENT_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,353 @@
+"""
+Intent Classifier - statistical intent detection trained from the action log
+
+Messages become hashed character n-gram vectors (2-4 grams over the
+lowercased text padded with spaces, hashed into 2^18 buckets). A softmax
+regression model over those features is trained offline from the
+input_text / AI_INTENT_DETECTED_<INTENT> pairs in ai_actions_log
+(see train_intent_classifier.py) and loaded at startup from
+AI_INTENT_CLASSIFIER_PATH. AIAgentEngine uses it first and falls back to
+keyword scoring when it is unsure.
+
+Scoring one message is one sparse dot product (gathered weight rows times
+feature values); a batch is scored with one gather and a segmented sum.
+Needs NumPy; without it the classifier is unavailable and the engine keeps
+using keywords.
+"""
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.ai_action import AIActionLog
+from app.services.transliteration import normalize_text
+
+# Try to import numpy
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+INTENT_LOG_PREFIX = "AI_INTENT_DETECTED_"
+
+# Multiplicative hashing constants (64-bit)
+_HASH_BASE = 0x100000001B3
+_HASH_MIX = 0x9E3779B97F4A7C15
+
+
+class IntentClassifier:
+    """
+    Softmax regression over hashed character n-grams
+
+    weights has one row per hash bucket and one column per label; buckets
+    never seen in training stay zero.
+    """
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        weights,
+        bias,
+        hash_bits: int = 18,
+        ngram_range: Tuple[int, int] = (2, 4),
+        min_confidence: float = 0.7
+    ):
+        """
+        Args:
+            labels: Intent names, one per weight column
+            weights: (2**hash_bits, len(labels)) float32 array
+            bias: (len(labels),) float32 array
+            hash_bits: Number of hash bits per n-gram
+            ngram_range: Smallest and largest n-gram length
+            min_confidence: Probability below which callers should fall back
+        """
+        self.labels = list(labels)
+        self.weights = weights
+        self.bias = bias
+        self.hash_bits = hash_bits
+        self.ngram_range = tuple(ngram_range)
+        self.min_confidence = min_confidence
+
+    @staticmethod
+    def featurize(texts: Sequence[str], hash_bits: int = 18, ngram_range: Tuple[int, int] = (2, 4)):
+        """
+        Hashed n-gram features of a batch of normalized texts
+
+        All texts are encoded into one code-point array; n-gram hashes are
+        computed for every position at once and positions running past the
+        end of their text are dropped.
+
+        Args:
+            texts: Lowercased, stripped messages
+            hash_bits: Number of hash bits per n-gram
+            ngram_range: Smallest and largest n-gram length
+
+        Returns:
+            (rows, buckets, values): message index, hash bucket and feature
+            value of every n-gram occurrence, grouped by message in order
+        """
+        padded = [f" {text} " for text in texts]
+        lengths = np.fromiter((len(text) for text in padded), dtype=np.int64, count=len(padded))
+        codes = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        ends = np.cumsum(lengths)
+        positions = np.arange(len(codes), dtype=np.int64)
+        row_of = np.repeat(np.arange(len(padded), dtype=np.int64), lengths)
+        shift = np.uint64(64 - hash_bits)
+
+        rows, buckets = [], []
+        low, high = ngram_range
+        for n in range(low, high + 1):
+            usable = len(codes) - n + 1
+            if usable <= 0:
+                continue
+            h = np.full(usable, n, dtype=np.uint64)
+            for offset in range(n):
+                h = h * np.uint64(_HASH_BASE) + codes[offset:offset + usable]
+            valid = positions[:usable] + n <= ends[row_of[:usable]]
+            rows.append(row_of[:usable][valid])
+            buckets.append((h[valid] * np.uint64(_HASH_MIX)) >> shift)
+
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        buckets = np.concatenate(buckets).astype(np.int64) if buckets else np.zeros(0, dtype=np.int64)
+        order = np.argsort(rows, kind="stable")
+        rows, buckets = rows[order], buckets[order]
+
+        # Scale each message's n-gram counts to roughly unit length
+        per_row = np.bincount(rows, minlength=len(padded)).astype(np.float32)
+        values = 1.0 / np.sqrt(np.maximum(per_row, 1.0))[rows]
+        return rows, buckets, values
+
+    def predict_proba(self, texts: Sequence[str]):
+        """
+        Label probabilities for a batch of normalized texts
+
+        Returns:
+            (len(texts), len(labels)) array
+        """
+        scores = np.tile(self.bias, (len(texts), 1))
+        if not texts:
+            return scores
+        rows, buckets, values = self.featurize(texts, self.hash_bits, self.ngram_range)
+        if len(rows):
+            contributions = self.weights[buckets] * values[:, None]
+            present = np.flatnonzero(np.bincount(rows, minlength=len(texts)))
+            offsets = np.searchsorted(rows, present)
+            scores[present] += np.add.reduceat(contributions, offsets, axis=0)
+        return _softmax(scores)
+
+    def _buckets(self, text: str):
+        """Hash buckets of the n-grams of one normalized text"""
+        codes = np.frombuffer(f" {text} ".encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        low, high = self.ngram_range
+        hashes = []
+        for n in range(low, min(high, len(codes)) + 1):
+            usable = len(codes) - n + 1
+            h = np.full(usable, n, dtype=np.uint64)
+            for offset in range(n):
+                h = h * np.uint64(_HASH_BASE) + codes[offset:offset + usable]
+            hashes.append(h)
+        return (np.concatenate(hashes) * np.uint64(_HASH_MIX)) >> np.uint64(64 - self.hash_bits)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Most likely intent of one normalized text
+
+        Returns:
+            (intent name, probability)
+        """
+        buckets = self._buckets(text)
+        # Sparse dot product: every feature has the same value 1/sqrt(n-grams)
+        scores = self.weights[buckets].sum(axis=0) / np.sqrt(len(buckets)) + self.bias
+        scores = np.exp(scores - scores.max())
+        best = int(scores.argmax())
+        return self.labels[best], float(scores[best] / scores.sum())
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """Most likely intent and its probability for each normalized text"""
+        probs = self.predict_proba(texts)
+        best = probs.argmax(axis=1)
+        return [
+            (self.labels[label], float(prob))
+            for label, prob in zip(best.tolist(), probs[np.arange(len(texts)), best].tolist())
+        ]
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        hash_bits: int = 18,
+        ngram_range: Tuple[int, int] = (2, 4),
+        epochs: int = 200,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+        min_confidence: float = 0.7
+    ) -> "IntentClassifier":
+        """
+        Fit softmax regression with full-batch AdaGrad
+
+        Args:
+            texts: Normalized messages
+            labels: Intent name of each message
+            hash_bits: Number of hash bits per n-gram
+            ngram_range: Smallest and largest n-gram length
+            epochs: Gradient steps over the whole set
+            learning_rate: AdaGrad step size
+            l2: L2 penalty on the weights
+            min_confidence: Stored fallback threshold
+
+        Returns:
+            Trained classifier
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("The intent classifier needs numpy (pip install numpy)")
+        if not texts:
+            raise ValueError("No training examples")
+
+        label_names = sorted(set(labels))
+        label_ids = {name: i for i, name in enumerate(label_names)}
+        targets = np.array([label_ids[label] for label in labels], dtype=np.int64)
+        n_samples, n_labels = len(texts), len(label_names)
+
+        rows, buckets, values = cls.featurize(texts, hash_bits, ngram_range)
+        # Train only the buckets that occur; the rest stay zero
+        vocabulary, columns = np.unique(buckets, return_inverse=True)
+
+        weights = np.zeros((len(vocabulary), n_labels), dtype=np.float64)
+        bias = np.zeros(n_labels, dtype=np.float64)
+        weight_sq = np.zeros_like(weights)
+        bias_sq = np.zeros_like(bias)
+        onehot = np.zeros((n_samples, n_labels))
+        onehot[np.arange(n_samples), targets] = 1.0
+        offsets = np.searchsorted(rows, np.arange(n_samples))
+        flat_columns = (columns[:, None] * n_labels + np.arange(n_labels)).ravel()
+
+        for _ in range(epochs):
+            scores = np.add.reduceat(weights[columns] * values[:, None], offsets, axis=0) + bias
+            error = (_softmax(scores) - onehot) / n_samples
+            grad_w = np.bincount(
+                flat_columns, weights=(values[:, None] * error[rows]).ravel(), minlength=weights.size
+            ).reshape(weights.shape) + l2 * weights
+            grad_b = error.sum(axis=0)
+            weight_sq += grad_w ** 2
+            bias_sq += grad_b ** 2
+            weights -= learning_rate * grad_w / (np.sqrt(weight_sq) + 1e-8)
+            bias -= learning_rate * grad_b / (np.sqrt(bias_sq) + 1e-8)
+
+        dense = np.zeros((1 << hash_bits, n_labels), dtype=np.float32)
+        dense[vocabulary] = weights
+        return cls(label_names, dense, bias.astype(np.float32), hash_bits, ngram_range, min_confidence)
+
+    def save(self, path):
+        """Write the model (only the non-zero weight rows) to a .npz file"""
+        used = np.flatnonzero(np.any(self.weights != 0, axis=1))
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels),
+            buckets=used,
+            weights=self.weights[used],
+            bias=self.bias,
+            hash_bits=self.hash_bits,
+            ngram_range=np.array(self.ngram_range)
+        )
+
+    @classmethod
+    def load(cls, path, min_confidence: float = 0.7) -> "IntentClassifier":
+        """Read a model written by save()"""
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("The intent classifier needs numpy (pip install numpy)")
+        with np.load(path) as data:
+            hash_bits = int(data["hash_bits"])
+            labels = [str(label) for label in data["labels"]]
+            weights = np.zeros((1 << hash_bits, len(labels)), dtype=np.float32)
+            weights[data["buckets"]] = data["weights"]
+            return cls(
+                labels,
+                weights,
+                data["bias"].astype(np.float32),
+                hash_bits,
+                tuple(int(n) for n in data["ngram_range"]),
+                min_confidence
+            )
+
+
+def _softmax(scores):
+    """Row-wise softmax"""
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def load_training_pairs(db: Session, limit: Optional[int] = None) -> Tuple[List[str], List[str]]:
+    """
+    Read (normalized message, intent) pairs from the AI action log
+
+    Messages are normalized like AIAgentEngine.normalize (Devanagari
+    rewritten to Latin tokens), so training sees what the engine scores.
+
+    Args:
+        db: Database session
+        limit: Use only the most recent rows
+
+    Returns:
+        (texts, intents)
+    """
+    query = db.query(AIActionLog.input_text, AIActionLog.action_type).filter(
+        AIActionLog.action_type.like(INTENT_LOG_PREFIX + "%"),
+        AIActionLog.input_text.isnot(None)
+    ).order_by(AIActionLog.id.desc())
+    if limit:
+        query = query.limit(limit)
+
+    texts, intents = [], []
+    for input_text, action_type in query:
+        text = normalize_text(input_text.lower().strip())
+        if text:
+            texts.append(text)
+            intents.append(action_type[len(INTENT_LOG_PREFIX):].lower())
+    return texts, intents
+
+
+# Classifier used by AIAgentEngine instances (None = keyword scoring only)
+_active_classifier: Optional[IntentClassifier] = None
+
+
+def get_active_classifier() -> Optional[IntentClassifier]:
+    """Classifier new AIAgentEngine instances use by default"""
+    return _active_classifier
+
+
+def set_active_classifier(classifier: Optional[IntentClassifier]):
+    """Install (or remove) the default classifier and drop cached intents"""
+    global _active_classifier
+    from app.services.intent_cache import intent_cache
+
+    _active_classifier = classifier
+    intent_cache.clear()
+
+
+def load_configured_classifier() -> Optional[IntentClassifier]:
+    """
+    Load AI_INTENT_CLASSIFIER_PATH (if set) as the active classifier
+
+    Returns:
+        The loaded classifier, or None if disabled or unavailable
+    """
+    path = settings.AI_INTENT_CLASSIFIER_PATH
+    if not path:
+        return None
+    if not NUMPY_AVAILABLE:
+        print("⚠️ AI_INTENT_CLASSIFIER_PATH is set but numpy is not installed; using keyword scoring")
+        return None
+    if not Path(path).exists():
+        print(f"⚠️ Intent classifier not found at {path}; using keyword scoring")
+        return None
+
+    classifier = IntentClassifier.load(path, min_confidence=settings.AI_CLASSIFIER_MIN_CONFIDENCE)
+    set_active_classifier(classifier)
+    return classifier
@@ -0,0 +1,117 @@
+"""
+Invoice Renderer - background worker pool for invoice PDFs
+
+InvoiceService queues rendering jobs here so order creation returns as soon
+as the database work is done. Jobs are keyed by invoice ID, which lets the
+download endpoint wait for a specific invoice to finish.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures import wait as wait_futures
+from typing import Callable, Dict, Optional
+import threading
+
+from app.config import settings
+
+
+class InvoiceRenderer:
+    """
+    Thread pool running one rendering job per invoice
+
+    With background=False jobs run inline in the caller (useful in tests and
+    scripts that need the PDF right away).
+    """
+
+    def __init__(self, max_workers: int = 2, background: bool = True):
+        """
+        Args:
+            max_workers: Number of rendering threads
+            background: Run jobs on the pool (False runs them inline)
+        """
+        self.max_workers = max(1, max_workers)
+        self.background = background
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, invoice_id: int, func: Callable, *args) -> Optional[Future]:
+        """
+        Queue func(*args) as the rendering job of an invoice
+
+        A job already pending for the same invoice is reused.
+
+        Args:
+            invoice_id: Invoice the job renders
+            func: Callable doing the work
+            *args: Arguments for func
+
+        Returns:
+            Future of the job, or None when it ran inline
+        """
+        if not self.background:
+            func(*args)
+            return None
+
+        with self._lock:
+            future = self._futures.get(invoice_id)
+            if future is not None and not future.done():
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="invoice-render"
+                )
+            future = self._executor.submit(func, *args)
+            self._futures[invoice_id] = future
+
+        future.add_done_callback(lambda done: self._forget(invoice_id, done))
+        return future
+
+    def _forget(self, invoice_id: int, future: Future):
+        """Drop a finished job unless a newer one replaced it"""
+        with self._lock:
+            if self._futures.get(invoice_id) is future:
+                del self._futures[invoice_id]
+
+    def wait(self, invoice_id: int, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the rendering job of an invoice
+
+        Args:
+            invoice_id: Invoice to wait for
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            False if the job is still running after timeout, True otherwise
+            (including when no job is pending in this process)
+        """
+        future = self._futures.get(invoice_id)
+        if future is None:
+            return True
+        try:
+            future.result(timeout=timeout)
+        except FutureTimeout:
+            return False
+        except Exception:
+            # Failures are recorded on the invoice by the job itself
+            pass
+        return True
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """Wait for every queued job; returns False if some are still running"""
+        with self._lock:
+            futures = list(self._futures.values())
+        _, not_done = wait_futures(futures, timeout=timeout)
+        return not not_done
+
+    def shutdown(self, wait: bool = True):
+        """Stop the pool, finishing queued jobs first when wait is True"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# Singleton instance shared by every request in the process
+invoice_renderer = InvoiceRenderer(
+    max_workers=settings.INVOICE_RENDER_WORKERS,
+    background=settings.INVOICE_RENDER_ASYNC
+)
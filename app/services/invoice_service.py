@@ -1,10 +1,14 @@
 """
 Invoice service - business logic for invoice generation
 """
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
+from app.database import commit_or_flush, on_commit, unit_of_work
 from app.models.invoice import Invoice
 from app.models.order import Order
 from app.services.ai_logger_service import AILoggerService
+from app.services.invoice_renderer import invoice_renderer
+from app.services.pipeline_timing import span
 from app.config import settings
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
@@ -13,49 +17,162 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.units import inch
 from typing import Optional
 from fastapi import HTTPException
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 class InvoiceService:
     """Service class for invoice operations"""
     
     @staticmethod
-    def generate_invoice(db: Session, order_id: int) -> Invoice:
-        """Generate PDF invoice for an order"""
-        # Check if invoice already exists
-        existing_invoice = db.query(Invoice).filter(Invoice.order_id == order_id).first()
-        if existing_invoice:
-            return existing_invoice
-        
-        # Get order with items
-        order = db.query(Order).filter(Order.id == order_id).first()
-        if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
-        
-        # Generate PDF
-        filename = f"invoice_{order_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        file_path = settings.INVOICE_DIR / filename
-        
-        InvoiceService._create_pdf(order, str(file_path))
-        
-        # Save invoice record
-        invoice = Invoice(
-            order_id=order_id,
-            file_path=str(file_path)
-        )
-        db.add(invoice)
-        db.commit()
-        db.refresh(invoice)
+    def generate_invoice(db: Session, order_id: int, background: bool = False) -> Invoice:
+        """
+        Generate PDF invoice for an order
+        
+        Args:
+            db: Database session
+            order_id: Order to invoice
+            background: Queue the PDF on the invoice renderer and return the
+                invoice in "rendering" state instead of waiting for it
+            
+        Returns:
+            Invoice record (existing one if the order was already invoiced)
+        """
+        # Check if invoice already exists (failed renders are retried)
+        invoice = db.query(Invoice).filter(Invoice.order_id == order_id).first()
+        if invoice and invoice.status != "failed":
+            return invoice
+        
+        if invoice is None:
+            # Get order with items
+            order = db.query(Order).filter(Order.id == order_id).first()
+            if not order:
+                raise HTTPException(status_code=404, detail="Order not found")
+            
+            filename = f"invoice_{order_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            file_path = settings.INVOICE_DIR / filename
+            
+            # Save invoice record
+            invoice = Invoice(
+                order_id=order_id,
+                file_path=str(file_path),
+                status="rendering"
+            )
+            db.add(invoice)
+        else:
+            invoice.status = "rendering"
+        # Queued invoices are claimed by the renderer that picks them up
+        invoice.render_claimed_at = None if background else datetime.utcnow()
+        commit_or_flush(db, invoice)
+        
+        if background:
+            # The renderer reads the invoice in its own session, so queue it once committed
+            invoice_id = invoice.id
+            on_commit(db, lambda: invoice_renderer.submit(
+                invoice_id, InvoiceService._render_detached, db.get_bind(), invoice_id
+            ))
+            return invoice
+        
+        InvoiceService.render_invoice(db, invoice)
+        return invoice
+    
+    @staticmethod
+    def render_invoice(db: Session, invoice: Invoice):
+        """
+        Render the PDF of an invoice and mark it ready (or failed, re-raising the error)
+        
+        Args:
+            db: Database session the invoice belongs to
+            invoice: Invoice in "rendering" state
+        """
+        try:
+            with span("invoice.render_pdf"):
+                InvoiceService._create_pdf(invoice.order, invoice.file_path)
+        except Exception as e:
+            invoice.status = "failed"
+            commit_or_flush(db)
+            AILoggerService.log_action(
+                db=db,
+                action_type="INVOICE_RENDER_FAILED",
+                input_text=f"Generate invoice for order {invoice.order_id}",
+                output_action=f"Invoice {invoice.id} failed: {str(e)}"
+            )
+            raise
+        
+        invoice.status = "ready"
+        commit_or_flush(db)
         
         # Log AI action
         AILoggerService.log_action(
             db=db,
             action_type="INVOICE_GENERATED",
-            input_text=f"Generate invoice for order {order_id}",
-            output_action=f"Invoice {invoice.id} created at {file_path}"
+            input_text=f"Generate invoice for order {invoice.order_id}",
+            output_action=f"Invoice {invoice.id} created at {invoice.file_path}"
         )
+    
+    @staticmethod
+    def _render_detached(bind, invoice_id: int):
+        """Renderer job: render an invoice in its own session"""
+        db = Session(bind=bind)
+        try:
+            if not InvoiceService._claim(db, invoice_id):
+                return
+            with unit_of_work(db):
+                invoice = db.query(Invoice).filter(Invoice.id == invoice_id).first()
+                if invoice is None or invoice.status != "rendering":
+                    return
+                try:
+                    InvoiceService.render_invoice(db, invoice)
+                except Exception as e:
+                    # Keep the "failed" status recorded by render_invoice
+                    print(f"Invoice {invoice_id} rendering failed: {e}")
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _claim(db: Session, invoice_id: int) -> bool:
+        """
+        Atomically take a rendering invoice for this renderer
         
-        return invoice
+        The UPDATE only matches an invoice nobody has claimed, or whose claim
+        is older than INVOICE_RENDER_CLAIM_TIMEOUT_SECONDS (its renderer
+        died), so an invoice queued by several workers is rendered once.
+        
+        Returns:
+            True if this call claimed the invoice
+        """
+        claimed = db.query(Invoice).filter(
+            Invoice.id == invoice_id, InvoiceService._claimable()
+        ).update({Invoice.render_claimed_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return claimed == 1
+    
+    @staticmethod
+    def _claimable():
+        """Filter for rendering invoices with no claim, or one old enough to be abandoned"""
+        stale = datetime.utcnow() - timedelta(seconds=settings.INVOICE_RENDER_CLAIM_TIMEOUT_SECONDS)
+        return and_(
+            Invoice.status == "rendering",
+            or_(Invoice.render_claimed_at.is_(None), Invoice.render_claimed_at < stale)
+        )
+    
+    @staticmethod
+    def resume_pending_invoices(db: Session) -> int:
+        """
+        Re-queue invoices left in "rendering" state (e.g. by a restart)
+        
+        Runs in every worker at startup. Invoices another renderer is working
+        on are skipped, and each job claims its invoice before rendering, so
+        workers resuming the same invoices don't render them twice.
+        
+        Returns:
+            Number of invoices queued
+        """
+        pending = db.query(Invoice.id).filter(InvoiceService._claimable()).all()
+        for (invoice_id,) in pending:
+            invoice_renderer.submit(
+                invoice_id, InvoiceService._render_detached, db.get_bind(), invoice_id
+            )
+        return len(pending)
     
     @staticmethod
     def _create_pdf(order: Order, file_path: str):
@@ -0,0 +1,88 @@
+"""
+Keyword Automaton - Aho-Corasick multi-pattern matcher
+
+Used by the AI Agent Engine to find every intent keyword in a message
+with a single pass over the text instead of one substring check per keyword.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of keywords
+
+    Matching uses plain substring semantics (same as `keyword in text`),
+    so a keyword is reported even when it sits inside a longer word.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Build the automaton
+
+        Args:
+            keywords: Keywords to match (duplicates are ignored)
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword)
+        self._build_failure_links()
+
+    def _add(self, keyword: str):
+        """Insert a keyword into the trie"""
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        if keyword not in self._output[state]:
+            self._output[state].append(keyword)
+
+    def _build_failure_links(self):
+        """Breadth-first construction of failure links and merged outputs"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + [
+                    k for k in self._output[self._fail[next_state]]
+                    if k not in self._output[next_state]
+                ]
+
+    def search(self, text: str) -> Set[str]:
+        """
+        Find all keywords occurring anywhere in text
+
+        Args:
+            text: Text to scan (callers normalize case beforehand)
+
+        Returns:
+            Set of matched keywords
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found: Set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
@@ -0,0 +1,292 @@
+"""
+Low Stock Monitor - event-driven low-stock alerts
+
+Order and product writes report the products they left at or below their
+reorder threshold with notify(). Once the write commits, the IDs go to a
+pending set that a worker thread drains after a short debounce, so a burst
+of orders on the same product costs one check. Each check loads the
+reported products and their recent LOW_STOCK notifications with one query
+apiece, and alerts the products that are still low and outside the cooldown.
+
+A reconciliation sweep runs every sweep_interval_seconds on the same thread.
+It catches stock changed outside these paths (scripts, raw SQL) and
+re-alerts products still low after their cooldown. It only reads the
+low-stock candidates through the ix_products_low_stock partial index, not
+the whole catalog. With background=False reports are checked inline, in
+the reporting transaction (tests and scripts).
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+import atexit
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import on_commit, unit_of_work
+from app.models.product import Product
+
+
+class LowStockMonitor:
+    """
+    Debounced low-stock checker with a periodic candidate sweep
+
+    Pending IDs remember the engine of the session that reported them, so
+    tests and tools using their own database get their alerts written there.
+    """
+
+    def __init__(
+        self,
+        debounce_ms: int = 1000,
+        sweep_interval_seconds: float = 600,
+        cooldown_seconds: float = 3600,
+        background: bool = True
+    ):
+        """
+        Args:
+            debounce_ms: How long the worker gathers reports before a check
+            sweep_interval_seconds: Time between reconciliation sweeps
+            cooldown_seconds: Shortest time between two alerts for a product
+            background: Check on the worker thread (False checks inline)
+        """
+        self.debounce = max(debounce_ms, 0) / 1000
+        self.sweep_interval = max(sweep_interval_seconds, 1)
+        self.cooldown = timedelta(seconds=cooldown_seconds)
+        self.background = background
+        self._pending: Dict[Any, Set[int]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._hurry = threading.Event()
+        self._stopping = threading.Event()
+        self._checking = False
+        self._thread: Optional[threading.Thread] = None
+        self._sweep_bind = None
+        self._exit_hook = False
+        self.checks = 0
+        self.sweeps = 0
+        self.alerts = 0
+        self.failed = 0
+
+    def notify(self, db: Session, product_ids: Iterable[int]):
+        """
+        Report products whose stock or threshold just changed
+
+        Safe to call inside a unit of work: nothing is queued unless the
+        caller's transaction commits. With background=False the check runs
+        right away as part of the caller's transaction.
+
+        Args:
+            db: Session the change was made with
+            product_ids: Products that may now be low on stock
+        """
+        ids = set(product_ids)
+        if not ids:
+            return
+        if not self.background:
+            self.check(db, ids)
+            return
+        bind = db.get_bind()
+        on_commit(db, lambda: self._enqueue(bind, ids))
+
+    def check(self, db: Session, product_ids: Iterable[int]) -> int:
+        """
+        Alert the given products that are low on stock and out of cooldown
+
+        Args:
+            db: Database session
+            product_ids: Products to check
+
+        Returns:
+            Number of alerts created
+        """
+        ids = set(product_ids)
+        if not ids:
+            return 0
+        products = db.query(Product).filter(
+            Product.id.in_(ids),
+            Product.stock_quantity <= Product.reorder_threshold
+        ).order_by(Product.id).all()
+        with self._lock:
+            self.checks += 1
+        return self.alert(db, products)
+
+    def alert(self, db: Session, products: List[Product]) -> int:
+        """
+        Create LOW_STOCK notifications for products not alerted within the cooldown
+
+        The cooldown is read from the Notification table with one query for
+        all products.
+
+        Returns:
+            Number of alerts created
+        """
+        from app.models.notification import Notification
+        from app.services.notification_service import NotificationService
+
+        if not products:
+            return 0
+        since = datetime.utcnow() - self.cooldown
+        recent = {
+            related_id for (related_id,) in db.query(Notification.related_id).filter(
+                Notification.type == "LOW_STOCK",
+                Notification.related_id.in_([product.id for product in products]),
+                Notification.created_at >= since
+            )
+        }
+        due = [product for product in products if product.id not in recent]
+        if not due:
+            return 0
+
+        with unit_of_work(db):
+            for product in due:
+                msg = f"Product: {product.name}\nRemaining Stock: {product.stock_quantity}\nMinimum Required: {product.reorder_threshold}"
+                NotificationService.create_notification(db, "LOW_STOCK", msg, product.id)
+        with self._lock:
+            self.alerts += len(due)
+        return len(due)
+
+    def sweep(self, db: Session) -> int:
+        """
+        Reconcile: check every product currently at or below its threshold
+
+        Returns:
+            Number of alerts created
+        """
+        candidates = [product_id for (product_id,) in db.query(Product.id).filter(
+            Product.stock_quantity <= Product.reorder_threshold
+        )]
+        with self._lock:
+            self.sweeps += 1
+        return self.check(db, candidates)
+
+    def start(self, bind):
+        """
+        Start the worker thread, sweeping bind right away and then periodically
+
+        Args:
+            bind: Engine of the app database
+        """
+        self._sweep_bind = bind
+        self._ensure_started()
+        self._wake.set()
+
+    def flush(self, timeout: float = 10) -> bool:
+        """
+        Check every pending report now, skipping the debounce
+
+        Returns:
+            False if reports were still pending after timeout
+        """
+        if self._thread is None:
+            self._drain()
+            return True
+        deadline = time.monotonic() + timeout
+        self._hurry.set()
+        self._wake.set()
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._pending and not self._checking:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def shutdown(self, timeout: Optional[float] = 10):
+        """Check pending reports and stop the worker thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopping.set()
+        self._hurry.set()
+        self._wake.set()
+        thread.join(timeout)
+        self._stopping.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pending reports and check/alert counters for monitoring"""
+        with self._lock:
+            pending = sum(len(ids) for ids in self._pending.values())
+        return {
+            "background": self.background,
+            "running": self._thread is not None,
+            "pending": pending,
+            "checks": self.checks,
+            "sweeps": self.sweeps,
+            "alerts": self.alerts,
+            "failed": self.failed
+        }
+
+    def _enqueue(self, bind, ids: Set[int]):
+        """Add committed reports to the pending set and wake the worker"""
+        with self._lock:
+            self._pending.setdefault(bind, set()).update(ids)
+        self._ensure_started()
+        self._wake.set()
+
+    def _ensure_started(self):
+        """Start the worker thread on first use"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="low-stock-monitor", daemon=True)
+                self._thread.start()
+                if not self._exit_hook:
+                    atexit.register(self.shutdown)
+                    self._exit_hook = True
+
+    def _run(self):
+        """Worker loop: debounce reports, check them, sweep when due"""
+        next_sweep = time.monotonic()
+        while not self._stopping.is_set():
+            timeout = next_sweep - time.monotonic() if self._sweep_bind is not None else None
+            self._wake.wait(None if timeout is None else max(timeout, 0))
+            if self._stopping.is_set():
+                break
+
+            if self._wake.is_set():
+                # Let a burst of reports settle into one check
+                self._hurry.wait(self.debounce)
+                self._hurry.clear()
+                self._drain()
+
+            if self._sweep_bind is not None and time.monotonic() >= next_sweep:
+                self._run_safely(self._sweep_bind, self.sweep)
+                next_sweep = time.monotonic() + self.sweep_interval
+        self._drain()
+
+    def _drain(self):
+        """Check every pending report, one session per engine"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._wake.clear()
+            self._checking = True
+        try:
+            for bind, ids in pending.items():
+                self._run_safely(bind, lambda db, ids=ids: self.check(db, ids))
+        finally:
+            with self._lock:
+                self._checking = False
+
+    def _run_safely(self, bind, work):
+        """Run work(db) in a fresh session, counting failures instead of raising"""
+        db = Session(bind=bind)
+        try:
+            work(db)
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self.failed += 1
+            print(f"Low stock check failed: {e}")
+        finally:
+            db.close()
+
+
+# Singleton instance, started by main.startup_event
+low_stock_monitor = LowStockMonitor(
+    debounce_ms=settings.LOW_STOCK_DEBOUNCE_MS,
+    sweep_interval_seconds=settings.LOW_STOCK_SWEEP_SECONDS,
+    cooldown_seconds=settings.LOW_STOCK_ALERT_COOLDOWN_SECONDS,
+    background=settings.LOW_STOCK_ASYNC
+)
@@ -0,0 +1,110 @@
+"""
+NLU Service - one warm AI Agent Engine for the whole app
+
+Created and warmed in main.startup_event: the keyword automaton and fuzzy
+index are compiled, the product and customer indexes are built, and a
+warm-up pass runs sample messages through intent detection, entity
+extraction and product/customer lookup, including their queries. Route
+handlers get it through the get_nlu_service dependency, so the first
+request after a restart costs the same as any other.
+"""
+from typing import Any, Dict, Optional
+import time
+
+from sqlalchemy.orm import Session
+
+from app.services.ai_action_router import AIActionRouter
+from app.services.ai_agent_engine import AIAgentEngine
+from app.services.customer_index import customer_index
+from app.services.customer_service import CustomerService
+from app.services.intent_cache import IntentCache
+from app.services.product_index import product_index
+from app.services.product_service import ProductService
+
+
+class NLUService:
+    """
+    Process-wide holder of the AI Agent Engine
+    """
+
+    # English, Hinglish, Hindi and misspelled samples covering every intent
+    WARMUP_MESSAGES = [
+        "Order 2 laptops for Rahul",
+        "Laptop chahiye 2 pieces for Rahul",
+        "Rahul के लिए दो लैपटॉप चाहिए",
+        "Check stock of mouse",
+        "Kitne laptop available hai?",
+        "chek stok of keybord",
+        "Show all products",
+        "Generate bill for order 123",
+        "Invoice dedo order #5 ka",
+        "Add customer Priya phone 9876543210",
+        "add product Logitech Keyboard price 1200 stock 30",
+        "Payment reminder for Amit",
+        "Order 3 cables for Bob phone 9123456789 Rs 500",
+    ]
+
+    def __init__(self):
+        self._engine: Optional[AIAgentEngine] = None
+        self.warmup_ms: Optional[float] = None
+
+    @property
+    def engine(self) -> AIAgentEngine:
+        """The shared engine (created on first use if startup didn't)"""
+        if self._engine is None:
+            self._engine = AIAgentEngine()
+        return self._engine
+
+    def start(self, db: Session) -> float:
+        """
+        Create the engine and warm every structure a message touches
+
+        Call after the intent classifier is loaded so the engine picks it up.
+
+        Args:
+            db: Session used to build the product and customer indexes
+
+        Returns:
+            Warm-up time in milliseconds
+        """
+        started = time.perf_counter()
+        self._engine = AIAgentEngine()
+        product_index.ensure_loaded(db)
+        customer_index.ensure_loaded(db)
+
+        # Warm-up pass on a private cache so samples don't occupy the shared one
+        warmup = AIAgentEngine(cache=IntentCache(), classifier=self._engine.classifier)
+        for intent in warmup.detect_intents(self.WARMUP_MESSAGES):
+            if "product_name" in intent.entities:
+                product_id = product_index.find_best_match(intent.entities["product_name"])
+                if product_id is not None:
+                    ProductService.get_product(db, product_id)
+            if "customer_name" in intent.entities:
+                customer_id = customer_index.resolve(intent.entities["customer_name"])
+                if customer_id is not None:
+                    CustomerService.get_customer(db, customer_id)
+
+        self.warmup_ms = round((time.perf_counter() - started) * 1000, 1)
+        return self.warmup_ms
+
+    def router(self, db: Session, session_id: str = "default") -> AIActionRouter:
+        """AIActionRouter for one request, sharing the warm engine"""
+        return AIActionRouter(db, session_id=session_id, engine=self.engine)
+
+    def stats(self) -> Dict[str, Any]:
+        """Warm-up state for monitoring"""
+        return {
+            "started": self._engine is not None,
+            "warmup_ms": self.warmup_ms,
+            "classifier": self._engine is not None and self._engine.classifier is not None,
+            "products_indexed": len(product_index),
+        }
+
+
+# Singleton instance, started by main.startup_event
+nlu_service = NLUService()
+
+
+def get_nlu_service() -> NLUService:
+    """FastAPI dependency returning the app-wide NLU service"""
+    return nlu_service
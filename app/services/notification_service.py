@@ -1,25 +1,31 @@
 """
 Notification Service
 """
+from contextlib import nullcontext
 from sqlalchemy.orm import Session
+from app.database import commit_or_flush, in_unit_of_work, savepoint
 from app.models.notification import Notification
 from typing import List
 
 class NotificationService:
     @staticmethod
     def create_notification(db: Session, type: str, message: str, related_id: int = None):
+        notif = Notification(
+            type=type,
+            message=message,
+            related_id=related_id
+        )
+        # Savepoint inside a unit of work: a failed notification must not undo the caller's work
+        nested = in_unit_of_work(db)
         try:
-            notif = Notification(
-                type=type,
-                message=message,
-                related_id=related_id
-            )
-            db.add(notif)
-            db.commit()
+            with savepoint(db) if nested else nullcontext():
+                db.add(notif)
+            commit_or_flush(db)
             return notif
         except Exception as e:
             print(f"Failed to create notification: {e}")
-            db.rollback()
+            if not nested:
+                db.rollback()
             return None
 
     @staticmethod
@@ -1,12 +1,18 @@
 """
 Order service - business logic for order operations
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session, selectinload
+from app.database import commit_or_flush, unit_of_work
 from app.models.order import Order, OrderItem
+from app.models.product import Product
 from app.schemas.order import OrderCreate
 from app.services.product_service import ProductService
 from app.services.ai_logger_service import AILoggerService
-from typing import List, Optional
+from app.services.low_stock_monitor import low_stock_monitor
+from app.services.pagination import paginate
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
 from fastapi import HTTPException
 
 
@@ -15,17 +21,27 @@ class OrderService:
     
     @staticmethod
     def create_order(db: Session, order_data: OrderCreate) -> Order:
-        """Create a new order with items"""
+        """
+        Create a new order with items
+        
+        All products are loaded with one IN query, and stock is taken with
+        one conditional UPDATE per product (see ProductService.reserve_stock),
+        so two concurrent orders can't oversell.
+        """
+        products = ProductService.get_products_by_ids(db, (item.product_id for item in order_data.items))
+        
         # Calculate total and validate stock
         order_total = 0.0
         order_items_data = []
+        quantities = {}
         
         for item in order_data.items:
-            product = ProductService.get_product(db, item.product_id)
+            product = products.get(item.product_id)
             if not product:
                 raise HTTPException(status_code=404, detail=f"Product {item.product_id} not found")
             
-            if product.stock_quantity < item.quantity:
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+            if product.stock_quantity < quantities[item.product_id]:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Insufficient stock for product {product.name}. Available: {product.stock_quantity}"
@@ -40,27 +56,20 @@ class OrderService:
                 "price": product.price
             })
         
-        # Create order
+        # Take stock atomically; the check above may be stale under concurrency
+        ProductService.reserve_stock(db, quantities)
+        low_stock = [p for p in products.values() if p.stock_quantity <= p.reorder_threshold]
+        
+        # Create order and items
         order = Order(
             customer_id=order_data.customer_id,
             order_total=order_total
         )
+        order.items = [OrderItem(**item_data) for item_data in order_items_data]
         db.add(order)
-        db.flush()  # Get order ID without committing
-        
-        # Create order items and decrease stock
-        for item_data in order_items_data:
-            order_item = OrderItem(
-                order_id=order.id,
-                **item_data
-            )
-            db.add(order_item)
-            
-            # Decrease stock
-            ProductService.decrease_stock(db, item_data["product_id"], item_data["quantity"])
+        commit_or_flush(db, order)
         
-        db.commit()
-        db.refresh(order)
+        low_stock_monitor.notify(db, (product.id for product in low_stock))
         
         # Log AI action
         AILoggerService.log_action(
@@ -72,17 +81,221 @@ class OrderService:
         
         return order
     
+    # Attempts at a bulk batch when stock changes between the read and the UPDATEs
+    BULK_ATTEMPTS = 3
+    
+    @staticmethod
+    def _allocate(
+        orders: List[OrderCreate], products: Dict[int, Product]
+    ) -> Tuple[List[Dict[str, Any]], Dict[int, int]]:
+        """
+        Check a batch of orders against stock, in request order
+        
+        Each accepted order lowers the stock the following orders can take.
+        
+        Returns:
+            Per-order results (with order_total, or an error), and the
+            product ID -> quantity taken by the accepted orders
+        """
+        results = []
+        taken: Dict[int, int] = {}
+        for index, order_data in enumerate(orders):
+            wanted: Dict[int, int] = {}
+            order_total = 0.0
+            error = None
+            for item in order_data.items:
+                product = products.get(item.product_id)
+                if not product:
+                    error = f"Product {item.product_id} not found"
+                    break
+                wanted[item.product_id] = wanted.get(item.product_id, 0) + item.quantity
+                available = product.stock_quantity - taken.get(item.product_id, 0)
+                if available < wanted[item.product_id]:
+                    error = f"Insufficient stock for product {product.name}. Available: {available}"
+                    break
+                order_total += product.price * item.quantity
+            
+            if error:
+                results.append({"index": index, "success": False, "error": error})
+                continue
+            for product_id, quantity in wanted.items():
+                taken[product_id] = taken.get(product_id, 0) + quantity
+            results.append({"index": index, "success": True, "order_total": order_total})
+        return results, taken
+    
+    @staticmethod
+    def create_orders_bulk(
+        db: Session, orders: List[OrderCreate], all_or_nothing: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Create many orders in one transaction
+        
+        Every product in the batch is loaded with one IN query and checked in
+        request order, stock is taken with one conditional UPDATE per product,
+        and orders and items are written with one multi-row INSERT each.
+        
+        Args:
+            db: Database session
+            orders: Orders to create
+            all_or_nothing: Create nothing if any order fails (otherwise
+                create the orders that can be filled)
+            
+        Returns:
+            One result per order, in request order: index, success, and
+            order_id/order_total or error
+            
+        Raises:
+            HTTPException: 409 if stock keeps changing under the batch
+        """
+        product_ids = {item.product_id for order_data in orders for item in order_data.items}
+        
+        with unit_of_work(db):
+            for attempt in range(OrderService.BULK_ATTEMPTS):
+                products = ProductService.get_products_by_ids(db, product_ids, refresh=attempt > 0)
+                results, taken = OrderService._allocate(orders, products)
+                accepted = [result for result in results if result["success"]]
+                
+                if all_or_nothing and len(accepted) < len(results):
+                    for result in accepted:
+                        result.update(success=False, error="Skipped: another order in the all-or-nothing batch failed")
+                        del result["order_total"]
+                    return results
+                if not accepted:
+                    return results
+                
+                # Stock read above may be stale; re-read and re-check if an UPDATE misses
+                try:
+                    ProductService.reserve_stock(db, taken)
+                    break
+                except HTTPException:
+                    continue
+            else:
+                raise HTTPException(status_code=409, detail="Stock changed while creating the orders, please retry")
+            
+            # IDs come back in parameter order, matching accepted
+            order_ids = db.scalars(
+                insert(Order).returning(Order.id, sort_by_parameter_order=True),
+                [
+                    {"customer_id": orders[result["index"]].customer_id, "order_total": result["order_total"]}
+                    for result in accepted
+                ]
+            ).all()
+            item_rows = []
+            for result, order_id in zip(accepted, order_ids):
+                result["order_id"] = order_id
+                item_rows.extend(
+                    {
+                        "order_id": order_id,
+                        "product_id": item.product_id,
+                        "quantity": item.quantity,
+                        "price": products[item.product_id].price,
+                    }
+                    for item in orders[result["index"]].items
+                )
+            db.execute(insert(OrderItem), item_rows)
+            
+            low_stock_monitor.notify(db, (
+                product_id for product_id in taken if products[product_id].needs_reorder
+            ))
+            
+            AILoggerService.log_actions(db, [
+                (
+                    "ORDER_CREATED",
+                    f"Customer {orders[result['index']].customer_id} placed order",
+                    f"Order {result['order_id']} created with total ${result['order_total']:.2f}"
+                )
+                for result in accepted
+            ])
+        
+        return results
+    
+    @staticmethod
+    def _with_items(db: Session):
+        """
+        Order query that loads items up front
+        
+        OrderResponse serializes every order's items, so a lazy load would
+        cost one query per order; selectinload fetches all the items of a
+        page with a single extra IN query.
+        """
+        return db.query(Order).options(selectinload(Order.items))
+    
     @staticmethod
     def get_order(db: Session, order_id: int) -> Optional[Order]:
         """Get order by ID with items"""
-        return db.query(Order).filter(Order.id == order_id).first()
+        return OrderService._with_items(db).filter(Order.id == order_id).first()
+    
+    @staticmethod
+    def _filtered(
+        db: Session,
+        status: Optional[str] = None,
+        customer_id: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+    ):
+        """Order query with items, narrowed by the given filters"""
+        query = OrderService._with_items(db)
+        if status is not None:
+            query = query.filter(Order.status == status)
+        if customer_id is not None:
+            query = query.filter(Order.customer_id == customer_id)
+        if created_from is not None:
+            query = query.filter(Order.created_at >= created_from)
+        if created_to is not None:
+            query = query.filter(Order.created_at < created_to)
+        return query
+    
+    @staticmethod
+    def get_all_orders(
+        db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, **filters
+    ) -> List[Order]:
+        """Get all orders with pagination (filters as in get_orders_page)"""
+        return OrderService.get_orders_page(db, limit, skip, cursor, **filters)[0]
+    
+    @staticmethod
+    def get_orders_page(
+        db: Session,
+        limit: int = 100,
+        skip: int = 0,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        customer_id: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        newest_first: bool = False
+    ) -> Tuple[List[Order], Optional[str]]:
+        """
+        One page of orders, oldest first unless newest_first
+        
+        Pages by (created_at, id), so a status filter with or without a date
+        range is answered from the (status, created_at) index.
+        
+        Args:
+            db: Database session
+            limit: Maximum orders to return
+            skip: Orders to skip (legacy offset paging)
+            cursor: next_cursor of the previous page (keyset paging, ignores skip)
+            status: Only orders with this status
+            customer_id: Only this customer's orders
+            created_from: Only orders created at or after this time
+            created_to: Only orders created before this time
+            newest_first: Newest orders first (the index is read backwards)
+            
+        Returns:
+            (orders, next_cursor), next_cursor None on the last page
+        """
+        query = OrderService._filtered(db, status, customer_id, created_from, created_to)
+        return paginate(query, (Order.created_at, Order.id), limit, skip, cursor, descending=newest_first)
     
     @staticmethod
-    def get_all_orders(db: Session, skip: int = 0, limit: int = 100) -> List[Order]:
-        """Get all orders with pagination"""
-        return db.query(Order).offset(skip).limit(limit).all()
+    def count_orders(db: Session, status: Optional[str] = None) -> int:
+        """Count orders, optionally with one status (an index-only scan)"""
+        query = db.query(func.count(Order.id))
+        if status is not None:
+            query = query.filter(Order.status == status)
+        return query.scalar()
     
     @staticmethod
     def get_customer_orders(db: Session, customer_id: int) -> List[Order]:
         """Get all orders for a specific customer"""
-        return db.query(Order).filter(Order.customer_id == customer_id).all()
+        return OrderService._with_items(db).filter(Order.customer_id == customer_id).all()
@@ -0,0 +1,90 @@
+"""
+Pagination - keyset (cursor) pagination for list endpoints
+
+OFFSET makes the database walk and discard every skipped row, so deep pages
+of large tables (orders, AI logs) get linearly slower. Keyset pagination
+instead filters on the sort key of the last row returned ("id > 41"), which
+an index answers directly at any depth.
+
+Cursors are opaque to clients: URL-safe base64 of the last row's sort key.
+Legacy skip/limit requests still work and also get a next cursor, so a
+client can switch to cursors from any page.
+"""
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for a sort key (datetimes are stored as ISO strings)"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=lambda value: value.isoformat())
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    """
+    Sort key stored in a cursor
+
+    Args:
+        cursor: Cursor from encode_cursor
+        keys: Sort key columns, used to restore value types
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or for other keys
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if key.type.python_type is datetime else key.type.python_type(value)
+            for key, value in zip(keys, values)
+        ]
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    query: Query,
+    keys: Sequence[Any],
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    descending: bool = False
+) -> Tuple[list, Optional[str]]:
+    """
+    One page of query, ordered by keys
+
+    Args:
+        query: Query to page through (without ORDER BY)
+        keys: Columns forming a unique sort key, e.g. (Order.id,)
+        limit: Maximum rows to return
+        skip: Rows to skip (legacy offset paging, ignored with a cursor)
+        cursor: next_cursor of the previous page
+        descending: Newest first
+
+    Returns:
+        (rows, next_cursor); next_cursor is None on the last page
+    """
+    if cursor is not None:
+        values = decode_cursor(cursor, keys)
+        if len(keys) == 1:
+            key, value = keys[0], values[0]
+        else:
+            key, value = tuple_(*keys), tuple_(*values)
+        query = query.filter(key < value if descending else key > value)
+
+    query = query.order_by(*[key.desc() if descending else key for key in keys])
+    if cursor is None and skip:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], key.key) for key in keys])
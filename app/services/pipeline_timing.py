@@ -0,0 +1,162 @@
+"""
+Pipeline Timing - lightweight span timing for the AI pipeline
+
+AIActionRouter.process_message starts a SpanRecorder when timing is enabled
+(AI_TIMING_ENABLED or a debug request). Code along the pipeline wraps its
+stages in `with span("stage"):`; with no recorder active that is a single
+context-variable lookup returning a shared no-op context manager.
+Finished requests are folded into per-intent latency histograms.
+"""
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+import bisect
+import threading
+import time
+
+
+_NO_SPAN = nullcontext()
+
+_current_recorder: ContextVar[Optional["SpanRecorder"]] = ContextVar("span_recorder", default=None)
+
+
+class _Span:
+    """Context manager adding its elapsed time to a recorder"""
+
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder: "SpanRecorder", name: str):
+        self.recorder = recorder
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class SpanRecorder:
+    """
+    Collects stage timings for one request
+
+    Repeated spans with the same name (e.g. several log commits) are summed
+    and counted.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.elapsed: Optional[float] = None
+        self.spans: Dict[str, List[float]] = {}  # name -> [total seconds, calls]
+
+    def span(self, name: str) -> _Span:
+        """Time a block under name"""
+        return _Span(self, name)
+
+    def add(self, name: str, seconds: float):
+        """Add a measured duration to name"""
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def finish(self):
+        """Stop the request clock"""
+        self.elapsed = time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Timings in milliseconds, in the order stages first ran"""
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started
+        return {
+            "total_ms": round(elapsed * 1e3, 3),
+            "spans": {
+                name: {"ms": round(seconds * 1e3, 3), "calls": calls}
+                for name, (seconds, calls) in self.spans.items()
+            }
+        }
+
+
+def span(name: str):
+    """Time a block under name if a recorder is active (no-op otherwise)"""
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return _NO_SPAN
+    return _Span(recorder, name)
+
+
+def start_recording() -> tuple:
+    """Activate a new recorder for the current context; returns (recorder, token)"""
+    recorder = SpanRecorder()
+    return recorder, _current_recorder.set(recorder)
+
+
+def stop_recording(token):
+    """Deactivate the recorder set by start_recording and fix its total time"""
+    _current_recorder.get().finish()
+    _current_recorder.reset(token)
+
+
+class TimingHistograms:
+    """
+    Thread-safe per-intent, per-stage latency histograms
+
+    Each bucket counts observations up to its upper bound in milliseconds
+    (and above the previous bound); the last one catches everything slower.
+    """
+
+    BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf")]
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, intent: str, stage: str, ms: float):
+        """Add one observation (caller holds the lock)"""
+        stages = self._data.setdefault(intent, {})
+        hist = stages.get(stage)
+        if hist is None:
+            hist = stages[stage] = {"count": 0, "sum_ms": 0.0, "buckets": [0] * len(self.BUCKETS_MS)}
+        hist["count"] += 1
+        hist["sum_ms"] += ms
+        hist["buckets"][bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+
+    def record(self, intent: str, recorder: SpanRecorder):
+        """Fold one finished request into the histograms"""
+        timings = recorder.to_dict()
+        with self._lock:
+            self._observe(intent, "total", timings["total_ms"])
+            for name, entry in timings["spans"].items():
+                self._observe(intent, name, entry["ms"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Histograms as plain dicts for monitoring"""
+        labels = ["inf" if b == float("inf") else b for b in self.BUCKETS_MS]
+        with self._lock:
+            return {
+                "buckets_ms": labels,
+                "intents": {
+                    intent: {
+                        stage: {
+                            "count": hist["count"],
+                            "mean_ms": round(hist["sum_ms"] / hist["count"], 3),
+                            "buckets": list(hist["buckets"])
+                        }
+                        for stage, hist in stages.items()
+                    }
+                    for intent, stages in self._data.items()
+                }
+            }
+
+    def clear(self):
+        """Drop all observations"""
+        with self._lock:
+            self._data.clear()
+
+
+# Singleton instance shared by every AIActionRouter in the process
+timing_histograms = TimingHistograms()
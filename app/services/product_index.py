@@ -0,0 +1,311 @@
+"""
+Product Index - in-memory product name search for the AI Action Router
+
+Holds every product name with a token inverted index and a character
+trigram index, so finding the best match for a product mentioned in a chat
+message doesn't load and score the whole products table. ProductService
+keeps the index in sync on create, update and delete; products written by
+other workers, seed scripts or raw SQL are picked up by a row count and
+highest-ID check before each lookup.
+
+With NumPy installed, the closest names for the fuzzy fallback come from a
+vectorized trigram similarity search (see catalog_matrix.py) instead of
+counting shared trigrams product by product.
+"""
+from collections import Counter
+from difflib import get_close_matches
+from itertools import chain
+from typing import Dict, List, Optional, Set, Tuple
+import bisect
+import threading
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.services.catalog_matrix import NUMPY_AVAILABLE, CatalogMatrix
+
+
+class ProductIndex:
+    """
+    Token and trigram index over product names
+
+    Scoring is the same as AIActionRouter's original linear scan:
+    exact name 100, containing the search term 80 minus the extra length,
+    otherwise 10 per shared word plus 5 when the first words agree; ties go
+    to the lowest product ID. Below 20 points, difflib picks the closest name.
+    """
+
+    # Catalogs up to this many names run the difflib fallback over every name;
+    # larger ones only over the names sharing the most trigrams with the term
+    FUZZY_SCAN_LIMIT = 500
+    FUZZY_CANDIDATES = 16
+
+    def __init__(self):
+        self._names: Dict[int, str] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self._tokens: Dict[str, Set[int]] = {}
+        self._first_tokens: Dict[str, Set[int]] = {}
+        # Trigram -> [(name length, product ID)] kept sorted, shortest names first
+        self._trigrams: Dict[str, List[Tuple[int, int]]] = {}
+        # Every (name length, product ID), for terms too short for trigrams
+        self._by_length: List[Tuple[int, int]] = []
+        self._matrix = CatalogMatrix() if NUMPY_AVAILABLE else None
+        self._max_id: Optional[int] = None
+        self._bind = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _trigrams_of(text: str) -> Set[str]:
+        """Character trigrams of text, with the word edges marked"""
+        padded = f"  {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def _add(self, product_id: int, name: str, keep_sorted: bool = True):
+        """Index one product name (caller holds the lock; load passes keep_sorted=False and sorts once)"""
+        name = name.lower()
+        words = name.split()
+        self._names[product_id] = name
+        if self._max_id is None or product_id > self._max_id:
+            self._max_id = product_id
+        self._by_name.setdefault(name, set()).add(product_id)
+        for token in set(words):
+            self._tokens.setdefault(token, set()).add(product_id)
+        if words:
+            self._first_tokens.setdefault(words[0], set()).add(product_id)
+        entry = (len(name), product_id)
+        for gram in self._trigrams_of(name):
+            if keep_sorted:
+                bisect.insort(self._trigrams.setdefault(gram, []), entry)
+            else:
+                self._trigrams.setdefault(gram, []).append(entry)
+        if keep_sorted:
+            bisect.insort(self._by_length, entry)
+            if self._matrix is not None:
+                self._matrix.add(product_id, name)
+        else:
+            self._by_length.append(entry)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[int]], key: str, product_id: int):
+        """Remove product_id from index[key], dropping empty keys"""
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(product_id)
+            if not ids:
+                del index[key]
+
+    def _remove(self, product_id: int):
+        """Drop one product from the index (caller holds the lock)"""
+        name = self._names.pop(product_id, None)
+        if name is None:
+            return
+        words = name.split()
+        self._discard(self._by_name, name, product_id)
+        for token in set(words):
+            self._discard(self._tokens, token, product_id)
+        if words:
+            self._discard(self._first_tokens, words[0], product_id)
+        entry = (len(name), product_id)
+        for gram in self._trigrams_of(name):
+            postings = self._trigrams[gram]
+            del postings[bisect.bisect_left(postings, entry)]
+            if not postings:
+                del self._trigrams[gram]
+        del self._by_length[bisect.bisect_left(self._by_length, entry)]
+        if self._matrix is not None:
+            self._matrix.remove(product_id)
+        if product_id == self._max_id:
+            self._max_id = max(self._names, default=None)
+
+    def load(self, db: Session):
+        """(Re)build the index from the products table"""
+        with self._lock:
+            self._names.clear()
+            self._by_name.clear()
+            self._tokens.clear()
+            self._first_tokens.clear()
+            self._trigrams.clear()
+            self._by_length.clear()
+            self._max_id = None
+            for product_id, name in db.query(Product.id, Product.name):
+                self._add(product_id, name, keep_sorted=False)
+            for postings in self._trigrams.values():
+                postings.sort()
+            self._by_length.sort()
+            if self._matrix is not None:
+                self._matrix.build(self._names.items())
+            self._bind = db.get_bind()
+
+    def ensure_loaded(self, db: Session):
+        """
+        Build the index on first use, or reload it when it is out of date
+
+        The index is reloaded when db points at another database, or when
+        the products table no longer has the same row count and highest ID,
+        i.e. products were added or deleted outside ProductService in this
+        process. Both come from one aggregate query on the primary key.
+        """
+        if not self._is_current(db) or not self._matches_table(db):
+            self.load(db)
+
+    def _is_current(self, db: Session) -> bool:
+        """Index was built from the same database as db"""
+        return self._bind is not None and self._bind is db.get_bind()
+
+    def _matches_table(self, db: Session) -> bool:
+        """Index holds as many products as the table, up to the same highest ID"""
+        count, max_id = db.query(func.count(Product.id), func.max(Product.id)).one()
+        with self._lock:
+            return count == len(self._names) and max_id == self._max_id
+
+    def add_product(self, db: Session, product: Product):
+        """Index a newly created product"""
+        with self._lock:
+            if self._is_current(db):
+                self._add(product.id, product.name)
+
+    def update_product(self, db: Session, product: Product):
+        """Re-index a product whose name may have changed"""
+        with self._lock:
+            if self._is_current(db):
+                self._remove(product.id)
+                self._add(product.id, product.name)
+
+    def remove_product(self, db: Session, product_id: int):
+        """Drop a deleted product"""
+        with self._lock:
+            if self._is_current(db):
+                self._remove(product_id)
+
+    def clear(self):
+        """Forget everything; the next lookup reloads from the database"""
+        with self._lock:
+            self._names.clear()
+            self._by_name.clear()
+            self._tokens.clear()
+            self._first_tokens.clear()
+            self._trigrams.clear()
+            self._by_length.clear()
+            self._max_id = None
+            if self._matrix is not None:
+                self._matrix.clear()
+            self._bind = None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _best_containing(self, term: str) -> Tuple[int, int]:
+        """
+        Best (score, -product_id) among names containing term
+
+        The shortest containing name scores highest, so the rarest trigram's
+        postings (sorted by name length) are scanned until the first hit.
+        """
+        if len(term) < 3:
+            candidates = self._by_length
+        else:
+            grams = [term[i:i + 3] for i in range(len(term) - 2)]
+            postings = [self._trigrams.get(gram) for gram in grams]
+            if not all(postings):
+                return (0, 0)
+            candidates = min(postings, key=len)
+        for length, pid in candidates:
+            score = 80 - (length - len(term))
+            if score <= 0:
+                break
+            if term in self._names[pid]:
+                return (100 if length == len(term) else score, -pid)
+        return (0, 0)
+
+    def _best_common_words(self, term: str) -> Tuple[int, int]:
+        """Best (score, -product_id) by shared words among names not containing term"""
+        s_words = term.split()
+        counts = Counter(chain.from_iterable(
+            self._tokens.get(word, ()) for word in set(s_words)
+        ))
+        levels: Dict[int, List[int]] = {}
+        for pid, count in counts.items():
+            levels.setdefault(count, []).append(pid)
+        # Bonus if the first word matches (likely brand name)
+        first = self._first_tokens.get(s_words[0], set()) if s_words else set()
+        for count in sorted(levels, reverse=True):
+            ids = sorted(levels[count])
+            for bonus in (5, 0):
+                for pid in ids:
+                    if (pid in first) == bool(bonus) and term not in self._names[pid]:
+                        return (count * 10 + bonus, -pid)
+        return (0, 0)
+
+    def _fuzzy_candidates(self, term: str) -> List[str]:
+        """Names for the difflib fallback"""
+        if len(self._names) <= self.FUZZY_SCAN_LIMIT:
+            return list(self._by_name)
+        # A 0.6 ratio needs the name length within 3/7 to 7/3 of the term's
+        low, high = (len(term) * 3 + 6) // 7, len(term) * 7 // 3
+        if self._matrix is not None:
+            return list(dict.fromkeys(
+                self._names[pid] for pid in self._matrix.top_k(term, self.FUZZY_CANDIDATES, low, high)
+            ))
+        overlap = Counter()
+        for gram in self._trigrams_of(term):
+            postings = self._trigrams.get(gram, ())
+            overlap.update(postings[
+                bisect.bisect_left(postings, (low, 0)):bisect.bisect_right(postings, (high, float("inf")))
+            ])
+        return list(dict.fromkeys(
+            self._names[pid] for (_, pid), _ in overlap.most_common(self.FUZZY_CANDIDATES)
+        ))
+
+    def find_containing(self, search_term: str) -> Optional[int]:
+        """
+        Find the first product, by ID, whose name contains the search term
+
+        Same result as scanning the products in ID order for a substring, but
+        only names holding the term's rarest trigram are checked.
+
+        Args:
+            search_term: Product name as typed by a customer
+
+        Returns:
+            Lowest ID among names containing the term, or None
+        """
+        term = search_term.lower().strip()
+        with self._lock:
+            if len(term) < 3:
+                candidates = self._names
+            else:
+                postings = [self._trigrams.get(term[i:i + 3]) for i in range(len(term) - 2)]
+                if not all(postings):
+                    return None
+                candidates = [pid for _, pid in min(postings, key=len)]
+            return min((pid for pid in candidates if term in self._names[pid]), default=None)
+
+    def find_best_match(self, search_term: str) -> Optional[int]:
+        """
+        Find the best matching product for a search term
+
+        Args:
+            search_term: Product name as mentioned in a message
+
+        Returns:
+            ID of the best matching product, or None
+        """
+        term = search_term.lower().strip()
+        with self._lock:
+            best = self._best_containing(term)
+            # Shared words score at most 10 per word plus 5
+            if best[0] <= len(set(term.split())) * 10 + 5:
+                best = max(best, self._best_common_words(term))
+
+            best_score, best_id = best
+            if best_score < 20:
+                matches = get_close_matches(term, self._fuzzy_candidates(term), n=1, cutoff=0.6)
+                if matches:
+                    return min(self._by_name[matches[0]])
+
+            return -best_id if best_score > 0 else None
+
+
+# Singleton instance shared by every AIActionRouter in the process
+product_index = ProductIndex()
@@ -1,10 +1,16 @@
 """
 Product service - business logic for product operations
 """
+from sqlalchemy import update
 from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.database import commit_or_flush, on_commit
 from app.models.product import Product
 from app.schemas.product import ProductCreate, ProductUpdate
-from typing import List, Optional
+from app.services.low_stock_monitor import low_stock_monitor
+from app.services.product_index import product_index
+from app.services.pagination import paginate
+from typing import Dict, Iterable, List, Optional, Tuple
 
 
 class ProductService:
@@ -20,8 +26,10 @@ class ProductService:
             reorder_threshold=product_data.reorder_threshold
         )
         db.add(product)
-        db.commit()
-        db.refresh(product)
+        commit_or_flush(db, product)
+        on_commit(db, lambda: product_index.add_product(db, product))
+        if product.needs_reorder:
+            low_stock_monitor.notify(db, [product.id])
         return product
     
     @staticmethod
@@ -30,9 +38,27 @@ class ProductService:
         return db.query(Product).filter(Product.id == product_id).first()
     
     @staticmethod
-    def get_all_products(db: Session, skip: int = 0, limit: int = 100) -> List[Product]:
+    def get_all_products(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Product]:
         """Get all products with pagination"""
-        return db.query(Product).offset(skip).limit(limit).all()
+        return ProductService.get_products_page(db, limit, skip, cursor)[0]
+    
+    @staticmethod
+    def get_products_page(
+        db: Session, limit: int = 100, skip: int = 0, cursor: Optional[str] = None
+    ) -> Tuple[List[Product], Optional[str]]:
+        """
+        One page of products in ID order
+        
+        Args:
+            db: Database session
+            limit: Maximum products to return
+            skip: Products to skip (legacy offset paging)
+            cursor: next_cursor of the previous page (keyset paging, ignores skip)
+            
+        Returns:
+            (products, next_cursor), next_cursor None on the last page
+        """
+        return paginate(db.query(Product), (Product.id,), limit, skip, cursor)
     
     @staticmethod
     def update_product(db: Session, product_id: int, update_data: ProductUpdate) -> Optional[Product]:
@@ -48,8 +74,11 @@ class ProductService:
             if update_data.reorder_threshold is not None:
                 product.reorder_threshold = update_data.reorder_threshold
             
-            db.commit()
-            db.refresh(product)
+            commit_or_flush(db, product)
+            if product.needs_reorder:
+                low_stock_monitor.notify(db, [product.id])
+            if update_data.name is not None:
+                on_commit(db, lambda: product_index.update_product(db, product))
         return product
     
     @staticmethod
@@ -58,53 +87,77 @@ class ProductService:
         product = db.query(Product).filter(Product.id == product_id).first()
         if product:
             db.delete(product)
-            db.commit()
+            commit_or_flush(db)
+            on_commit(db, lambda: product_index.remove_product(db, product_id))
             return True
         return False
     
     @staticmethod
     def get_low_stock_products(db: Session) -> List[Product]:
-        """Get products that need reordering"""
+        """
+        Get products that need reordering
+        
+        The filter matches the WHERE clause of the ix_products_low_stock
+        partial index, so only low-stock rows are read.
+        """
         return db.query(Product).filter(
             Product.stock_quantity <= Product.reorder_threshold
-        ).all()
+        ).order_by(Product.id).all()
     
     @staticmethod
-    def decrease_stock(db: Session, product_id: int, quantity: int) -> bool:
-        """Decrease stock quantity (for order processing)"""
-        product = db.query(Product).filter(Product.id == product_id).first()
-        if product and product.stock_quantity >= quantity:
-            product.stock_quantity -= quantity
-            db.commit()
-            
-            # Check for Low Stock
-            if product.stock_quantity <= product.reorder_threshold:
-                ProductService._trigger_low_stock_alert(db, product)
-                
-            return True
-        return False
-
+    def get_products_by_ids(db: Session, product_ids: Iterable[int], refresh: bool = False) -> Dict[int, Product]:
+        """Get several products with one IN query, keyed by ID (refresh: overwrite already loaded ones)"""
+        ids = set(product_ids)
+        if not ids:
+            return {}
+        query = db.query(Product).filter(Product.id.in_(ids))
+        if refresh:
+            query = query.populate_existing()
+        return {product.id: product for product in query}
+    
     @staticmethod
-    def _trigger_low_stock_alert(db: Session, product: Product):
-        """Trigger low stock notification with spam prevention"""
-        from app.services.notification_service import NotificationService
-        from app.models.notification import Notification
-        from datetime import datetime, timedelta
+    def _take_stock(db: Session, product_id: int, quantity: int) -> bool:
+        """
+        Decrement stock with one conditional UPDATE
         
-        # Check spam (1 hour cooldown)
-        # Note: We use the Notification table itself to track last alert
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        recent_alert = db.query(Notification).filter(
-            Notification.type == "LOW_STOCK",
-            Notification.related_id == product.id,
-            Notification.created_at >= one_hour_ago
-        ).first()
+        The WHERE clause checks the stock in the database, so concurrent
+        orders can't both take the last units. A loaded Product is refreshed
+        from the statement (RETURNING where supported).
         
-        if not recent_alert:
-            msg = f"Product: {product.name}\nRemaining Stock: {product.stock_quantity}\nMinimum Required: {product.reorder_threshold}"
-            NotificationService.create_notification(
-                db, 
-                "LOW_STOCK", 
-                msg,
-                product.id
-            )
+        Returns:
+            False if the product is missing or has less than quantity
+        """
+        result = db.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.stock_quantity >= quantity)
+            .values(stock_quantity=Product.stock_quantity - quantity),
+            execution_options={"synchronize_session": "fetch"}
+        )
+        return result.rowcount == 1
+    
+    @staticmethod
+    def reserve_stock(db: Session, quantities: Dict[int, int]):
+        """
+        Take stock for several products, all or nothing
+        
+        Products are decremented in ID order (so concurrent orders lock rows
+        in the same order) inside a savepoint; if any one is short, none of
+        the decrements apply. The caller commits.
+        
+        Args:
+            db: Database session
+            quantities: Product ID -> quantity to take
+            
+        Raises:
+            HTTPException: 400 naming the first product with too little stock
+        """
+        with db.begin_nested():
+            for product_id, quantity in sorted(quantities.items()):
+                if not ProductService._take_stock(db, product_id, quantity):
+                    product = db.query(Product).populate_existing().filter(Product.id == product_id).first()
+                    if not product:
+                        raise HTTPException(status_code=404, detail=f"Product {product_id} not found")
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Insufficient stock for product {product.name}. Available: {product.stock_quantity}"
+                    )
@@ -0,0 +1,143 @@
+"""
+Transliteration - Devanagari to Latin normalization for the AI Agent Engine
+
+INTENT_PATTERNS, NUMBER_WORDS and COMMON_PRODUCTS are romanized Hinglish,
+so a message typed in Devanagari ("लैपटॉप चाहिए २") never hits an exact
+keyword. normalize_text rewrites every Devanagari word to the token the
+engine already knows ("laptop chahiye 2") before intent scoring.
+
+Words in HINDI_WORDS map to their canonical Hinglish/English token (shop
+vocabulary, number words, product names). Any other word, such as a customer
+name, is transliterated letter by letter. Devanagari digits become ASCII
+digits. Results are memoized per word.
+"""
+from functools import lru_cache
+import re
+import unicodedata
+
+
+# Canonical tokens for common shop vocabulary, matching INTENT_PATTERNS,
+# NUMBER_WORDS, COMMON_PRODUCTS and the entity extractors' trigger words
+HINDI_WORDS = {
+    # Orders and requests
+    "ऑर्डर": "order", "आर्डर": "order", "ऑडर": "order", "चाहिए": "chahiye", "चाहिये": "chahiye",
+    "भेजो": "bhejo", "भेज": "bhej", "भेजना": "bhejna", "दे": "de", "देदो": "dedo", "दीजिए": "dijiye",
+    "लेना": "lena", "खरीदना": "buy", "खरीदो": "buy", "करो": "karo", "करना": "karna", "कर": "kar",
+    # Stock and products
+    "स्टॉक": "stock", "स्टोक": "stock", "इन्वेंटरी": "inventory", "उपलब्ध": "available",
+    "कितना": "kitna", "कितने": "kitne", "कितनी": "kitni", "बचा": "bacha", "बचे": "bache",
+    "बाकी": "baki", "बाक़ी": "baki", "प्रोडक्ट": "product", "प्रोडक्ट्स": "products", "उत्पाद": "product",
+    "सामान": "product", "सब": "sab", "सभी": "sabhi", "दिखाओ": "dikhao", "लिस्ट": "list",
+    "नया": "naaya", "नई": "naaya", "नये": "naaya", "डालो": "dalo", "जोड़ो": "add", "ऐड": "add",
+    "कीमत": "price", "दाम": "daam", "रेट": "rate", "प्राइस": "price",
+    # Invoices and customers
+    "बिल": "bill", "इनवॉइस": "invoice", "इनवॉयस": "invoice", "इन्वॉइस": "invoice", "रसीद": "receipt",
+    "बनाओ": "banao", "बनाना": "banao", "ग्राहक": "customer", "कस्टमर": "customer", "नाम": "naam",
+    "फोन": "phone", "फ़ोन": "phone", "नंबर": "number", "रुपये": "rupees", "रुपए": "rupees", "रु": "rs",
+    # Payments
+    "पेमेंट": "payment", "भुगतान": "payment", "याद": "yaad", "दिलाओ": "dilao", "बकाया": "due",
+    "रिमाइंडर": "reminder",
+    # Function words
+    "के": "ke", "की": "ki", "का": "ka", "को": "ko", "लिए": "liye", "लिये": "liye", "है": "hai", "हैं": "hai",
+    "में": "mein", "से": "se", "और": "aur", "पीस": "pieces", "नग": "pieces",
+    # Number words (NUMBER_WORDS keys)
+    "एक": "ek", "दो": "do", "तीन": "teen", "चार": "char", "पांच": "paanch", "पाँच": "paanch",
+    "छह": "chhe", "छः": "chhe", "सात": "saat", "आठ": "aath", "नौ": "nau", "दस": "das",
+    # Products
+    "लैपटॉप": "laptop", "लेपटॉप": "laptop", "माउस": "mouse", "कीबोर्ड": "keyboard", "केबल": "cable",
+    "चार्जर": "charger", "हेडफोन": "headphone", "हेडफ़ोन": "headphone", "मोबाइल": "phone",
+    "टैबलेट": "tablet", "मॉनिटर": "monitor", "प्रिंटर": "printer", "स्पीकर": "speaker",
+    "पैरासिटामोल": "paracetamol", "दवा": "medicine", "दवाई": "medicine",
+}
+
+# Letter-by-letter scheme for words not in HINDI_WORDS
+CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n", "च": "ch", "छ": "chh", "ज": "j", "झ": "jh",
+    "ञ": "n", "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n", "त": "t", "थ": "th", "द": "d",
+    "ध": "dh", "न": "n", "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m", "य": "y", "र": "r",
+    "ल": "l", "व": "v", "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+    "क़": "q", "ख़": "kh", "ग़": "g", "ज़": "z", "ड़": "r", "ढ़": "rh", "फ़": "f", "य़": "y",
+}
+VOWELS = {
+    "अ": "a", "आ": "a", "इ": "i", "ई": "i", "उ": "u", "ऊ": "u", "ऋ": "ri", "ए": "e", "ऐ": "ai",
+    "ओ": "o", "औ": "au", "ऑ": "o", "ऍ": "e",
+}
+VOWEL_SIGNS = {
+    "ा": "a", "ि": "i", "ी": "i", "ु": "u", "ू": "u", "ृ": "ri", "े": "e", "ै": "ai",
+    "ो": "o", "ौ": "au", "ॉ": "o", "ॅ": "e",
+}
+MARKS = {"ं": "n", "ँ": "n", "ः": "h"}
+VIRAMA = "्"
+NUKTA = "़"
+
+# Digits and danda are rewritten in place; letters go through transliterate_word
+_DIGITS_AND_PUNCTUATION = str.maketrans({
+    **{chr(0x0966 + i): str(i) for i in range(10)},
+    "।": ".", "॥": ".",
+})
+_DEVANAGARI_WORD = re.compile(r"[ऀ-ॣॱ-ॿ]+")
+_DEVANAGARI = re.compile(r"[ऀ-ॿ]")
+
+# Lookup tables in decomposed form, so precomposed nukta letters (क़) match too
+_WORDS = {unicodedata.normalize("NFD", word): token for word, token in HINDI_WORDS.items()}
+_CONSONANTS = {unicodedata.normalize("NFD", letter): latin for letter, latin in CONSONANTS.items()}
+
+
+@lru_cache(maxsize=10000)
+def transliterate_word(word: str) -> str:
+    """
+    Latin form of one Devanagari word
+
+    Args:
+        word: Run of Devanagari letters and signs
+
+    Returns:
+        The canonical token from HINDI_WORDS, else a letter-by-letter
+        romanization with the final inherent vowel dropped ("राहुल" -> "rahul")
+    """
+    word = unicodedata.normalize("NFD", word)
+    known = _WORDS.get(word)
+    if known is not None:
+        return known
+
+    # Consonant + nukta is one letter
+    chars = []
+    for char in word:
+        if char == NUKTA and chars:
+            chars[-1] += NUKTA
+        else:
+            chars.append(char)
+
+    out = []
+    for i, char in enumerate(chars):
+        if char in _CONSONANTS:
+            out.append(_CONSONANTS[char])
+            # Inherent vowel unless a vowel sign or virama follows, or the word ends
+            following = chars[i + 1] if i + 1 < len(chars) else None
+            if following is not None and following not in VOWEL_SIGNS and following != VIRAMA:
+                out.append("a")
+        elif char in VOWEL_SIGNS:
+            out.append(VOWEL_SIGNS[char])
+        elif char in VOWELS:
+            out.append(VOWELS[char])
+        elif char in MARKS:
+            out.append(MARKS[char])
+    return "".join(out)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Rewrite Devanagari words and digits in text to their Latin tokens
+
+    Text without Devanagari is returned unchanged.
+
+    Args:
+        text: Lowercased message
+
+    Returns:
+        Text the keyword and entity matchers understand
+    """
+    if not _DEVANAGARI.search(text):
+        return text
+    text = text.translate(_DIGITS_AND_PUNCTUATION)
+    return _DEVANAGARI_WORD.sub(lambda match: transliterate_word(match.group()), text)
@@ -0,0 +1,186 @@
+"""
+NLU Latency Benchmark
+
+Runs the benchmark corpus through each NLU stage and reports throughput and
+p50/p95/p99 latency as JSON:
+
+- detect_intent_cold: every distinct message classified once (empty cache)
+- detect_intent_warm: the same messages again (cache hits)
+- extract_entities: entity extraction for the detected intent
+- process_message: AIActionRouter end to end against a temporary SQLite
+  database seeded at each catalog size (invoice PDFs, AI logs and low-stock
+  checks run in the background and are drained before the database is removed)
+
+Usage:
+    python -m benchmarks.bench_nlu [--messages 3000] [--catalog-sizes 100,1000,10000]
+                                   [--process-messages 300] [--output results.json]
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+import app.models  # noqa: F401 - registers models on Base
+import app.models.notification  # noqa: F401
+from app.config import settings
+from app.database import Base
+from app.models.customer import Customer
+from app.models.product import Product
+from app.services.ai_action_router import AIActionRouter
+from app.services.ai_log_sink import ai_log_sink
+from app.services.ai_agent_engine import AIAgentEngine
+from app.services.customer_index import customer_index
+from app.services.intent_cache import IntentCache
+from app.services.invoice_renderer import invoice_renderer
+from app.services.low_stock_monitor import low_stock_monitor
+from app.services.product_index import product_index
+from benchmarks.nlu_corpus import build_corpus, build_customers, build_products
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Throughput and latency percentiles (milliseconds) for one stage"""
+    values = sorted(latencies)
+    total = sum(values)
+    return {
+        "count": len(values),
+        "total_s": round(total, 4),
+        "throughput_per_s": round(len(values) / total, 1) if total else 0.0,
+        "mean_ms": round(total / len(values) * 1e3, 4) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1e3, 4),
+        "p95_ms": round(percentile(values, 95) * 1e3, 4),
+        "p99_ms": round(percentile(values, 99) * 1e3, 4),
+        "max_ms": round(values[-1] * 1e3, 4) if values else 0.0,
+    }
+
+
+def time_each(items: Iterable, func: Callable) -> List[float]:
+    """Call func on every item and return per-call wall times in seconds"""
+    latencies = []
+    clock = time.perf_counter
+    for item in items:
+        start = clock()
+        func(item)
+        latencies.append(clock() - start)
+    return latencies
+
+
+def seeded_session(catalog_size: int, seed: int, path: Path) -> Session:
+    """SQLite session on a new file with catalog_size products and a tenth as many customers (at least 30)"""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    db.bulk_insert_mappings(Product, build_products(catalog_size, seed))
+    db.bulk_insert_mappings(Customer, build_customers(max(catalog_size // 10, 30), seed))
+    db.commit()
+    return db
+
+
+def bench_engine(messages: List[str]) -> Dict[str, Dict[str, float]]:
+    """Time intent detection (cold and warm cache) and entity extraction"""
+    engine = AIAgentEngine(cache=IntentCache(max_size=len(messages) + 1))
+    unique = list(dict.fromkeys(messages))
+    results = {
+        "detect_intent_cold": summarize(time_each(unique, engine.detect_intent)),
+        "detect_intent_warm": summarize(time_each(messages, engine.detect_intent)),
+    }
+
+    normalized = [(engine.normalize(m), engine.detect_intent(m).name) for m in unique]
+    results["extract_entities"] = summarize(
+        time_each(normalized, lambda item: engine.extract_entities(*item))
+    )
+    return results
+
+
+def bench_process_message(messages: List[str], catalog_size: int, seed: int, workdir: Path) -> Dict[str, float]:
+    """Time AIActionRouter.process_message against a seeded database in workdir"""
+    db = seeded_session(catalog_size, seed, workdir / f"bench_{catalog_size}.db")
+    try:
+        router = AIActionRouter(db)
+
+        def process(message: str):
+            # Each message is measured on its own, not as a follow-up answer
+            router.context_store.delete(router.session_id)
+            router.process_message(message)
+
+        # Warm-up: build the product and customer indexes outside the timings
+        product_index.ensure_loaded(db)
+        customer_index.ensure_loaded(db)
+        process(messages[0])
+        return summarize(time_each(messages, process))
+    finally:
+        invoice_renderer.wait_all()
+        ai_log_sink.flush()
+        low_stock_monitor.flush()
+        db.close()
+        db.get_bind().dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--messages", type=int, default=3000, help="corpus size")
+    parser.add_argument("--catalog-sizes", default="100,1000,10000",
+                        help="comma-separated product counts for process_message")
+    parser.add_argument("--process-messages", type=int, default=300,
+                        help="messages sent through process_message per catalog size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.messages, seed=args.seed)
+    messages = [entry["message"] for entry in corpus]
+    catalog_sizes = [int(size) for size in args.catalog_sizes.split(",") if size]
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "messages": len(messages),
+            "distinct_messages": len(set(messages)),
+            "misspelled": sum(entry["misspelled"] for entry in corpus),
+            "languages": {
+                language: sum(entry["language"] == language for entry in corpus)
+                for language in sorted({entry["language"] for entry in corpus})
+            },
+            "seed": args.seed,
+        },
+        "stages": bench_engine(messages),
+        "process_message": {},
+    }
+
+    # Orders generate invoice PDFs; keep them and the databases out of the project
+    invoice_dir = settings.INVOICE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.INVOICE_DIR = Path(tmp)
+        try:
+            for size in catalog_sizes:
+                report["process_message"][str(size)] = bench_process_message(
+                    messages[:args.process_messages], size, args.seed, Path(tmp)
+                )
+        finally:
+            settings.INVOICE_DIR = invoice_dir
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
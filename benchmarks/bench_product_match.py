@@ -0,0 +1,143 @@
+"""
+Product Matching Benchmark
+
+Times product-name lookups at several catalog sizes and reports p50/p95/p99
+latency as JSON:
+
+- linear_scan: the original per-product scoring loop of
+  AIActionRouter._find_best_match with difflib over every name (skipped
+  above --linear-max products, where a single miss takes seconds)
+- index_postings: ProductIndex with its trigram postings only (no NumPy)
+- index_matrix: ProductIndex with the vectorized trigram matrix
+- build_s / add_ms: full index build, and incremental adds after it
+
+Queries are product mentions from the catalog's brands and items, a third
+of them misspelled, plus a few names that match nothing.
+
+Usage:
+    python -m benchmarks.bench_product_match [--catalog-sizes 1000,10000,100000]
+                                             [--queries 300] [--output results.json]
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from difflib import get_close_matches
+from pathlib import Path
+from typing import List, Optional
+
+from app.models.product import Product
+from app.services.product_index import ProductIndex
+from benchmarks.bench_nlu import seeded_session, summarize, time_each
+from benchmarks.nlu_corpus import BRANDS, ITEMS
+
+
+def build_queries(count: int, seed: int) -> List[str]:
+    """Product mentions: item, brand + item, misspelled, and unknown names"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        term = rng.choice([rng.choice(ITEMS), f"{rng.choice(BRANDS)} {rng.choice(ITEMS)}"]).lower()
+        roll = rng.random()
+        if roll < 0.33 and len(term) > 4:
+            i = rng.randrange(1, len(term) - 1)
+            term = term[:i] + term[i + 1:]
+        elif roll < 0.4:
+            term = rng.choice(["tractor", "sofa set", "gold ring", "cricket bat"])
+        queries.append(term)
+    return queries
+
+
+def linear_scan(search_term: str, names: List[str]) -> Optional[int]:
+    """Original scoring loop (index into names of the best match)"""
+    search_term = search_term.lower().strip()
+    best, best_score = None, 0
+    for i, p_name in enumerate(names):
+        score = 0
+        if p_name == search_term:
+            score = 100
+        elif search_term in p_name:
+            score = 80 - (len(p_name) - len(search_term))
+        else:
+            common_words = set(p_name.split()) & set(search_term.split())
+            if common_words:
+                score = len(common_words) * 10
+                if p_name.split()[0] == search_term.split()[0]:
+                    score += 5
+        if score > best_score:
+            best_score, best = score, i
+    if best_score < 20:
+        matches = get_close_matches(search_term, names, n=1, cutoff=0.6)
+        if matches:
+            return names.index(matches[0])
+    return best
+
+
+def bench_catalog(size: int, queries: List[str], seed: int, workdir: Path, linear_max: int) -> dict:
+    """Time every matcher against one seeded catalog"""
+    db = seeded_session(size, seed, workdir / f"products_{size}.db")
+    try:
+        results = {}
+        names = [name.lower() for (name,) in db.query(Product.name).order_by(Product.id)]
+        if size <= linear_max:
+            results["linear_scan"] = summarize(time_each(queries, lambda q: linear_scan(q, names)))
+
+        for mode in ("index_postings", "index_matrix"):
+            index = ProductIndex()
+            if mode == "index_postings":
+                index._matrix = None
+            elif index._matrix is None:
+                continue
+            start = time.perf_counter()
+            index.load(db)
+            build = time.perf_counter() - start
+            results[mode] = summarize(time_each(queries, index.find_best_match))
+            results[mode]["build_s"] = round(build, 3)
+
+            added = [Product(id=10_000_000 + i, name=f"New Arrival {i}") for i in range(200)]
+            adds = time_each(added, lambda product: index.add_product(db, product))
+            results[mode]["add_ms"] = round(sum(adds) / len(adds) * 1e3, 4)
+        return results
+    finally:
+        db.close()
+        db.get_bind().dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--catalog-sizes", default="1000,10000,100000",
+                        help="comma-separated product counts")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--linear-max", type=int, default=10000,
+                        help="largest catalog the linear scan is timed on")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    queries = build_queries(args.queries, args.seed)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "queries": len(queries),
+            "seed": args.seed,
+        },
+        "catalogs": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(size) for size in args.catalog_sizes.split(",") if size]:
+            report["catalogs"][str(size)] = bench_catalog(size, queries, args.seed, Path(tmp), args.linear_max)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
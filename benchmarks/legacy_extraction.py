@@ -0,0 +1,231 @@
+"""
+Legacy Entity Extraction - reference copy of the regex-per-call extractors
+
+Frozen copy of AIAgentEngine entity extraction as it was before the
+compiled pattern registry. Benchmarks use it as the "before" baseline and
+tests use it to check results are unchanged.
+"""
+from typing import Dict, Optional, Any
+import re
+
+from app.services.ai_agent_engine import AIAgentEngine
+
+
+class LegacyExtractor:
+    """Regex-per-call entity extraction (one pass over the text per pattern)"""
+
+    INTENT_PATTERNS = AIAgentEngine.INTENT_PATTERNS
+    NUMBER_WORDS = AIAgentEngine.NUMBER_WORDS
+
+    def extract_entities(self, text: str, intent: str) -> Dict[str, Any]:
+        """
+        Extract entities from text based on intent
+        
+        Args:
+            text: Normalized text
+            intent: Detected intent
+            
+        Returns:
+            Dictionary of extracted entities
+        """
+        entities = {}
+        
+        # Extract customer name
+        customer_name = self._extract_customer_name(text)
+        if customer_name:
+            entities["customer_name"] = customer_name
+        
+        # Extract product name
+        product_name = self._extract_product_name(text)
+        if product_name:
+            entities["product_name"] = product_name
+        
+        # Extract quantity
+        quantity = self._extract_quantity(text)
+        if quantity:
+            entities["quantity"] = quantity
+        
+        # Extract price
+        price = self._extract_price(text)
+        if price:
+            entities["price"] = price
+        
+        # Extract phone number
+        phone = self._extract_phone(text)
+        if phone:
+            entities["phone"] = phone
+        
+        # Extract order ID
+        order_id = self._extract_order_id(text)
+        if order_id:
+            entities["order_id"] = order_id
+        
+        return entities
+    
+    def _extract_customer_name(self, text: str) -> Optional[str]:
+        """Extract customer name from text"""
+        # Patterns: "for <name>", "customer <name>", "naam <name>"
+        patterns = [
+            r"for\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)",
+            r"to\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)",
+            r"customer\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)",
+            r"naam\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)",
+            r"name\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)"
+        ]
+        
+        for pattern in patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                return match.group(1).title()
+        
+        return None
+
+    def _extract_product_name(self, text: str) -> Optional[str]:
+        """Extract product name from text with fuzzy matching"""
+        text_lower = text.lower()
+
+        # 1. Specialized extraction for "Add Product" intent
+        # Look for pattern: "product <name> price" or "product <name> stock"
+        # This allows multi-word names like "Logitech Keyboard"
+        add_patterns = [
+            r'product\s+(.*?)\s+(?:price|stock|cost|rate)',
+            r'add\s+(?:new\s+)?(.*?)\s+(?:price|stock|cost|rate)',
+            r'create\s+(?:new\s+)?(.*?)\s+(?:price|stock|cost|rate)',
+        ]
+        
+        for pattern in add_patterns:
+            match = re.search(pattern, text_lower)
+            if match:
+                candidate = match.group(1).strip()
+                # Filter out obvious non-names
+                if len(candidate) > 2 and not re.search(r'\d', candidate):
+                    return candidate.title()
+
+        # 2. Check for hyphenated part numbers or product codes (e.g., USB-HUB, LAP-001)
+        part_pattern = r'\b([A-Za-z]+-[A-Za-z0-9]+)\b'
+        match = re.search(part_pattern, text)
+        if match:
+            return match.group(1)
+
+        # 3. Smart Fallback: Strip intent keywords, numbers, and price/stock patterns
+        # This handles generic "Send 5 X" where X is unknown
+        cleaned_text = text_lower
+        
+        # Remove specific "price 2000" or "stock 25" patterns first to avoid stripping numbers later incorrectly
+        cleaned_text = re.sub(r'\b(price|stock|cost|rate|qty|quantity)\s*[:]?\s*\d+(?:\.\d+)?', '', cleaned_text)
+        
+        # Remove intent keywords
+        for keywords in self.INTENT_PATTERNS.values():
+            for k in keywords:
+                # Use word boundary to avoid partial replacements
+                cleaned_text = re.sub(r'\b' + re.escape(k) + r'\b', '', cleaned_text)
+                
+        # Remove remaining numbers and quantity units
+        cleaned_text = re.sub(r'\b\d+\b', '', cleaned_text)
+        cleaned_text = re.sub(r'\b(pieces|piece|units|unit|qty|quantity|nos|karo)\b', '', cleaned_text)
+        
+        # Remove stopwords
+        cleaned_text = re.sub(r'\b(for|to|of|in|at|with)\b', '', cleaned_text)
+        
+        # Remove extra whitespace and special chars
+        cleaned_text = re.sub(r'[^\w\s-]', '', cleaned_text)
+        cleaned_text = " ".join(cleaned_text.split())
+        
+        if cleaned_text and len(cleaned_text) > 2:
+            return cleaned_text.title()
+
+        return None
+    
+    def _extract_quantity(self, text: str) -> Optional[int]:
+        """Extract quantity from text"""
+        
+        # 1. Look for explicit stock/quantity keywords (high priority)
+        # e.g. "stock 25", "qty 10", "10 units"
+        explicit_patterns = [
+            r'(?:stock|qty|quantity|units|pieces|pcs|count)\s*[:]?\s*(\d+)',
+            r'(\d+)\s*(?:pieces|units|pcs|qty|quantity|stock)',
+        ]
+        
+        for p in explicit_patterns:
+            match = re.search(p, text, re.IGNORECASE)
+            if match:
+                return int(match.group(1))
+        
+        # 2. Fallback: Look for generic number, but careful to avoid price
+        # Find all numbers
+        all_numbers = re.finditer(r'\b(\d+)\b', text)
+        
+        for m in all_numbers:
+            num = m.group(1)
+            start_idx = m.start()
+            
+            # Context check: Is this number preceded by "price", "rs", "cost"?
+            # Look at preceding 15 chars
+            preceding = text[max(0, start_idx-15):start_idx].lower()
+            if any(x in preceding for x in ['price', 'rs', 'cost', 'rate', '₹']):
+                continue # Skip this number, it's a price
+                
+            # If we are here, it's likely a quantity (or ID, phone)
+            # Typically quantity is small (< 1000) for retail, price is large
+            # But "stock 2000" is possible.
+            # If user just said "Send 2000", assumption is quantity.
+            return int(num)
+
+        # 3. Look for number words
+        for word, num in self.NUMBER_WORDS.items():
+            if word in text.lower():
+                return num
+        
+        return None
+    
+    def _extract_price(self, text: str) -> Optional[float]:
+        """Extract price from text"""
+        # Patterns: "price 2000", "Rs 100", "₹100", "100 rupees", "100 rs"
+        patterns = [
+            r'price[:\s]+(\d+(?:\.\d{2})?)',  # "price 2000" or "price: 2000"
+            r'(?:rs\.?|₹)\s*(\d+(?:\.\d{2})?)',  # "Rs 100" or "₹100"
+            r'(\d+(?:\.\d{2})?)\s*(?:rupees|rs|inr)',  # "100 rupees"
+        ]
+        
+        for pattern in patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                return float(match.group(1))
+        
+        return None
+    
+    def _extract_phone(self, text: str) -> Optional[str]:
+        """Extract phone number from text"""
+        # Indian phone patterns
+        patterns = [
+            r'\+91[\s-]?\d{10}',
+            r'\d{10}',
+            r'\d{5}[\s-]\d{5}'
+        ]
+        
+        for pattern in patterns:
+            match = re.search(pattern, text)
+            if match:
+                phone = match.group(0)
+                # Clean up
+                phone = re.sub(r'[\s-]', '', phone)
+                if not phone.startswith('+'):
+                    phone = '+91' + phone if len(phone) == 10 else '+' + phone
+                return phone
+        
+        return None
+    
+    def _extract_order_id(self, text: str) -> Optional[int]:
+        """Extract order ID from text"""
+        # Patterns: "order #123", "order 123", "order id 123"
+        patterns = [
+            r'order\s*#?\s*(\d+)',
+            r'order\s+id\s+(\d+)'
+        ]
+        
+        for pattern in patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                return int(match.group(1))
+        
+        return None
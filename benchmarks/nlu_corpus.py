@@ -0,0 +1,156 @@
+"""
+NLU Benchmark Corpus - deterministic chat messages and catalogs
+
+Builds a few thousand realistic English, Hindi (Devanagari and romanized)
+and Hinglish shop messages, a share of them with typos, plus product and
+customer catalogs of any size for seeding a benchmark database.
+"""
+import random
+from typing import Dict, List
+
+
+CUSTOMER_NAMES = [
+    "Rahul", "Priya", "Amit", "Sunil", "Pooja", "Mohammad", "Shreya", "Aditya",
+    "Vikas", "Kiran", "Anil", "Sanjay", "Deepak", "Neha", "Rohit", "Anjali",
+    "Arjun", "Kavita", "Manoj", "Ravi", "Suresh", "Lakshmi", "Farhan", "Imran",
+    "Harpreet", "Meena", "Divya", "Gopal", "Nisha", "Tarun",
+]
+SURNAMES = ["Sharma", "Verma", "Gupta", "Patel", "Singh", "Kumar", "Reddy", "Iyer", "Khan", "Nair"]
+
+BRANDS = ["Logitech", "HP", "Dell", "Sony", "Boat", "Samsung", "Lenovo", "JBL", "Mi", "Zebronics"]
+ITEMS = [
+    "laptop", "mouse", "keyboard", "monitor", "cable", "headphones", "charger",
+    "speaker", "webcam", "pen drive", "router", "printer", "tablet", "earphones",
+]
+
+HINDI_ITEMS = {
+    "laptop": "लैपटॉप", "mouse": "माउस", "keyboard": "कीबोर्ड", "monitor": "मॉनिटर",
+    "cable": "केबल", "headphones": "हेडफोन", "charger": "चार्जर", "speaker": "स्पीकर",
+}
+HINDI_NUMBERS = {1: "एक", 2: "दो", 3: "तीन", 4: "चार", 5: "पांच"}
+
+# (intent, language, template)
+TEMPLATES = [
+    ("create_order", "english", "Order {qty} {item} for {name}"),
+    ("create_order", "english", "I need {qty} {item}s for {name}"),
+    ("create_order", "english", "Place order: {qty} {item} for {name} phone {phone}"),
+    ("create_order", "english", "Send {qty} {item} to {name}"),
+    ("create_order", "hinglish", "{item} chahiye {qty} pieces for {name}"),
+    ("create_order", "hinglish", "{name} ke liye {qty} {item} chahiye"),
+    ("create_order", "hinglish", "{qty} {item} order karo {name} ke liye"),
+    ("create_order", "hinglish", "{name} ko {qty} {item} bhejo"),
+    ("create_order", "hindi", "{name} के लिए {hindi_qty} {hindi_item} चाहिए"),
+    ("create_order", "hindi", "{hindi_qty} {hindi_item} ऑर्डर करो {name} के लिए"),
+    ("check_inventory", "english", "Check stock of {item}"),
+    ("check_inventory", "english", "How many {item}s available?"),
+    ("check_inventory", "hinglish", "Kitne {item} available hai?"),
+    ("check_inventory", "hinglish", "{item} ka stock check karo"),
+    ("check_inventory", "hindi", "{hindi_item} कितने हैं स्टॉक में?"),
+    ("list_products", "english", "Show all products"),
+    ("list_products", "hinglish", "Sab products dikhao"),
+    ("generate_invoice", "english", "Generate invoice for order {order}"),
+    ("generate_invoice", "english", "Create bill for order #{order}"),
+    ("generate_invoice", "hinglish", "Invoice chahiye order {order} ka"),
+    ("generate_invoice", "hindi", "ऑर्डर {order} का बिल बनाओ"),
+    ("add_customer", "english", "Add customer {name} phone {phone}"),
+    ("add_customer", "hinglish", "Customer add karo: {name}, {phone}"),
+    ("add_product", "english", "Add product {brand} {item} price {price} stock {qty}"),
+    ("add_product", "hinglish", "Naaya product {brand} {item} price {price} stock {qty}"),
+    ("payment_reminder_suggestion", "english", "Send payment reminder to {name}"),
+    ("payment_reminder_suggestion", "hinglish", "Payment reminder bhejo {name} ko"),
+    ("unknown", "english", "What is the weather today?"),
+    ("unknown", "hinglish", "Aaj ka mausam kaisa hai?"),
+]
+
+
+def misspell(text: str, rng: random.Random) -> str:
+    """Introduce one typo (drop, swap, double or replace) in a random ASCII word"""
+    words = text.split(" ")
+    choices = [i for i, w in enumerate(words) if len(w) > 3 and w.isascii() and w.isalpha()]
+    if not choices:
+        return text
+    i = rng.choice(choices)
+    word = list(words[i])
+    pos = rng.randrange(1, len(word) - 1)
+    op = rng.randrange(4)
+    if op == 0:
+        del word[pos]
+    elif op == 1:
+        word[pos], word[pos + 1] = word[pos + 1], word[pos]
+    elif op == 2:
+        word.insert(pos, word[pos])
+    else:
+        word[pos] = rng.choice("aeiouhnrst")
+    words[i] = "".join(word)
+    return " ".join(words)
+
+
+def build_corpus(size: int = 3000, typo_rate: float = 0.2, seed: int = 42) -> List[Dict[str, str]]:
+    """
+    Build a deterministic message corpus
+
+    Args:
+        size: Number of messages
+        typo_rate: Share of messages with one misspelled word
+        seed: Random seed
+
+    Returns:
+        List of {"message", "intent", "language", "misspelled"} dicts
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        intent, language, template = rng.choice(TEMPLATES)
+        item = rng.choice(list(HINDI_ITEMS) if language == "hindi" else ITEMS)
+        qty = rng.randint(1, 5)
+        message = template.format(
+            qty=qty,
+            item=item,
+            hindi_item=HINDI_ITEMS.get(item, item),
+            hindi_qty=HINDI_NUMBERS.get(qty, str(qty)),
+            name=rng.choice(CUSTOMER_NAMES),
+            brand=rng.choice(BRANDS),
+            phone=f"9{rng.randrange(10 ** 9):09d}",
+            order=rng.randint(1, 500),
+            price=rng.choice([499, 999, 1200, 2500, 45000]),
+        )
+        misspelled = rng.random() < typo_rate
+        if misspelled:
+            message = misspell(message, rng)
+        corpus.append({
+            "message": message,
+            "intent": intent,
+            "language": language,
+            "misspelled": misspelled,
+        })
+    return corpus
+
+
+def build_products(count: int, seed: int = 42) -> List[Dict[str, object]]:
+    """Product rows ({"name", "price", "stock_quantity"}) with brand and item names"""
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        name = f"{rng.choice(BRANDS)} {rng.choice(ITEMS).title()}"
+        if i >= len(BRANDS) * len(ITEMS):
+            name = f"{name} {i}"
+        products.append({
+            "name": name,
+            "price": float(rng.choice([299, 499, 999, 1500, 2500, 45000])),
+            "stock_quantity": rng.randint(0, 200),
+        })
+    # Plain item names first so short mentions ("mouse") have an obvious match
+    for i, item in enumerate(ITEMS[:count]):
+        products[i]["name"] = item.title()
+    return products
+
+
+def build_customers(count: int, seed: int = 42) -> List[Dict[str, str]]:
+    """Customer rows ({"name", "phone"}) with unique phone numbers"""
+    rng = random.Random(seed)
+    customers = []
+    for i in range(count):
+        name = CUSTOMER_NAMES[i] if i < len(CUSTOMER_NAMES) \
+            else f"{rng.choice(CUSTOMER_NAMES)} {rng.choice(SURNAMES)}"
+        customers.append({"name": name, "phone": f"8{i:09d}"})
+    return customers
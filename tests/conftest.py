@@ -0,0 +1,42 @@
+"""
+Shared test fixtures
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 - registers models on Base
+import app.models.notification  # noqa: F401
+from app.database import Base
+from app.services.ai_log_sink import ai_log_sink
+from app.services.low_stock_monitor import low_stock_monitor
+
+
+@pytest.fixture(autouse=True)
+def sync_ai_log(monkeypatch):
+    """Write AI logs inline so tests can read them back right away"""
+    monkeypatch.setattr(ai_log_sink, "background", False)
+
+
+@pytest.fixture(autouse=True)
+def inline_low_stock_checks(monkeypatch):
+    """Check low stock on commit so tests can read alerts back right away"""
+    monkeypatch.setattr(low_stock_monitor, "background", False)
+
+
+@pytest.fixture
+def db():
+    """Session on a fresh in-memory SQLite database"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
@@ -0,0 +1,202 @@
+"""
+Test AI Agent Engine - intent scoring and entity extraction
+"""
+from difflib import get_close_matches
+import time
+
+from app.services.ai_agent_engine import AIAgentEngine
+from app.services.fuzzy_index import FuzzyIndex
+from app.services.intent_cache import IntentCache
+from app.services.keyword_automaton import KeywordAutomaton
+from app.services.transliteration import normalize_text
+from benchmarks.legacy_extraction import LegacyExtractor
+from tests.test_data_fixtures import CHAT_TEST_MESSAGES, ORDER_SCENARIOS, ERROR_SCENARIOS
+
+
+TEST_MESSAGES = [m for messages in CHAT_TEST_MESSAGES.values() for m in messages] + [
+    s["message"] for s in ORDER_SCENARIOS + ERROR_SCENARIOS
+] + [
+    "Laptop chahiye 2 pieces for Rahul",
+    "Check stock of mouse",
+    "Generate bill for order 123",
+    "Add new customer Priya phone 9876543210",
+    "Payment reminder for Amit",
+    "Order karo 5 cables Rs 500",
+    "Kitne laptop available hai?",
+    "Invoice dedo order #5 ka",
+    "Check stock of lapto",
+    "add product Logitech Keyboard price 1200 stock 30",
+    "teen mouse bhej do for Kiran",
+]
+
+
+def _reference_scores(text_lower):
+    """Keyword-by-keyword scoring the automaton must reproduce"""
+    scores = {}
+    for intent_name, keywords in AIAgentEngine.INTENT_PATTERNS.items():
+        score = 0
+        for keyword in keywords:
+            if keyword in text_lower:
+                score += 5 if len(keyword.split()) > 1 else 2
+            elif get_close_matches(keyword, text_lower.split(), n=1, cutoff=0.8):
+                score += 1
+        scores[intent_name] = score
+    if any(k in text_lower for k in AIAgentEngine.ADD_PRODUCT_VERBS) and \
+       any(k in text_lower for k in AIAgentEngine.ADD_PRODUCT_ATTRIBUTES) and \
+       not any(k in text_lower for k in AIAgentEngine.ADD_PRODUCT_EXCLUSIONS):
+        scores["add_product"] += 10
+    return scores
+
+
+def test_keyword_automaton_substring_matches():
+    """Test automaton reports overlapping and embedded keywords"""
+    automaton = KeywordAutomaton(["order", "place order", "der", "ship"])
+    assert automaton.search("please place order") == {"order", "place order", "der"}
+    assert automaton.search("relationship") == {"ship"}
+    assert automaton.search("nothing here") == set()
+
+
+def test_fuzzy_index_typos_match_difflib():
+    """Test fuzzy index finds common typos and agrees with difflib on near misses"""
+    keywords = list(dict.fromkeys(k for ks in AIAgentEngine.INTENT_PATTERNS.values() for k in ks))
+    index = FuzzyIndex(keywords)
+    assert "order" in index.lookup("oder")
+    assert "invoice" in index.lookup("invocie")
+    assert "stock" in index.lookup("stok")
+    assert "all products" in index.lookup("products")
+    for token in ["oder", "invocie", "stok", "paymnet", "remindr", "cutomer", "laptop", "products", "availble"]:
+        expected = {k for k in keywords if get_close_matches(k, [token], n=1, cutoff=0.8)}
+        assert index.lookup(token) == expected, token
+
+
+def test_fuzzy_index_keeps_every_difflib_match():
+    """Test long and joined tokens match exactly what the old difflib scan accepted"""
+    keywords = list(dict.fromkeys(k for ks in AIAgentEngine.INTENT_PATTERNS.values() for k in ks))
+    index = FuzzyIndex(keywords)
+    assert "products" in index.lookup("productlist")
+    tokens = {"productlist", "listofproducts", "paymentreminder", "createinvoice", "checkstock"}
+    for keyword in keywords:
+        joined = keyword.replace(" ", "")
+        tokens.update({joined, joined[1:], joined[:-1], joined + "s", joined[::2] + joined[1::2]})
+        for i in range(0, len(joined), 3):
+            tokens.add(joined[:i] + joined[i + 1:])
+            tokens.add(joined[:i] + "x" + joined[i:])
+    for token in sorted(tokens):
+        expected = {k for k in keywords if get_close_matches(k, [token], n=1, cutoff=0.8)}
+        assert index.lookup(token) == expected, token
+
+
+def test_intent_scores_match_reference():
+    """Test single-pass scoring gives the same scores as per-keyword scoring"""
+    engine = AIAgentEngine()
+    for message in TEST_MESSAGES:
+        text_lower = message.lower().strip()
+        assert engine._score_intents(text_lower) == _reference_scores(text_lower), message
+
+
+def test_detect_intent_examples():
+    """Test intent detection on common English and Hinglish messages"""
+    engine = AIAgentEngine()
+    assert engine.detect_intent("Laptop chahiye 2 pieces for Rahul").name == "create_order"
+    assert engine.detect_intent("Check stock of mouse").name == "check_inventory"
+    assert engine.detect_intent("Invoice chahiye order 3 ka").name == "generate_invoice"
+    assert engine.detect_intent("What is the weather today?").name == "unknown"
+
+
+def test_extract_entities_matches_regex_extractors():
+    """Test precompiled extractors return what the original regex extractors did"""
+    engine = AIAgentEngine()
+    legacy = LegacyExtractor()
+    edge_cases = ["quantity99.50rate99.50", "qty:inr cost43210price5", "product add product banao chahiye 1"]
+    for message in TEST_MESSAGES + edge_cases:
+        text = message.lower().strip()
+        for intent in ("unknown", "add_product", "add_customer", "check_stock"):
+            assert engine.extract_entities(text, intent) == legacy.extract_entities(text, intent), message
+    assert engine.extract_entities("quantity99.50rate99.50", "unknown")["product_name"] == "Rate99"
+    assert engine.extract_entities("qty:inr cost43210price5", "unknown")["product_name"] == "Inr Price5"
+    assert engine.extract_entities("product add product banao chahiye 1", "unknown")["product_name"] == "Product Banao"
+
+
+def test_intent_cache_lru_eviction_and_counters():
+    """Test cache evicts least recently used entries and counts hits/misses"""
+    cache = IntentCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+
+
+def test_intent_cache_ttl_expiry():
+    """Test entries older than the TTL are treated as misses"""
+    cache = IntentCache(max_size=10, ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_intent_cache_shared_across_engines():
+    """Test a second engine reuses the first engine's result without aliasing it"""
+    cache = IntentCache(max_size=10)
+    first = AIAgentEngine(cache=cache).detect_intent("Check stock of mouse")
+    first.entities["product_name"] = "changed"
+    second = AIAgentEngine(cache=cache).detect_intent("  check STOCK of mouse ")
+    assert cache.stats()["hits"] == 1
+    assert second.entities["product_name"] != "changed"
+
+
+def test_detect_intents_matches_single_path():
+    """Test batch detection returns per-message results in input order"""
+    engine = AIAgentEngine(cache=IntentCache())
+    messages = TEST_MESSAGES + TEST_MESSAGES[:5]
+    batch = engine.detect_intents(messages)
+    single = AIAgentEngine(cache=IntentCache())
+    assert batch == [single.detect_intent(m) for m in messages]
+    batch[0].entities["changed"] = True
+    assert "changed" not in engine.detect_intents(messages[:1])[0].entities
+
+
+def test_pipeline_spans_only_when_recording():
+    """Test spans are no-ops without a recorder and summed per name with one"""
+    from app.services.pipeline_timing import TimingHistograms, span, start_recording, stop_recording
+    
+    with span("ignored"):
+        pass
+    recorder, token = start_recording()
+    try:
+        AIAgentEngine(cache=IntentCache()).detect_intent("Check stock of mouse")
+        with span("extra"):
+            pass
+        with span("extra"):
+            pass
+    finally:
+        stop_recording(token)
+    
+    timings = recorder.to_dict()
+    assert "ignored" not in timings["spans"]
+    assert timings["spans"]["extra"]["calls"] == 2
+    assert {"detect_intent.keyword_scoring", "detect_intent.entity_extraction"} <= set(timings["spans"])
+    
+    histograms = TimingHistograms()
+    histograms.record("check_inventory", recorder)
+    stages = histograms.snapshot()["intents"]["check_inventory"]
+    assert stages["total"]["count"] == 1 and sum(stages["extra"]["buckets"]) == 1
+
+
+def test_devanagari_is_normalized_before_matching():
+    """Test Hindi-script words and numerals map onto the romanized keywords"""
+    assert normalize_text("लैपटॉप चाहिए २") == "laptop chahiye 2"
+    assert normalize_text("ऑर्डर १२३ का बिल बनाओ।") == "order 123 ka bill banao."
+    assert normalize_text("प्रिया ज़ोया") == "priya zoya"  # letter by letter, nukta kept
+    assert normalize_text("order 2 laptops") == "order 2 laptops"
+
+    engine = AIAgentEngine(cache=IntentCache())
+    intent = engine.detect_intent("दो माउस भेजो")
+    assert intent.name == "create_order"
+    assert intent.entities["quantity"] == 2
+    assert engine.detect_intent("माउस कितने हैं स्टॉक में?").name == "check_inventory"
+    assert engine.intent_cache.get("do mouse bhejo") is not None  # shares the romanized cache entry
@@ -0,0 +1,42 @@
+"""
+Test AI Log Sink - buffered batch writes of AIActionLog rows
+"""
+from sqlalchemy import event
+
+from app.models.ai_action import AIActionLog
+from app.services.ai_log_sink import AILogSink
+
+
+def test_rows_are_bulk_inserted_in_batches(db):
+    """Test queued rows land in one transaction per batch"""
+    engine = db.get_bind()
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+
+    sink = AILogSink(flush_interval_ms=10000, batch_size=2)
+    for i in range(5):
+        assert sink.emit(engine, "AI_TEST", f"message {i}", "ok")
+    assert sink.flush(timeout=5)
+
+    assert len(commits) == 3
+    assert [row.input_text for row in db.query(AIActionLog).order_by(AIActionLog.id)] == \
+        [f"message {i}" for i in range(5)]
+    assert sink.stats()["written"] == 5
+    sink.shutdown()
+
+
+def test_shutdown_flushes_pending_rows(db):
+    """Test rows still waiting for the interval are written on shutdown"""
+    sink = AILogSink(flush_interval_ms=60000, batch_size=100)
+    sink.emit(db.get_bind(), "AI_TEST", "late", None)
+    sink.shutdown(timeout=5)
+    assert db.query(AIActionLog).count() == 1
+
+
+def test_full_queue_drops_rows(db, monkeypatch):
+    """Test the drop policy rejects rows beyond the queue bound"""
+    sink = AILogSink(max_queue=2, overflow="drop")
+    monkeypatch.setattr(sink, "_ensure_started", lambda: None)  # no writer draining the queue
+    results = [sink.emit(db.get_bind(), "AI_TEST") for _ in range(3)]
+    assert results == [True, True, False]
+    assert sink.stats()["dropped"] == 1
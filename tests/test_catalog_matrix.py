@@ -0,0 +1,38 @@
+"""
+Test Catalog Matrix - vectorized trigram similarity over product names
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.services.catalog_matrix import CatalogMatrix
+
+
+def test_top_k_ranks_by_similarity():
+    """Test the closest names come first and the length window filters"""
+    matrix = CatalogMatrix()
+    matrix.build([(1, "logitech mouse"), (2, "logitech keyboard"), (3, "dell monitor"), (4, "mouse pad")])
+    assert matrix.top_k("logitec mouse", k=2) == [1, 2]
+    assert matrix.top_k("logitec mouse", k=5, max_length=10) == [4]
+    assert matrix.top_k("tractor", k=3) == [3]  # shares "tor" with monitor
+    assert matrix.top_k("xyz", k=3) == []
+
+
+def test_incremental_writes_match_a_rebuild(monkeypatch):
+    """Test adds, renames and removes score like a matrix built from scratch"""
+    monkeypatch.setattr(CatalogMatrix, "MIN_PENDING", 3)
+    names = {i: f"product {i} {'cable' if i % 2 else 'charger'}" for i in range(1, 11)}
+    matrix = CatalogMatrix()
+    matrix.build((i, names[i]) for i in range(1, 6))
+    for i in range(6, 11):  # crosses the compaction threshold
+        matrix.add(i, names[i])
+    matrix.add(3, "usb cable")
+    matrix.remove(4)
+    names[3] = "usb cable"
+    del names[4]
+
+    rebuilt = CatalogMatrix()
+    rebuilt.build(names.items())
+    assert len(matrix) == len(rebuilt) == 9
+    for query in ("usb cable", "charger", "product 7"):
+        assert matrix.top_k(query, k=9) == rebuilt.top_k(query, k=9)
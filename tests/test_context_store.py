@@ -0,0 +1,109 @@
+"""
+Test Context Store - per-session conversation context backends
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database import get_db
+from app.main import app
+from app.models.customer import Customer
+from app.models.product import Product
+from app.services.ai_action_router import AIActionRouter
+from app.services.context_store import (
+    LocalRedisStub, MemoryContextStore, RedisContextStore, SQLiteContextStore
+)
+from app.services.invoice_renderer import invoice_renderer
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request):
+    """Each backend with room for two sessions"""
+    if request.param == "memory":
+        return MemoryContextStore(max_size=2)
+    if request.param == "sqlite":
+        sqlite_store = SQLiteContextStore(":memory:", max_size=2)
+        sqlite_store.PRUNE_EVERY = 1
+        return sqlite_store
+    return RedisContextStore(LocalRedisStub(), max_size=2)
+
+
+def test_store_isolates_sessions_and_evicts_oldest(store):
+    """Test sessions don't share context and the size bound drops the oldest"""
+    store.set("a", {"intent": "create_order", "entities": {"quantity": 2}})
+    store.set("b", {"intent": "generate_invoice"})
+    store.set("c", {"intent": "add_customer"})
+    assert store.get("a") is None
+    assert store.get("b") == {"intent": "generate_invoice"}
+
+    context = store.get("c")
+    context["intent"] = "unknown"
+    assert store.get("c") == {"intent": "add_customer"}
+
+    store.delete("b")
+    assert store.get("b") is None
+    store.clear()
+    assert store.get("c") is None
+
+
+def test_memory_store_expires_contexts(monkeypatch):
+    """Test contexts older than the TTL are gone"""
+    clock = [100.0]
+    monkeypatch.setattr("app.services.context_store.time.monotonic", lambda: clock[0])
+    store = MemoryContextStore(ttl_seconds=60)
+    store.set("a", {"status": "waiting_for_info"})
+    clock[0] += 59
+    assert store.get("a") is not None
+    clock[0] += 2
+    assert store.get("a") is None
+
+
+def test_router_resumes_pending_intent_per_session(db, tmp_path, monkeypatch):
+    """Test a follow-up answer completes the request of its own session only"""
+    monkeypatch.setattr(settings, "INVOICE_DIR", tmp_path)
+    db.add_all([
+        Customer(name="Rahul", phone="9000000001"),
+        Product(name="Laptop", price=45000.0, stock_quantity=10),
+    ])
+    db.commit()
+    store = MemoryContextStore()
+
+    first = AIActionRouter(db, session_id="chat-1", context_store=store)
+    result = first.process_message("Order 2 laptops")
+    assert result["action_result"]["missing"] == ["customer_name"]
+    assert store.get("chat-1")["missing_field"] == "customer_name"
+    assert store.get("chat-2") is None
+
+    # Pending order still needing its product
+    store.set("chat-1", {
+        "status": "waiting_for_info",
+        "intent": "create_order",
+        "entities": {"customer_name": "Rahul", "quantity": 2},
+        "missing_field": "product_name"
+    })
+    other = AIActionRouter(db, session_id="chat-2", context_store=store)
+    assert other.process_message("Laptop")["intent"] != "create_order"
+    assert store.get("chat-1") is not None
+
+    resumed = AIActionRouter(db, session_id="chat-1", context_store=store).process_message("Laptop")
+    invoice_renderer.wait_all(timeout=30)
+    assert resumed["intent"] == "create_order"
+    assert resumed["entities"]["product_name"] == "Laptop"
+    assert store.get("chat-1") is None
+
+
+def test_process_endpoint_mints_a_session_per_chat(db):
+    """Test requests without a session_id get their own instead of sharing one"""
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        first = client.post("/api/v1/ai/process", json={"message": "Order 2 laptops"}).json()
+        second = client.post("/api/v1/ai/process", json={"message": "Order 2 laptops"}).json()
+        given = client.post(
+            "/api/v1/ai/process", json={"message": "Order 2 laptops", "session_id": "chat-7"}
+        ).json()
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+    assert first["session_id"] and second["session_id"]
+    assert first["session_id"] != second["session_id"]
+    assert given["session_id"] == "chat-7"
@@ -0,0 +1,76 @@
+"""
+Test Customer Index - phonetic keys and name resolution
+"""
+from app.models.customer import Customer
+from app.schemas.customer import CustomerCreate
+from app.services.ai_action_router import AIActionRouter
+from app.services.customer_index import CustomerIndex, customer_index, phonetic_key
+from app.services.customer_service import CustomerService
+
+
+def test_phonetic_key_folds_spelling_variants():
+    """Test common romanizations of the same name share a key"""
+    assert phonetic_key("Sunil") == phonetic_key("Suneel")
+    assert phonetic_key("Pooja") == phonetic_key("Puja")
+    assert phonetic_key("Mohammad") == phonetic_key("Muhammed")
+    assert phonetic_key("Aditya") == phonetic_key("Adithya")
+    assert phonetic_key("Rahul") != phonetic_key("Rohit")
+
+
+def test_phonetic_key_keeps_distinct_names_apart():
+    """Test names that differ in their vowels don't share a key"""
+    assert phonetic_key("Priya") != phonetic_key("Puru")
+    assert phonetic_key("Meena") != phonetic_key("Mona")
+    assert phonetic_key("Meena") != phonetic_key("Mani")
+    assert phonetic_key("Sunil") != phonetic_key("Sonal")
+
+    index = CustomerIndex()
+    index._add(1, "Puru")
+    index._add(2, "Mona")
+    assert index.resolve("Priya") is None
+    assert index.resolve("Meena") is None
+
+
+def test_resolve_close_and_phonetic_names(db):
+    """Test difflib-close names resolve first, then same-sounding spellings"""
+    db.add_all([
+        Customer(name="Rahul Sharma", phone="9000000001"),
+        Customer(name="Sunil", phone="9000000002"),
+        Customer(name="Rahul Sharma", phone="9000000003"),
+    ])
+    db.commit()
+
+    index = CustomerIndex()
+    index.load(db)
+    assert index.resolve("rahul sharm") == 1
+    assert index.resolve("Suneel") == 2
+    assert index.resolve("Priya") is None
+    assert index.candidates("Rahul")[:2] == [1, 3]
+
+
+def test_router_finds_customers_past_first_page(db):
+    """Test customers beyond the first 100 rows are found instead of duplicated"""
+    db.add_all([Customer(name=f"Customer {i}", phone=f"90000{i:05d}") for i in range(150)])
+    db.commit()
+    latest = CustomerService.create_customer(
+        db, CustomerCreate(name="Kavita Nair", phone="9876500000")
+    )
+
+    router = AIActionRouter(db)
+    assert router._find_customer("kavita nair").id == latest.id
+
+    added = CustomerService.create_customer(db, CustomerCreate(name="Imran Khan", phone="9876511111"))
+    assert router._find_customer("Imraan Khan").id == added.id
+    customer_index.clear()
+
+
+def test_router_finds_customers_added_elsewhere(db):
+    """Test a customer written by another worker is found instead of duplicated"""
+    router = AIActionRouter(db)
+    assert router._find_customer("Anjali Rao") is None
+
+    db.add(Customer(name="Anjali Rao", phone="9876522222"))
+    db.commit()
+    found = router._find_customer("Anjali Rao")
+    assert found is not None and found.phone == "9876522222"
+    customer_index.clear()
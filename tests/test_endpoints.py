@@ -146,5 +146,17 @@ def test_generate_invoice():
     assert "id" in data
 
 
+def test_batch_intent_detection():
+    """Test batch intent endpoint returns per-message results in order"""
+    messages = ["Order 2 laptops for Rahul", "Check stock of mouse", "Order 2 laptops for Rahul"]
+    response = client.post("/api/v1/ai/test-intent/batch", json={"messages": messages})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 3
+    for message, result in zip(messages, data["results"]):
+        single = client.post("/api/v1/ai/test-intent", json={"message": message})
+        assert result == single.json()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
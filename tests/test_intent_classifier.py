@@ -0,0 +1,80 @@
+"""
+Test Intent Classifier - hashed n-gram model trained from the action log
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.models.ai_action import AIActionLog
+from app.services.ai_agent_engine import AIAgentEngine
+from app.services.intent_cache import IntentCache
+from app.services.intent_classifier import IntentClassifier, load_training_pairs
+
+TRAINING = [
+    ("order 2 laptops for ravi", "create_order"),
+    ("i want to buy 5 pens", "create_order"),
+    ("place an order for 3 chairs", "create_order"),
+    ("buy 1 phone for asha", "create_order"),
+    ("add new product mouse price 500", "add_product"),
+    ("add product keyboard at 1200", "add_product"),
+    ("new item monitor price 9000", "add_product"),
+    ("add product desk lamp 800", "add_product"),
+    ("show low stock items", "check_inventory"),
+    ("check stock of laptops", "check_inventory"),
+    ("how much inventory is left", "check_inventory"),
+    ("what is in stock", "check_inventory"),
+]
+
+
+def _trained(**kwargs):
+    texts, labels = zip(*TRAINING)
+    return IntentClassifier.train(list(texts), list(labels), hash_bits=12, epochs=100, **kwargs)
+
+
+def test_single_and_batch_predictions_agree():
+    """Test the one-message path scores exactly like the batch path"""
+    classifier = _trained()
+    texts = ["order 4 laptops for zoya", "add product tablet price 300", "check stock"]
+    batch = classifier.predict_batch(texts)
+    for text, (name, probability) in zip(texts, batch):
+        single_name, single_probability = classifier.predict(text)
+        assert single_name == name
+        assert single_probability == pytest.approx(probability, abs=1e-5)
+    assert [name for name, _ in batch] == ["create_order", "add_product", "check_inventory"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    """Test a saved model predicts the same after loading"""
+    classifier = _trained()
+    path = tmp_path / "intent.npz"
+    classifier.save(path)
+    loaded = IntentClassifier.load(path, min_confidence=0.5)
+
+    assert loaded.labels == classifier.labels
+    assert loaded.min_confidence == 0.5
+    assert loaded.predict("buy 2 pens") == pytest.approx(classifier.predict("buy 2 pens"))
+
+
+def test_engine_falls_back_to_keywords_when_unsure():
+    """Test confident predictions are used and unsure ones go to keyword scoring"""
+    confident = AIAgentEngine(cache=IntentCache(), classifier=_trained(min_confidence=0.0))
+    intent = confident.detect_intent("place an order for 3 chairs")
+    assert intent.name == "create_order"
+    assert intent.entities["quantity"] == 3
+
+    unsure = AIAgentEngine(cache=IntentCache(), classifier=_trained(min_confidence=1.01))
+    keyword = AIAgentEngine(cache=IntentCache())
+    for message in ("place an order for 3 chairs", "add product keyboard at 1200"):
+        assert unsure.detect_intent(message) == keyword.detect_intent(message)
+
+
+def test_training_pairs_come_from_intent_logs(db):
+    """Test only AI_INTENT_DETECTED_* rows become training pairs"""
+    db.add_all([
+        AIActionLog(action_type="AI_INTENT_DETECTED_CREATE_ORDER", input_text="Order 2 Pens "),
+        AIActionLog(action_type="AI_ACTION_ERROR", input_text="order 2 pens"),
+        AIActionLog(action_type="AI_INTENT_DETECTED_CHECK_INVENTORY", input_text="show stock"),
+    ])
+    db.commit()
+    texts, intents = load_training_pairs(db)
+    assert sorted(zip(texts, intents)) == [("order 2 pens", "create_order"), ("show stock", "check_inventory")]
@@ -0,0 +1,94 @@
+"""
+Test Invoice Rendering - background PDF generation
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.models.customer import Customer
+from app.models.invoice import Invoice
+from app.models.product import Product
+from app.schemas.order import OrderCreate, OrderItemCreate
+from app.services.invoice_renderer import InvoiceRenderer, invoice_renderer
+from app.services.invoice_service import InvoiceService
+from app.services.order_service import OrderService
+
+
+@pytest.fixture
+def order(db, tmp_path, monkeypatch):
+    """Order for one product, with invoices written to a temporary folder"""
+    monkeypatch.setattr(settings, "INVOICE_DIR", tmp_path)
+    db.add_all([
+        Customer(name="Rahul", phone="9000000001"),
+        Product(name="Laptop", price=45000.0, stock_quantity=10),
+    ])
+    db.commit()
+    return OrderService.create_order(
+        db, OrderCreate(customer_id=1, items=[OrderItemCreate(product_id=1, quantity=2)])
+    )
+
+
+def test_background_invoice_becomes_ready(db, order):
+    """Test the invoice returns in rendering state and the worker finishes the PDF"""
+    invoice = InvoiceService.generate_invoice(db, order.id, background=True)
+    assert invoice.status == "rendering"
+
+    assert invoice_renderer.wait(invoice.id, timeout=30)
+    db.refresh(invoice)
+    assert invoice.status == "ready"
+    assert os.path.getsize(invoice.file_path) > 0
+    assert InvoiceService.generate_invoice(db, order.id).id == invoice.id
+
+
+def test_failed_render_is_recorded_and_retried(db, order, monkeypatch):
+    """Test a rendering error marks the invoice failed and the next request renders it again"""
+    def broken_pdf(order, file_path):
+        raise RuntimeError("layout error")
+
+    create_pdf = InvoiceService._create_pdf
+    monkeypatch.setattr(InvoiceService, "_create_pdf", staticmethod(broken_pdf))
+    with pytest.raises(RuntimeError):
+        InvoiceService.generate_invoice(db, order.id)
+    assert InvoiceService.get_invoice_by_order(db, order.id).status == "failed"
+
+    monkeypatch.setattr(InvoiceService, "_create_pdf", staticmethod(create_pdf))
+    invoice = InvoiceService.generate_invoice(db, order.id)
+    assert invoice.status == "ready"
+    assert os.path.exists(invoice.file_path)
+
+
+def test_renderer_reuses_pending_job_and_runs_inline_when_disabled():
+    """Test one job per invoice while pending, and inline execution without background"""
+    renderer = InvoiceRenderer(max_workers=1)
+    release = threading.Event()
+    first = renderer.submit(1, release.wait, 5)
+    assert renderer.submit(1, release.wait, 5) is first
+    assert renderer.wait(1, timeout=0.01) is False
+    release.set()
+    assert renderer.wait(1, timeout=5)
+    assert renderer.wait_all(timeout=5) and renderer.wait(1, timeout=0)
+    renderer.shutdown()
+
+    calls = []
+    inline = InvoiceRenderer(background=False)
+    assert inline.submit(2, calls.append, "b") is None
+    assert calls == ["b"]
+
+
+def test_invoice_is_claimed_by_one_renderer(db, order):
+    """Test a queued invoice is claimed once, and an abandoned claim can be taken over"""
+    invoice = Invoice(order_id=order.id, file_path="invoice.pdf", status="rendering")
+    db.add(invoice)
+    db.commit()
+    assert InvoiceService._claim(db, invoice.id)
+    assert not InvoiceService._claim(db, invoice.id)
+    assert InvoiceService.resume_pending_invoices(db) == 0
+
+    db.refresh(invoice)
+    timeout = timedelta(seconds=settings.INVOICE_RENDER_CLAIM_TIMEOUT_SECONDS + 1)
+    invoice.render_claimed_at = datetime.utcnow() - timeout
+    db.commit()
+    assert InvoiceService._claim(db, invoice.id)
@@ -0,0 +1,92 @@
+"""
+Test Low Stock Monitor - debounced alerts and the reconciliation sweep
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, unit_of_work
+from app.models.notification import Notification
+from app.models.product import Product
+from app.services.low_stock_monitor import LowStockMonitor
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    """Session on a file database the monitor thread can open its own sessions on"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'stock.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _alerts(db):
+    db.expire_all()
+    return sorted(n.related_id for n in db.query(Notification).filter(Notification.type == "LOW_STOCK"))
+
+
+def test_burst_of_reports_becomes_one_check(file_db):
+    """Test repeated reports for a product are debounced into one check and one alert"""
+    monitor = LowStockMonitor(debounce_ms=50)
+    low, fine = Product(name="Cable", price=1.0, stock_quantity=3), Product(name="Mouse", price=1.0, stock_quantity=50)
+    file_db.add_all([low, fine])
+    file_db.commit()
+    try:
+        for _ in range(20):
+            monitor.notify(file_db, [low.id, fine.id])
+        assert monitor.flush(timeout=10)
+        assert monitor.checks == 1
+        assert _alerts(file_db) == [low.id]
+
+        monitor.notify(file_db, [low.id])
+        assert monitor.flush(timeout=10)
+        assert _alerts(file_db) == [low.id]  # cooldown
+    finally:
+        monitor.shutdown()
+
+
+def test_rolled_back_change_is_not_reported(file_db):
+    """Test reports made inside a unit of work that rolls back are dropped"""
+    monitor = LowStockMonitor(debounce_ms=0)
+    product = Product(name="Cable", price=1.0, stock_quantity=3)
+    file_db.add(product)
+    file_db.commit()
+    with pytest.raises(RuntimeError):
+        with unit_of_work(file_db):
+            monitor.notify(file_db, [product.id])
+            raise RuntimeError("order failed")
+    assert monitor.stats()["pending"] == 0 and not monitor.stats()["running"]
+
+
+
+def test_inline_alert_rolls_back_with_the_unit_of_work(file_db):
+    """Test an alert written inside a unit of work that later fails is not persisted"""
+    monitor = LowStockMonitor(background=False)
+    product = Product(name="Cable", price=1.0, stock_quantity=3)
+    file_db.add(product)
+    file_db.commit()
+    with pytest.raises(RuntimeError):
+        with unit_of_work(file_db):
+            monitor.notify(file_db, [product.id])
+            assert monitor.stats()["alerts"] == 1
+            raise RuntimeError("order failed")
+    assert _alerts(file_db) == []
+
+def test_sweep_checks_only_low_stock_candidates(file_db):
+    """Test the sweep alerts stock changed outside the event paths, reading only low rows"""
+    monitor = LowStockMonitor(cooldown_seconds=0)
+    file_db.add_all([Product(name=f"Item {i}", price=1.0, stock_quantity=50) for i in range(5)])
+    file_db.commit()
+    file_db.execute(text("UPDATE products SET stock_quantity = 2 WHERE id IN (2, 4)"))
+    file_db.commit()
+
+    assert monitor.sweep(file_db) == 2
+    assert _alerts(file_db) == [2, 4]
+    plan = file_db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM products WHERE stock_quantity <= reorder_threshold"
+    ))
+    assert "ix_products_low_stock" in " ".join(row[-1] for row in plan)
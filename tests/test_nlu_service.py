@@ -0,0 +1,26 @@
+"""
+Test NLU Service - app-wide warm engine
+"""
+from app.models.product import Product
+from app.services.customer_index import customer_index
+from app.services.intent_cache import intent_cache
+from app.services.nlu_service import NLUService
+from app.services.product_index import product_index
+
+
+def test_start_warms_indexes_and_shares_engine(db):
+    """Test startup builds the indexes without filling the shared cache, and routers reuse the engine"""
+    db.add(Product(name="Laptop", price=45000.0, stock_quantity=10))
+    db.commit()
+    intent_cache.clear()
+
+    service = NLUService()
+    assert service.start(db) > 0
+    try:
+        assert service.stats()["started"] and service.stats()["products_indexed"] == 1
+        assert len(intent_cache) == 0
+        assert service.router(db).engine is service.engine
+        assert service.router(db, session_id="chat-1").engine is service.engine
+    finally:
+        product_index.clear()
+        customer_index.clear()
@@ -0,0 +1,220 @@
+"""
+Test Order Service - stock reservation and order creation
+"""
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, unit_of_work
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.product import Product
+from app.schemas.order import OrderCreate, OrderItemCreate, OrderResponse
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+
+
+def _order(customer_id, *items):
+    return OrderCreate(
+        customer_id=customer_id,
+        items=[OrderItemCreate(product_id=pid, quantity=qty) for pid, qty in items]
+    )
+
+
+def _seed(db, *stocks):
+    customer = Customer(name="Asha", phone="9000000001")
+    products = [Product(name=f"Item {i}", price=100.0, stock_quantity=stock) for i, stock in enumerate(stocks)]
+    db.add_all([customer, *products])
+    db.commit()
+    return customer, products
+
+
+def test_stock_is_taken_with_conditional_updates(db):
+    """Test products load in one query and each is decremented by one UPDATE"""
+    customer, products = _seed(db, 10, 10, 10)
+    order_data = _order(customer.id, (products[0].id, 2), (products[1].id, 3))
+    db.expire_all()
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement.split()[0]))
+
+    order = OrderService.create_order(db, order_data)
+    assert order.order_total == 500.0
+    assert statements.count("UPDATE") == 2
+    # After the IN query, inside a savepoint of a real transaction
+    assert statements[:4] == ["SELECT", "BEGIN", "SAVEPOINT", "UPDATE"]
+    db.expire_all()
+    assert [p.stock_quantity for p in db.query(Product).order_by(Product.id)] == [8, 7, 10]
+
+
+def test_short_item_rolls_back_every_decrement(db):
+    """Test an order whose last item is short takes no stock at all"""
+    customer, products = _seed(db, 10, 1)
+    with pytest.raises(HTTPException) as error:
+        OrderService.create_order(db, _order(customer.id, (products[0].id, 2), (products[1].id, 1), (products[1].id, 1)))
+    assert error.value.status_code == 400
+    db.rollback()
+    assert [p.stock_quantity for p in db.query(Product).order_by(Product.id)] == [10, 1]
+
+
+def test_concurrent_orders_cannot_oversell(tmp_path):
+    """Test a stale stock read in one session can't take units another session already sold"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    first, second = Session(), Session()
+    try:
+        customer, (product,) = _seed(first, 1)
+        assert first.get(Product, product.id).stock_quantity == 1  # first now holds a stock read
+
+        OrderService.create_order(second, _order(customer.id, (product.id, 1)))
+        with pytest.raises(HTTPException) as error:
+            OrderService.create_order(first, _order(customer.id, (product.id, 1)))
+        assert error.value.detail == "Insufficient stock for product Item 0. Available: 0"
+        first.rollback()
+
+        assert first.query(Product).one().stock_quantity == 0
+        assert first.query(Order).count() == 1
+    finally:
+        first.close()
+        second.close()
+        engine.dispose()
+
+
+def test_failed_order_gives_back_reserved_stock(tmp_path):
+    """Test stock taken in the reserve_stock savepoint is rolled back with the order (file database)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'orders.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        customer, (product,) = _seed(db, 10)
+        with pytest.raises(RuntimeError):
+            with unit_of_work(db):
+                OrderService.create_order(db, _order(customer.id, (product.id, 3)))
+                raise RuntimeError("invoice failed")
+
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT stock_quantity FROM products")).scalar() == 10
+            assert conn.execute(text("SELECT COUNT(*) FROM orders")).scalar() == 0
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_bulk_best_effort_creates_the_orders_that_fit(db):
+    """Test earlier orders get stock first and a short order fails alone"""
+    customer, products = _seed(db, 5, 10)
+    orders = [
+        _order(customer.id, (products[0].id, 3), (products[1].id, 1)),
+        _order(customer.id, (products[0].id, 3)),
+        _order(customer.id, (products[1].id, 2)),
+        _order(customer.id, (999, 1)),
+    ]
+
+    results = OrderService.create_orders_bulk(db, orders, all_or_nothing=False)
+    assert [result["success"] for result in results] == [True, False, True, False]
+    assert results[1]["error"] == "Insufficient stock for product Item 0. Available: 2"
+    assert results[3]["error"] == "Product 999 not found"
+
+    db.expire_all()
+    assert [p.stock_quantity for p in db.query(Product).order_by(Product.id)] == [2, 7]
+    created = db.query(Order).order_by(Order.id).all()
+    assert [order.id for order in created] == [results[0]["order_id"], results[2]["order_id"]]
+    assert [len(order.items) for order in created] == [2, 1]
+    assert created[0].order_total == 400.0
+
+
+def test_bulk_all_or_nothing_writes_nothing_on_failure(db):
+    """Test one short order leaves stock and orders untouched"""
+    customer, products = _seed(db, 5)
+    orders = [_order(customer.id, (products[0].id, 3)), _order(customer.id, (products[0].id, 3))]
+
+    results = OrderService.create_orders_bulk(db, orders)
+    assert not any(result["success"] for result in results)
+    assert results[0]["error"].startswith("Skipped")
+    db.expire_all()
+    assert db.query(Product).one().stock_quantity == 5
+    assert db.query(Order).count() == 0
+
+
+def test_bulk_batches_stock_updates_items_and_logs(db):
+    """Test a batch costs one stock UPDATE per product and one INSERT for its items and logs"""
+    customer, products = _seed(db, 1000, 1000)
+    orders = [_order(customer.id, (products[i % 2].id, 1 + i % 5)) for i in range(50)]
+    db.expire_all()
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    results = OrderService.create_orders_bulk(db, orders)
+    assert all(result["success"] for result in results)
+    assert sum(s.startswith("UPDATE") for s in statements) == 2
+    assert sum(s.startswith("INSERT INTO order_items") for s in statements) == 1
+    assert sum(s.startswith("INSERT INTO ai_actions_log") for s in statements) == 1
+    # RETURNING in parameter order has no insert sentinel on SQLite, so orders go row by row
+    assert sum(s.startswith("INSERT INTO orders") for s in statements) == 50
+
+    # Each returned ID belongs to the order at the same position in the request
+    created = {order.id: order for order in db.query(Order)}
+    for order_data, result in zip(orders, results):
+        (item,) = created[result["order_id"]].items
+        assert (item.product_id, item.quantity) == (order_data.items[0].product_id, order_data.items[0].quantity)
+
+
+def test_order_listings_load_items_in_fixed_queries(db):
+    """Test serializing a page of orders doesn't lazy-load items per order (N+1)"""
+    customer, products = _seed(db, 1000, 1000)
+    customer_id = customer.id
+    OrderService.create_orders_bulk(db, [_order(customer_id, (products[0].id, 1), (products[1].id, 2))] * 30)
+    db.expire_all()
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    for orders in (OrderService.get_all_orders(db, 0, 100), OrderService.get_customer_orders(db, customer_id)):
+        page = [OrderResponse.model_validate(order) for order in orders]
+        assert len(page) == 30 and all(len(order.items) == 2 for order in page)
+    assert len(statements) == 4  # orders + items, per listing
+
+
+def test_order_filters_and_pending_count_use_status_index(db):
+    """Test status/customer/date filters narrow the listing and the (status, created_at) index serves them"""
+    customer, products = _seed(db, 1000)
+    other = Customer(name="Ravi", phone="9000000002")
+    db.add(other)
+    db.commit()
+    for i, (customer_id, status) in enumerate([(customer.id, "pending"), (other.id, "pending"),
+                                               (customer.id, "approved"), (customer.id, "pending")]):
+        db.add(Order(customer_id=customer_id, order_total=1.0, status=status, created_at=datetime(2024, 1, 1 + i)))
+    db.commit()
+
+    assert [o.id for o in OrderService.get_all_orders(db, status="pending")] == [1, 2, 4]
+    assert [o.id for o in OrderService.get_all_orders(db, status="pending", customer_id=customer.id)] == [1, 4]
+    window = {"created_from": datetime(2024, 1, 2), "created_to": datetime(2024, 1, 4)}
+    assert [o.id for o in OrderService.get_all_orders(db, **window)] == [2, 3]
+    assert OrderService.count_orders(db, "pending") == 3
+    page, cursor = OrderService.get_orders_page(db, 2, status="pending", newest_first=True)
+    assert [o.id for o in page] == [4, 2]
+    assert [o.id for o in OrderService.get_orders_page(db, 2, cursor=cursor, status="pending", newest_first=True)[0]] == [1]
+
+    query = OrderService._filtered(db, "pending", created_from=datetime(2024, 1, 2)).order_by(Order.created_at)
+    plan = db.execute(text("EXPLAIN QUERY PLAN " + str(query.statement.compile(compile_kwargs={"literal_binds": True}))))
+    assert "ix_orders_status_created_at" in " ".join(row[-1] for row in plan)
+
+
+def test_low_stock_query_reads_the_partial_index(db):
+    """Test low-stock products come from ix_products_low_stock and follow stock and threshold changes"""
+    customer, products = _seed(db, 12, 50, 5)
+    assert [p.id for p in ProductService.get_low_stock_products(db)] == [products[2].id]
+
+    OrderService.create_order(db, _order(customer.id, (products[0].id, 2)))
+    products[2].reorder_threshold = 4
+    db.commit()
+    assert [p.id for p in ProductService.get_low_stock_products(db)] == [products[0].id]
+
+    query = db.query(Product).filter(Product.stock_quantity <= Product.reorder_threshold)
+    plan = db.execute(text("EXPLAIN QUERY PLAN " + str(query.statement)))
+    assert "USING INDEX ix_products_low_stock" in " ".join(row[-1] for row in plan)
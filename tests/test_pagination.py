@@ -0,0 +1,56 @@
+"""
+Test Pagination - keyset cursors on list endpoints
+"""
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.ai_action import AIActionLog
+from app.models.product import Product
+from app.services.ai_logger_service import AILoggerService
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.product_service import ProductService
+
+
+def _walk(fetch):
+    """Every row reached by following next_cursor from the first page"""
+    rows, cursor = fetch(None)
+    while cursor:
+        page, cursor = fetch(cursor)
+        rows.extend(page)
+    return rows
+
+
+def test_cursor_pages_cover_every_row_once(db):
+    """Test following cursors returns every product in ID order, and skip still works"""
+    db.add_all([Product(name=f"Item {i}", price=10.0) for i in range(25)])
+    db.commit()
+
+    rows = _walk(lambda cursor: ProductService.get_products_page(db, 10, cursor=cursor))
+    assert [p.id for p in rows] == list(range(1, 26))
+
+    page, cursor = ProductService.get_products_page(db, 10, skip=20)
+    assert [p.id for p in page] == [21, 22, 23, 24, 25] and cursor is None
+    page, cursor = ProductService.get_products_page(db, 10, skip=5)
+    assert ProductService.get_products_page(db, 10, cursor=cursor)[0][0].id == 16
+
+
+def test_log_cursor_is_newest_first_and_breaks_timestamp_ties(db):
+    """Test logs sharing a timestamp are neither skipped nor repeated across pages"""
+    moments = [datetime(2024, 1, 1, 12, 0, i // 3) for i in range(10)]
+    db.add_all([AIActionLog(action_type="TEST", timestamp=moment) for moment in moments])
+    db.commit()
+
+    rows = _walk(lambda cursor: AILoggerService.get_logs_page(db, 4, cursor=cursor))
+    assert [log.id for log in rows] == [10, 9, 8, 7, 6, 5, 4, 3, 2, 1]
+
+
+def test_malformed_cursor_is_rejected(db):
+    """Test garbage or mismatched cursors raise 400"""
+    keys = (AIActionLog.timestamp, AIActionLog.id)
+    assert decode_cursor(encode_cursor([datetime(2024, 1, 1), 7]), keys) == [datetime(2024, 1, 1), 7]
+    for cursor in ("not-a-cursor", encode_cursor([1]), encode_cursor(["x", "y"])):
+        with pytest.raises(HTTPException) as error:
+            decode_cursor(cursor, keys)
+        assert error.value.status_code == 400
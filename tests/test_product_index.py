@@ -0,0 +1,74 @@
+"""
+Test Product Index - ranking and sync with product writes
+"""
+from app.models.product import Product
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.services.product_index import ProductIndex, product_index
+from app.services.product_service import ProductService
+
+
+def _create(db, name):
+    return ProductService.create_product(db, ProductCreate(name=name, price=100, stock_quantity=5))
+
+
+def test_best_match_ranking(db):
+    """Test exact, contains, shared-word and fuzzy matches rank like the linear scan"""
+    keyboard = _create(db, "Keyboard")
+    logitech = _create(db, "Logitech Keyboard")
+    mouse = _create(db, "Logitech Wireless Mouse")
+    cable = _create(db, "USB-C Cable")
+
+    index = ProductIndex()
+    index.load(db)
+    assert index.find_best_match("keyboard") == keyboard.id
+    assert index.find_best_match("Logitech Keyboard") == logitech.id
+    assert index.find_best_match("wireless mouse") == mouse.id
+    assert index.find_best_match("logitech cable") == logitech.id  # brand word bonus
+    assert index.find_best_match("usb-c cabel") == cable.id
+    assert index.find_best_match("tractor") is None
+
+
+def test_index_follows_product_writes(db):
+    """Test create, rename and delete through ProductService update the shared index"""
+    product_index.load(db)
+    product = _create(db, "Office Chair")
+    assert product_index.find_best_match("office chair") == product.id
+
+    ProductService.update_product(db, product.id, ProductUpdate(name="Desk Lamp"))
+    assert product_index.find_best_match("desk lamp") == product.id
+    assert product_index.find_best_match("office chair") is None
+
+    ProductService.delete_product(db, product.id)
+    assert product_index.find_best_match("desk lamp") is None
+    product_index.clear()
+
+
+def test_find_containing_returns_first_match_by_id(db):
+    """Test containment lookup keeps the old scan's order (first product by ID), even for short terms"""
+    bag = _create(db, "HP Laptop Bag")
+    laptop = _create(db, "HP Laptop")
+    index = ProductIndex()
+    index.load(db)
+    assert index.find_containing("laptop") == bag.id
+    assert index.find_containing("hp") == bag.id
+    assert index.find_containing("hp laptop") == bag.id
+    assert index.find_containing("tablet") is None
+
+
+def test_ensure_loaded_picks_up_products_written_elsewhere(db):
+    """Test products inserted or deleted without ProductService are found after ensure_loaded"""
+    _create(db, "Laptop")
+    index = ProductIndex()
+    index.ensure_loaded(db)
+
+    # As written by another worker or a seed script
+    db.add(Product(name="Laptop Pro", price=900, stock_quantity=2))
+    db.commit()
+    pro = db.query(Product).filter(Product.name == "Laptop Pro").one()
+    index.ensure_loaded(db)
+    assert index.find_best_match("laptop pro") == pro.id
+
+    db.delete(pro)
+    db.commit()
+    index.ensure_loaded(db)
+    assert index.find_containing("laptop pro") is None
@@ -0,0 +1,115 @@
+"""
+Test Unit of Work - one transaction per AI message
+"""
+import pytest
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import on_commit, savepoint, unit_of_work
+from app.models.ai_action import AIActionLog
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.product import Product
+from app.schemas.customer import CustomerCreate
+from app.services.ai_action_router import AIActionRouter
+from app.services.context_store import MemoryContextStore
+from app.services.customer_service import CustomerService
+from app.services.invoice_renderer import invoice_renderer
+from app.services.invoice_service import InvoiceService
+
+
+def _count_commits(db):
+    commits = []
+    event.listen(db.get_bind(), "commit", lambda conn: commits.append(1))
+    return commits
+
+
+def test_order_message_commits_once(db, tmp_path, monkeypatch):
+    """Test an AI order (guest customer, order, stock, invoice row, logs) is a single commit"""
+    monkeypatch.setattr(settings, "INVOICE_DIR", tmp_path)
+    db.add(Product(name="Laptop", price=45000.0, stock_quantity=10))
+    db.commit()
+    commits = _count_commits(db)
+
+    router = AIActionRouter(db, context_store=MemoryContextStore())
+    result = router.process_message("Order 2 laptops for Zoya")
+    assert result["action_result"]["status"] == "success"
+    assert len(commits) == 1
+
+    invoice_renderer.wait_all(timeout=30)
+    assert db.query(Customer).filter(Customer.name == "Zoya").count() == 1
+    assert db.query(Product).first().stock_quantity == 8
+    assert InvoiceService.get_invoice(db, result["action_result"]["invoice_id"]).status == "ready"
+
+
+def test_failed_action_rolls_back_its_writes(db, monkeypatch):
+    """Test an error mid-action leaves no partial order behind, only the intent and error logs"""
+    db.add(Product(name="Laptop", price=45000.0, stock_quantity=10))
+    db.commit()
+
+    def broken_invoice(db, order_id, background=False):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(InvoiceService, "generate_invoice", staticmethod(broken_invoice))
+    router = AIActionRouter(db, context_store=MemoryContextStore())
+    result = router.process_message("Order 2 laptops for Zoya")
+
+    assert result["action_result"] == {"status": "error", "message": "disk full"}
+    assert db.query(Order).count() == 0
+    assert db.query(Customer).count() == 0
+    assert db.query(Product).first().stock_quantity == 10
+    assert [log.action_type for log in db.query(AIActionLog).order_by(AIActionLog.id)] == [
+        "AI_INTENT_DETECTED_CREATE_ORDER", "AI_ACTION_ERROR"
+    ]
+
+
+
+def test_failed_customer_creation_keeps_the_intent_log(db, monkeypatch):
+    """Test a duplicate phone on guest creation returns its error and keeps the intent log"""
+    db.add_all([
+        Product(name="Laptop", price=45000.0, stock_quantity=10),
+        Customer(name="Meera", phone="+919876543210"),
+    ])
+    db.commit()
+    # Another request took the phone after the lookup
+    monkeypatch.setattr(CustomerService, "get_customer_by_phone", staticmethod(lambda db, phone: None))
+
+    router = AIActionRouter(db, context_store=MemoryContextStore())
+    result = router.process_message("Order 2 laptops for Zoya 9876543210")
+
+    assert result["action_result"]["status"] == "error"
+    assert result["action_result"]["message"].startswith("Could not create customer:")
+    assert [c.name for c in db.query(Customer)] == ["Meera"]
+    assert [log.action_type for log in db.query(AIActionLog)] == ["AI_INTENT_DETECTED_CREATE_ORDER"]
+
+def test_on_commit_callbacks_wait_for_commit(db):
+    """Test deferred callbacks run after the final commit and are dropped on rollback"""
+    calls = []
+    with unit_of_work(db):
+        CustomerService.create_customer(db, CustomerCreate(name="Asha", phone="9000000001"))
+        on_commit(db, lambda: calls.append("committed"))
+        assert calls == []
+    assert calls == ["committed"]
+
+    with pytest.raises(RuntimeError):
+        with unit_of_work(db):
+            CustomerService.create_customer(db, CustomerCreate(name="Ravi", phone="9000000002"))
+            on_commit(db, lambda: calls.append("rolled back"))
+            raise RuntimeError("abort")
+    assert calls == ["committed"]
+    assert [c.name for c in db.query(Customer)] == ["Asha"]
+
+
+def test_savepoint_undoes_only_its_own_work(db):
+    """Test a failed savepoint drops its writes and callbacks but keeps earlier ones"""
+    calls = []
+    with unit_of_work(db):
+        CustomerService.create_customer(db, CustomerCreate(name="Asha", phone="9000000001"))
+        on_commit(db, lambda: calls.append("kept"))
+        with pytest.raises(RuntimeError):
+            with savepoint(db):
+                CustomerService.create_customer(db, CustomerCreate(name="Ravi", phone="9000000002"))
+                on_commit(db, lambda: calls.append("dropped"))
+                raise RuntimeError("abort")
+    assert calls == ["kept"]
+    assert [c.name for c in db.query(Customer)] == ["Asha"]
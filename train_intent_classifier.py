@@ -0,0 +1,68 @@
+"""
+Train the statistical intent classifier from the AI action log
+
+Reads input_text / AI_INTENT_DETECTED_<INTENT> pairs from ai_actions_log in
+DATABASE_URL, fits the hashed n-gram model and writes it as .npz. Point
+AI_INTENT_CLASSIFIER_PATH at the output to use it on the next start.
+
+Usage:
+    python train_intent_classifier.py [--output models/intent_classifier.npz]
+                                      [--limit 50000] [--min-examples 20]
+"""
+import argparse
+import random
+import sys
+from collections import Counter
+
+from app.config import settings
+from app.database import SessionLocal, init_db
+from app.services.intent_classifier import IntentClassifier, load_training_pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the intent classifier from ai_actions_log")
+    parser.add_argument("--output", default=str(settings.BASE_DIR / "models" / "intent_classifier.npz"))
+    parser.add_argument("--limit", type=int, help="use only the most recent N log rows")
+    parser.add_argument("--min-examples", type=int, default=20,
+                        help="skip intents with fewer logged messages")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--holdout", type=float, default=0.1, help="share kept aside for evaluation")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        texts, intents = load_training_pairs(db, limit=args.limit)
+    finally:
+        db.close()
+
+    counts = Counter(intents)
+    keep = {intent for intent, count in counts.items() if count >= args.min_examples}
+    pairs = [(text, intent) for text, intent in zip(texts, intents) if intent in keep]
+    if len(keep) < 2:
+        print(f"❌ Need at least 2 intents with {args.min_examples}+ logged messages, found: {dict(counts)}")
+        sys.exit(1)
+
+    random.Random(42).shuffle(pairs)
+    split = int(len(pairs) * (1 - args.holdout))
+    train, holdout = pairs[:split], pairs[split:]
+    print(f"📚 {len(train)} training / {len(holdout)} holdout messages over {len(keep)} intents")
+
+    classifier = IntentClassifier.train(
+        [text for text, _ in train], [intent for _, intent in train], epochs=args.epochs
+    )
+    if holdout:
+        predictions = classifier.predict_batch([text for text, _ in holdout])
+        correct = sum(name == intent for (name, _), (_, intent) in zip(predictions, holdout))
+        confident = [(name, intent) for (name, prob), (_, intent) in zip(predictions, holdout)
+                     if prob >= settings.AI_CLASSIFIER_MIN_CONFIDENCE]
+        print(f"🎯 Holdout agreement: {correct / len(holdout):.1%}, "
+              f"{len(confident) / len(holdout):.1%} above {settings.AI_CLASSIFIER_MIN_CONFIDENCE} "
+              f"({sum(a == b for a, b in confident) / max(len(confident), 1):.1%} agreement)")
+
+    classifier.save(args.output)
+    print(f"✅ Model written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()